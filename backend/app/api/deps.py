@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, Request, status
@@ -8,11 +11,13 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.database.session import get_db, set_tenant_context
 from app.models.iam import User
-from app.services.rbac import RbacService
-from app.utils.security import decode_token
+from app.services.rbac import CompiledPermissions, RbacService
+from app.utils.security import decode_token, scope_hash
 
+settings = get_settings()
 security = HTTPBearer(auto_error=True)
 
 
@@ -26,11 +31,24 @@ async def get_request_institution_id(request: Request) -> UUID:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid institution id") from exc
 
 
-async def get_current_user(
+@dataclass(slots=True)
+class Principal:
+    """Authenticated caller resolved once per request and kept on ``request.state``."""
+
+    user: User
+    claims: dict[str, Any]
+    token_permissions: CompiledPermissions | None = None
+
+
+async def get_principal(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> Principal:
+    principal: Principal | None = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
     token = credentials.credentials
     try:
         payload = decode_token(token)
@@ -52,7 +70,21 @@ async def get_current_user(
     user = (await db.execute(stmt)).scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+
+    principal = Principal(user=user, claims=payload)
+    digest = payload.get("authz")
+    if (
+        settings.JWT_EMBED_PERMISSION_DIGEST
+        and digest is not None
+        and payload.get("scope_hash") == scope_hash(user.id, user.updated_at)
+    ):
+        principal.token_permissions = CompiledPermissions.from_digest(digest)
+    request.state.principal = principal
+    return principal
+
+
+async def get_current_user(principal: Principal = Depends(get_principal)) -> User:
+    return principal.user
 
 
 async def get_db_with_tenant(
@@ -72,13 +104,25 @@ def require_permission(permission_code: str, scope_type: str | None = None) -> C
         requested_scope_type = scope_type or request.headers.get("x-scope-type")
         requested_scope_id = request.headers.get("x-scope-id")
 
-        service = RbacService(db)
-        has_permission = await service.user_has_permission(
-            user=current_user,
-            permission_code=permission_code,
-            scope_type=requested_scope_type,
-            scope_id=requested_scope_id,
+        # Grants carried in a fresh token digest are trusted as-is; denials are re-checked
+        # against the database so permissions granted after the token was minted apply at once.
+        principal: Principal | None = getattr(request.state, "principal", None)
+        has_permission = (
+            principal is not None
+            and principal.user is current_user
+            and principal.token_permissions is not None
+            and principal.token_permissions.allows(
+                permission_code, requested_scope_type, requested_scope_id, datetime.now(UTC)
+            )
         )
+        if not has_permission:
+            service = RbacService(db)
+            has_permission = await service.user_has_permission(
+                user=current_user,
+                permission_code=permission_code,
+                scope_type=requested_scope_type,
+                scope_id=requested_scope_id,
+            )
         if not has_permission:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
 
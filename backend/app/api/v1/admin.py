@@ -1,18 +1,24 @@
 from __future__ import annotations
 
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_with_tenant, require_permission
+from app.config import get_settings
 from app.models.iam import User
 from app.models.offline import SyncConflict
 from app.models.receipts import Receipt
+from app.schemas.receipt import ReceiptChainVerificationRead, ReceiptVerificationJobRead
+from app.services.receipt_verification import ReceiptChainVerifier, verification_jobs
 from app.services.sync import SyncService
+from app.tasks.celery_app import celery_app
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.get("/conflicts")
@@ -45,3 +51,54 @@ async def admin_receipt_chain(
 ):
     stmt = select(Receipt).where(Receipt.user_id == user_id).order_by(Receipt.chain_position.asc())
     return (await db.execute(stmt)).scalars().all()
+
+
+@router.get("/receipts/verify", response_model=ReceiptChainVerificationRead)
+async def admin_verify_receipt_chains(
+    user_id: UUID | None = None,
+    course_id: UUID | None = None,
+    db: AsyncSession = Depends(get_db_with_tenant),
+    current_user: User = Depends(require_permission("admin.receipts")),
+):
+    """Verify one user's chain or every chain of a course's students, within the request.
+
+    The hashing stays on a single thread of the request's worker; a whole institution
+    is verified by a background job instead.
+    """
+    if (user_id is None) == (course_id is None):
+        raise HTTPException(
+            status_code=400, detail="Pass either user_id or course_id; POST /receipts/verify checks the institution"
+        )
+    verifier = ReceiptChainVerifier(db, batch_size=settings.RECEIPT_VERIFY_BATCH_SIZE, workers=1)
+    if user_id is not None:
+        return await verifier.verify_user(current_user.institution_id, user_id)
+    return await verifier.verify_course(current_user.institution_id, course_id)
+
+
+@router.post("/receipts/verify", response_model=ReceiptVerificationJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def admin_start_receipt_verification(
+    current_user: User = Depends(require_permission("admin.receipts")),
+) -> ReceiptVerificationJobRead:
+    """Queue verification of every receipt chain of the institution."""
+    job_id = uuid4().hex
+    # Recorded before the task exists, so its state is never readable without an owner check.
+    await verification_jobs.register(job_id, current_user.institution_id)
+    celery_app.send_task(
+        "app.tasks.receipts.verify_receipt_chains", args=[str(current_user.institution_id)], task_id=job_id
+    )
+    return ReceiptVerificationJobRead(job_id=job_id, status="queued")
+
+
+@router.get("/receipts/verify/jobs/{job_id}", response_model=ReceiptVerificationJobRead)
+async def admin_receipt_verification_job(
+    job_id: str,
+    current_user: User = Depends(require_permission("admin.receipts")),
+) -> ReceiptVerificationJobRead:
+    if await verification_jobs.owner(job_id) != current_user.institution_id:
+        raise HTTPException(status_code=404, detail="Verification job not found")
+    job = celery_app.AsyncResult(job_id)
+    state = await run_in_threadpool(lambda: job.state)
+    if state != "SUCCESS":
+        return ReceiptVerificationJobRead(job_id=job_id, status=state.lower())
+    report = ReceiptChainVerificationRead.model_validate(await run_in_threadpool(lambda: job.result))
+    return ReceiptVerificationJobRead(job_id=job_id, status="done", report=report)
@@ -3,13 +3,16 @@ from __future__ import annotations
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_with_tenant, require_permission
 from app.models.academics import Assessment
 from app.models.iam import User
-from app.schemas.assessment import AssessmentCreate, AssessmentRead
+from app.schemas.assessment import AssessmentCreate, AssessmentRead, RegradeJobRead
+from app.services.regrade import RegradeJob, RegradeService, regrade_jobs
+from app.tasks.celery_app import celery_app
 
 router = APIRouter()
 
@@ -97,3 +100,63 @@ async def archive_assessment(
     await db.commit()
     await db.refresh(assessment)
     return assessment
+
+
+async def _get_regrade_job(job_id: str, current_user: User) -> RegradeJob:
+    try:
+        job = await regrade_jobs.get(job_id)
+    except RedisError as exc:
+        raise HTTPException(status_code=503, detail="Regrade jobs are unavailable") from exc
+    if job is None or job.institution_id != current_user.institution_id:
+        raise HTTPException(status_code=404, detail="Regrade job not found")
+    return job
+
+
+@router.post("/{assessment_id}/regrade", response_model=RegradeJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def regrade_assessment(
+    assessment_id: UUID,
+    db: AsyncSession = Depends(get_db_with_tenant),
+    current_user: User = Depends(require_permission("grade.override")),
+) -> RegradeJobRead:
+    stmt = select(Assessment.id).where(Assessment.id == assessment_id, Assessment.deleted_at.is_(None))
+    if (await db.execute(stmt)).scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    try:
+        job = await RegradeService(db).start(
+            institution_id=current_user.institution_id, assessment_id=assessment_id, requested_by=current_user.id
+        )
+    except RedisError as exc:
+        raise HTTPException(status_code=503, detail="Regrade jobs are unavailable") from exc
+    celery_app.send_task("app.tasks.grading.regrade_assessment", args=[job.id])
+    return job
+
+
+@router.get("/regrade-jobs/{job_id}", response_model=RegradeJobRead)
+async def get_regrade_job(
+    job_id: str,
+    current_user: User = Depends(require_permission("grade.override")),
+) -> RegradeJobRead:
+    return await _get_regrade_job(job_id, current_user)
+
+
+@router.post("/regrade-jobs/{job_id}/pause", response_model=RegradeJobRead)
+async def pause_regrade_job(
+    job_id: str,
+    current_user: User = Depends(require_permission("grade.override")),
+) -> RegradeJobRead:
+    await _get_regrade_job(job_id, current_user)
+    if not await regrade_jobs.transition(job_id, "paused", allowed=("queued", "running")):
+        raise HTTPException(status_code=409, detail="Regrade job is not running")
+    return await _get_regrade_job(job_id, current_user)
+
+
+@router.post("/regrade-jobs/{job_id}/resume", response_model=RegradeJobRead)
+async def resume_regrade_job(
+    job_id: str,
+    current_user: User = Depends(require_permission("grade.override")),
+) -> RegradeJobRead:
+    await _get_regrade_job(job_id, current_user)
+    if not await regrade_jobs.transition(job_id, "queued", allowed=("paused",)):
+        raise HTTPException(status_code=409, detail="Regrade job is not paused")
+    celery_app.send_task("app.tasks.grading.regrade_assessment", args=[job_id])
+    return await _get_regrade_job(job_id, current_user)
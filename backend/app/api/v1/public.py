@@ -13,8 +13,10 @@ from app.models.iam import Institution
 from app.models.receipts import Receipt
 from app.models.student_success import Quote
 from app.models.timetable import Venue
+from app.schemas.receipt import ReceiptSigningKeyRead
 from app.services.receipt import ReceiptService
 from app.services.quote import QuoteService
+from app.utils.security import RECEIPT_SIGNATURE_SCHEME, receipt_public_key_pem, receipt_signing_key, signing_key_id
 
 router = APIRouter()
 
@@ -59,6 +61,16 @@ async def quote_today(db: AsyncSession = Depends(get_db_session)):
     return {"id": str(quote.id), "text": quote.text, "author": quote.author, "language": quote.language}
 
 
+@router.get("/receipts/signing-key", response_model=ReceiptSigningKeyRead)
+async def receipt_signing_public_key() -> ReceiptSigningKeyRead:
+    """The public key that checks the signed checkpoint roots in receipt inclusion proofs."""
+    return ReceiptSigningKeyRead(
+        signature_scheme=RECEIPT_SIGNATURE_SCHEME,
+        key_id=signing_key_id(receipt_signing_key().public_key()),
+        public_key_pem=receipt_public_key_pem(),
+    )
+
+
 @router.get("/demo/receipt")
 async def demo_receipt(db: AsyncSession = Depends(get_db_session)):
     institution_id = await _default_institution_id(db)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import UTC, datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -20,35 +21,23 @@ async def get_my_authorization_state(
     db: AsyncSession = Depends(get_db_with_tenant),
     current_user: User = Depends(get_current_user),
 ) -> CurrentAuthzResponse:
-    service = RbacService(db)
-    bindings = await service.get_user_bindings(user=current_user)
-    role_ids = [binding.role_id for binding in bindings]
-
-    role_code_by_id: dict = {}
-    if role_ids:
-        roles_stmt = select(Role).where(
-            Role.id.in_(role_ids),
-            Role.institution_id == current_user.institution_id,
-            Role.deleted_at.is_(None),
-        )
-        role_code_by_id = {role.id: role.code for role in (await db.execute(roles_stmt)).scalars().all()}
-
-    permissions = await service.get_user_permissions(user=current_user)
+    snapshot = await RbacService(db).get_authorization_snapshot(user=current_user)
+    now = datetime.now(UTC)
     return CurrentAuthzResponse(
         user_id=current_user.id,
         institution_id=current_user.institution_id,
         roles=[
             RoleBindingRead(
-                role_code=role_code_by_id.get(binding.role_id, "unknown"),
+                role_code=binding.role_code,
                 scope_type=binding.scope_type,
                 scope_id=binding.scope_id,
                 start_at=binding.start_at,
                 end_at=binding.end_at,
                 active=binding.active,
             )
-            for binding in bindings
+            for binding in snapshot.active_bindings(now)
         ],
-        permissions=permissions,
+        permissions=snapshot.permission_codes(now),
     )
 
 
@@ -83,9 +72,8 @@ async def get_user_authorization_state(
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    service = RbacService(db)
-    bindings = await service.get_user_bindings(user=user)
-    permissions = await service.get_user_permissions(user=user)
+    snapshot = await RbacService(db).get_authorization_snapshot(user=user)
+    permissions = snapshot.permission_codes(datetime.now(UTC))
 
     roles_stmt = (
         select(RoleBinding, Role.code)
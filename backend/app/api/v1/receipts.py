@@ -9,8 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db_with_tenant, require_permission
 from app.models.iam import User
 from app.models.receipts import Receipt
-from app.schemas.receipt import ReceiptRead, ReceiptVerifyResponse
+from app.schemas.receipt import MerkleProofStep, ReceiptInclusionProof, ReceiptRead, ReceiptVerifyResponse
 from app.services.receipt import ReceiptService
+from app.services.receipt_checkpoint import ReceiptCheckpointService
 
 router = APIRouter()
 
@@ -48,11 +49,27 @@ async def verify_receipt(
     if receipt is None:
         raise HTTPException(status_code=404, detail="Receipt not found")
     valid = ReceiptService.verify_receipt(receipt)
+    proof = await ReceiptCheckpointService(db).inclusion_proof(receipt)
+    inclusion_proof = None
+    if proof is not None:
+        valid = valid and proof.valid
+        inclusion_proof = ReceiptInclusionProof(
+            day=proof.checkpoint.day,
+            leaf_index=proof.leaf_index,
+            leaf_count=proof.checkpoint.leaf_count,
+            leaf_hash=proof.leaf_hash,
+            root_hash=proof.checkpoint.root_hash,
+            signature_scheme=proof.checkpoint.signature_scheme,
+            signing_key_id=proof.checkpoint.signing_key_id,
+            signature=proof.checkpoint.signature,
+            path=[MerkleProofStep(hash=sibling, side=side) for sibling, side in proof.path],
+        )
     return ReceiptVerifyResponse(
         valid=valid,
         receipt_code=receipt.receipt_code,
         receipt_hash=receipt.receipt_hash,
         previous_receipt_hash=receipt.previous_receipt_hash,
+        inclusion_proof=inclusion_proof,
     )
 
 
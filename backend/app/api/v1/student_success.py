@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,6 +8,8 @@ from app.api.deps import get_db_with_tenant, require_permission
 from app.models.academics import UserSkill
 from app.models.iam import User
 from app.models.student_success import AcademicStreak, StudentRiskScore, UserBadge
+from app.schemas.analytics import DashboardResponse
+from app.services.dashboard import DashboardService
 
 router = APIRouter()
 
@@ -54,27 +56,14 @@ async def get_skills(
     return (await db.execute(stmt)).scalars().all()
 
 
-@router.get("/dashboard")
+@router.get("/dashboard", response_model=DashboardResponse)
 async def get_dashboard(
-    db: AsyncSession = Depends(get_db_with_tenant),
+    request: Request,
     current_user: User = Depends(require_permission("student_success.read.own")),
-):
-    risk_stmt = (
-        select(StudentRiskScore)
-        .where(StudentRiskScore.user_id == current_user.id)
-        .order_by(StudentRiskScore.computed_at.desc())
-        .limit(1)
-    )
-    risk = (await db.execute(risk_stmt)).scalar_one_or_none()
-
-    streaks_stmt = select(AcademicStreak).where(AcademicStreak.user_id == current_user.id)
-    badges_stmt = select(UserBadge).where(UserBadge.user_id == current_user.id)
-    skills_stmt = select(UserSkill).where(UserSkill.user_id == current_user.id)
-
-    return {
-        "user_id": str(current_user.id),
-        "risk": risk,
-        "streaks": (await db.execute(streaks_stmt)).scalars().all(),
-        "badges": (await db.execute(badges_stmt)).scalars().all(),
-        "skills": (await db.execute(skills_stmt)).scalars().all(),
-    }
+) -> Response:
+    """The landing page: served from the Redis read model, 304 when the ETag still matches."""
+    dashboard = await DashboardService().get(current_user.institution_id, current_user.id)
+    headers = {"ETag": dashboard.etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == dashboard.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=dashboard.body, media_type="application/json", headers=headers)
@@ -1,26 +1,35 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from datetime import datetime, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_with_tenant, require_permission
-from app.models.academics import AssessmentAttempt, AssessmentResponse, AssessmentResult
+from app.config import get_settings
+from app.models.academics import AssessmentAttempt, AssessmentResult
 from app.models.iam import User
 from app.schemas.submission import (
     AssessmentAttemptCreate,
+    AssessmentAttemptDetail,
     AssessmentAttemptRead,
+    AssessmentResponseBatch,
     AssessmentResponseCreate,
     AssessmentResultRead,
     SubmitAttemptRequest,
 )
+from app.services.answer_key import AnswerKeyService
+from app.services.autosave import AutosaveService, BufferedAttempt, autosave_buffer
 from app.services.grading import GradingService
 from app.services.receipt import ReceiptService
+from app.services.submission import SubmissionService
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.post("/attempts", response_model=AssessmentAttemptRead, status_code=status.HTTP_201_CREATED)
@@ -43,6 +52,58 @@ async def start_attempt(
     return attempt
 
 
+async def _open_attempt_assessment(
+    db: AsyncSession, attempt_id: UUID, user_id: UUID, responses: Sequence[AssessmentResponseCreate]
+) -> UUID:
+    """The assessment of the user's in-progress attempt, once every answer is known to belong to it."""
+    stmt = select(AssessmentAttempt.assessment_id, AssessmentAttempt.status).where(
+        AssessmentAttempt.id == attempt_id, AssessmentAttempt.user_id == user_id
+    )
+    attempt = (await db.execute(stmt)).one_or_none()
+    if attempt is None:
+        raise HTTPException(status_code=404, detail="Attempt not found")
+    if attempt.status != "in_progress":
+        raise HTTPException(status_code=409, detail="Attempt is no longer in progress")
+    answer_key = await AnswerKeyService(db).get(attempt.assessment_id)
+    if any(response.question_id not in answer_key.points for response in responses):
+        raise HTTPException(status_code=422, detail="Question does not belong to this assessment")
+    return attempt.assessment_id
+
+
+async def _save_answers(
+    db: AsyncSession, current_user: User, attempt_id: UUID, responses: Sequence[AssessmentResponseCreate]
+) -> dict:
+    """Buffer the answers, or upsert them directly when the buffer is off or unreachable.
+
+    A direct write first drops any buffered draft of the same questions: left in place,
+    it would be laid over the new answer on reads and flushed over it later.
+    """
+    if settings.AUTOSAVE_BUFFER_ENABLED:
+        try:
+            saved = await autosave_buffer.write(
+                institution_id=current_user.institution_id,
+                user_id=current_user.id,
+                attempt_id=attempt_id,
+                responses=responses,
+            )
+            return {"status": "buffered", "saved": saved}
+        except RedisError:
+            pass
+
+    try:
+        await autosave_buffer.discard(attempt_id, [response.question_id for response in responses])
+    except RedisError:
+        pass
+    saved = await SubmissionService(db).upsert_responses(
+        institution_id=current_user.institution_id,
+        user_id=current_user.id,
+        attempt_id=attempt_id,
+        responses=responses,
+    )
+    await db.commit()
+    return {"status": "saved", "saved": saved}
+
+
 @router.post("/attempts/{attempt_id}/responses", status_code=status.HTTP_201_CREATED)
 async def add_response(
     attempt_id: UUID,
@@ -50,23 +111,27 @@ async def add_response(
     db: AsyncSession = Depends(get_db_with_tenant),
     current_user: User = Depends(require_permission("assessment.submit")),
 ) -> dict:
-    attempt_stmt = select(AssessmentAttempt).where(AssessmentAttempt.id == attempt_id, AssessmentAttempt.user_id == current_user.id)
-    attempt = (await db.execute(attempt_stmt)).scalar_one_or_none()
-    if attempt is None:
-        raise HTTPException(status_code=404, detail="Attempt not found")
+    """Save one answer through the same path as autosave, so the two cannot disagree."""
+    await _open_attempt_assessment(db, attempt_id, current_user.id, [payload])
+    return await _save_answers(db, current_user, attempt_id, [payload])
 
-    response = AssessmentResponse(
-        institution_id=current_user.institution_id,
-        created_by=current_user.id,
-        attempt_id=attempt_id,
-        question_id=payload.question_id,
-        selected_option_id=payload.selected_option_id,
-        answer_text=payload.answer_text,
-        points_awarded=0.0,
-    )
-    db.add(response)
-    await db.commit()
-    return {"status": "saved"}
+
+@router.put("/attempts/{attempt_id}/responses")
+async def save_responses(
+    attempt_id: UUID,
+    payload: AssessmentResponseBatch,
+    db: AsyncSession = Depends(get_db_with_tenant),
+    current_user: User = Depends(require_permission("assessment.submit")),
+) -> dict:
+    """Autosave a batch of answers.
+
+    The attempt is checked by primary key and the questions against the cached answer
+    key; the answers then go to the Redis write-behind buffer, which the flusher task
+    upserts in bulk. Without Redis they are upserted directly with one statement and
+    one commit.
+    """
+    await _open_attempt_assessment(db, attempt_id, current_user.id, payload.responses)
+    return await _save_answers(db, current_user, attempt_id, payload.responses)
 
 
 @router.post("/attempts/{attempt_id}/submit", response_model=AssessmentResultRead)
@@ -81,6 +146,12 @@ async def submit_attempt(
     if attempt is None:
         raise HTTPException(status_code=404, detail="Attempt not found")
 
+    # Buffered drafts are written in the grading transaction so no autosaved answer is lost.
+    buffered = await _buffered_attempt(attempt_id)
+    if buffered is not None:
+        answer_key = await AnswerKeyService(db).get(attempt.assessment_id)
+        await AutosaveService(db).flush(buffered, answer_key.points)
+
     attempt.status = "submitted"
     attempt.submitted_at = datetime.now(timezone.utc)
     attempt.server_received_at = datetime.now(timezone.utc)
@@ -95,21 +166,36 @@ async def submit_attempt(
         payload={"idempotency_key": payload.idempotency_key, "attempt_id": str(attempt_id)},
     )
     await db.commit()
+    if buffered is not None:
+        try:
+            await autosave_buffer.acknowledge(buffered)
+        except RedisError:
+            pass
     await db.refresh(result)
     return result
 
 
-@router.get("/attempts/{attempt_id}", response_model=AssessmentAttemptRead)
+@router.get("/attempts/{attempt_id}", response_model=AssessmentAttemptDetail)
 async def get_attempt(
     attempt_id: UUID,
     db: AsyncSession = Depends(get_db_with_tenant),
     current_user: User = Depends(require_permission("assessment.submit")),
-) -> AssessmentAttemptRead:
+) -> AssessmentAttemptDetail:
     stmt = select(AssessmentAttempt).where(AssessmentAttempt.id == attempt_id, AssessmentAttempt.user_id == current_user.id)
     attempt = (await db.execute(stmt)).scalar_one_or_none()
     if attempt is None:
         raise HTTPException(status_code=404, detail="Attempt not found")
-    return attempt
+    detail = AssessmentAttemptDetail.model_validate(attempt)
+    detail.responses = await AutosaveService(db).merged_responses(attempt_id, await _buffered_attempt(attempt_id))
+    return detail
+
+
+async def _buffered_attempt(attempt_id: UUID) -> BufferedAttempt | None:
+    # Read even with the buffer switched off, so drafts saved before that are not lost.
+    try:
+        return await autosave_buffer.snapshot(attempt_id)
+    except RedisError:
+        return None
 
 
 @router.post("/results", response_model=AssessmentResultRead, status_code=status.HTTP_201_CREATED)
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_with_tenant, require_permission
+from app.config import get_settings
+from app.database.session import AsyncSessionFactory
 from app.models.iam import User
 from app.models.offline import SyncConflict
 from app.schemas.sync import SyncBatchRequest, SyncBatchResult
@@ -14,6 +18,7 @@ from app.services.auth import AuthService
 from app.services.sync import SyncService
 
 router = APIRouter()
+settings = get_settings()
 
 
 @router.post("/batch", response_model=list[SyncBatchResult])
@@ -32,6 +37,35 @@ async def batch_sync(
     )
 
 
+@router.post("/batch/stream", response_class=StreamingResponse)
+async def batch_sync_stream(
+    request: Request,
+    x_device_id: UUID = Header(...),
+    x_device_trust_token: str = Header(...),
+    db: AsyncSession = Depends(get_db_with_tenant),
+    current_user: User = Depends(require_permission("sync.batch.submit")),
+):
+    """NDJSON in, NDJSON out: one ``SyncActionEnvelope`` per request line, one result per response line."""
+    if not await AuthService(db).verify_device_trust(x_device_id, x_device_trust_token):
+        raise HTTPException(status_code=401, detail="Invalid device trust token")
+
+    institution_id, user_id = current_user.institution_id, current_user.id
+
+    async def results() -> AsyncIterator[bytes]:
+        # The request session may be closed before the body is streamed, so chunks get their own.
+        async with AsyncSessionFactory() as session:
+            async for result in SyncService(session).process_stream(
+                institution_id=institution_id,
+                user_id=user_id,
+                body=request.stream(),
+                chunk_size=settings.SYNC_STREAM_CHUNK_SIZE,
+                max_line_bytes=settings.SYNC_STREAM_MAX_LINE_BYTES,
+            ):
+                yield result.model_dump_json().encode() + b"\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @router.get("/conflicts")
 async def list_conflicts(
     db: AsyncSession = Depends(get_db_with_tenant),
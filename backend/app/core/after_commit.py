@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Redis side effects scheduled from synchronous commit hooks, kept referenced until done.
+_pending: set[asyncio.Task[None]] = set()
+
+
+def run_after_commit(session: Session, coro: Coroutine[Any, Any, None]) -> None:
+    """Start ``coro`` from an ``after_commit`` listener.
+
+    The task is tracked twice: on the session, so the committing caller awaits it in
+    :func:`wait_after_commit`, and process-wide, so :func:`drain_after_commit` can finish
+    it before a task's event loop shuts down. Without a running loop the work is dropped.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()
+        return
+    task = loop.create_task(coro)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    session.info.setdefault("after_commit_tasks", []).append(task)
+
+
+async def wait_after_commit(session: AsyncSession) -> None:
+    """Await the side effects scheduled by the commits ``session`` has made so far."""
+    tasks = session.info.pop("after_commit_tasks", None)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def drain_after_commit() -> None:
+    """Await every side effect still in flight, whichever session scheduled it."""
+    loop = asyncio.get_running_loop()
+    while tasks := [task for task in _pending if task.get_loop() is loop]:
+        await asyncio.gather(*tasks, return_exceptions=True)
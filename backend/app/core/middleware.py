@@ -2,46 +2,99 @@ from __future__ import annotations
 
 import time
 import uuid
-from collections.abc import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import get_settings
+from app.core.rate_limit import RateLimiter, RateLimitRule
+from app.core.redis import get_redis
+from app.utils.security import decode_token
 
 settings = get_settings()
 
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestContextMiddleware:
+    """Stamps request id / institution id on the request state and adds tracing headers.
+
+    Implemented as plain ASGI so response bodies (including streams) are passed
+    through untouched; only the ``http.response.start`` message is edited.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start = time.perf_counter()
-        request_id = request.headers.get("x-request-id", str(uuid.uuid4()))
-        institution_id = request.headers.get("x-institution-id")
+        request_id = _header(scope, b"x-request-id") or str(uuid.uuid4())
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["institution_id"] = _header(scope, b"x-institution-id")
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["x-request-id"] = request_id
+                headers["x-latency-ms"] = f"{(time.perf_counter() - start) * 1000:.2f}"
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
 
-        request.state.request_id = request_id
-        request.state.institution_id = institution_id
+class RateLimitMiddleware:
+    """Applies the configured per-route, per-user and per-institution token buckets.
 
-        response = await call_next(request)
-        response.headers["x-request-id"] = request_id
-        response.headers["x-latency-ms"] = f"{(time.perf_counter() - start) * 1000:.2f}"
-        return response
+    Users and institutions are taken from a valid bearer token only, so a forged
+    header cannot drain another tenant's budget; anonymous traffic is limited by IP.
+    """
 
+    def __init__(self, app: ASGIApp, *, limiter: RateLimiter | None = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter(
+            [RateLimitRule.from_config(rule) for rule in settings.RATE_LIMIT_RULES],
+            redis_factory=lambda: get_redis("rate_limit"),
+            local_max_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+        )
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory rate limit for local development."""
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
 
-    _bucket: dict[str, list[float]] = {}
+        decision = await self.limiter.hit(scope["path"], _rate_limit_identities(scope))
+        if not decision.allowed:
+            response = Response(
+                "Rate limit exceeded",
+                status_code=429,
+                headers={"retry-after": str(decision.retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        now = time.time()
-        key = request.client.host if request.client else "unknown"
-        window = 60
-        max_requests = 120
+        await self.app(scope, receive, send)
 
-        bucket = self._bucket.setdefault(key, [])
-        bucket[:] = [value for value in bucket if now - value < window]
-        if len(bucket) >= max_requests:
-            return Response("Rate limit exceeded", status_code=429)
 
-        bucket.append(now)
-        return await call_next(request)
+def _rate_limit_identities(scope: Scope) -> dict[str, str | None]:
+    client = scope.get("client")
+    identities: dict[str, str | None] = {"ip": client[0] if client else "unknown", "user": None, "institution": None}
+    authorization = _header(scope, b"authorization")
+    if authorization and authorization.lower().startswith("bearer "):
+        try:
+            claims = decode_token(authorization[7:])
+        except ValueError:
+            return identities
+        identities["user"] = claims.get("sub")
+        identities["institution"] = claims.get("institution_id")
+    return identities
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+
+RateLimitKey = Literal["ip", "user", "institution"]
+
+# Token buckets for every matching rule are checked and, only if all of them have a
+# token left, debited together. Server time keeps workers on different hosts consistent
+# and PEXPIRE drops a bucket once it would have refilled completely anyway.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local tokens = {}
+local retry_ms = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', KEYS[i], 't', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now_ms
+    available = math.min(capacity, available + math.max(0, now_ms - updated) * rate)
+    tokens[i] = available
+    if available < 1 then
+        retry_ms = math.max(retry_ms, math.ceil((1 - available) / rate))
+    end
+end
+if retry_ms > 0 then
+    return {0, retry_ms}
+end
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    redis.call('HSET', KEYS[i], 't', tostring(tokens[i] - 1), 'ts', tostring(now_ms))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate))
+end
+return {1, 0}
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitRule:
+    """``limit`` requests per ``period_seconds`` for each distinct ``key`` value, with bursts up to ``limit``."""
+
+    name: str
+    key: RateLimitKey
+    limit: int
+    period_seconds: float
+    path_prefix: str | None = None
+
+    @property
+    def tokens_per_ms(self) -> float:
+        return self.limit / (self.period_seconds * 1000)
+
+    def matches(self, path: str) -> bool:
+        return self.path_prefix is None or path.startswith(self.path_prefix)
+
+    @classmethod
+    def from_config(cls, data: dict[str, Any]) -> RateLimitRule:
+        return cls(
+            name=data["name"],
+            key=data["key"],
+            limit=int(data["limit"]),
+            period_seconds=float(data["period_seconds"]),
+            path_prefix=data.get("path_prefix"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitDecision:
+    allowed: bool
+    retry_after_seconds: int = 0
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "updated_ms")
+
+    def __init__(self, tokens: float, updated_ms: float):
+        self.tokens = tokens
+        self.updated_ms = updated_ms
+
+    def refill(self, rule: RateLimitRule, now_ms: float) -> None:
+        elapsed = max(0.0, now_ms - self.updated_ms)
+        self.tokens = min(rule.limit, self.tokens + elapsed * rule.tokens_per_ms)
+        self.updated_ms = now_ms
+
+
+class RateLimiter:
+    """Distributed token-bucket limiter with an in-process pre-filter.
+
+    Every worker keeps its own buckets for the same rules. One worker alone can never
+    legitimately exceed the shared limit, so an empty local bucket rejects the request
+    without a Redis round trip. Otherwise one Lua script call checks and debits all
+    matching shared buckets atomically. When Redis is unreachable the local buckets
+    decide on their own and Redis is not retried for ``redis_retry_seconds``.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[RateLimitRule],
+        *,
+        redis_factory: Callable[[], Redis] | None = None,
+        key_prefix: str = "ratelimit",
+        local_max_keys: int = 50000,
+        redis_retry_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rules = tuple(rules)
+        self.key_prefix = key_prefix
+        self.redis_retry_seconds = redis_retry_seconds
+        self._redis_factory = redis_factory
+        self._clock = clock
+        self._script: AsyncScript | None = None
+        self._redis_down_until = 0.0
+        # One bounded cache per rule: an idle bucket is evicted once it would be full again.
+        self._local: dict[str, TTLCache[str, _LocalBucket]] = {
+            rule.name: TTLCache(maxsize=local_max_keys, ttl_seconds=rule.period_seconds, clock=clock)
+            for rule in self.rules
+        }
+
+    def rules_for(self, path: str) -> list[RateLimitRule]:
+        return [rule for rule in self.rules if rule.matches(path)]
+
+    async def hit(self, path: str, identities: dict[str, str | None]) -> RateLimitDecision:
+        checks = [
+            (rule, identity)
+            for rule in self.rules_for(path)
+            if (identity := identities.get(rule.key)) is not None
+        ]
+        if not checks:
+            return RateLimitDecision(allowed=True)
+
+        local = self._hit_local(checks)
+        if not local.allowed:
+            return local
+        return await self._hit_shared(checks, fallback=local)
+
+    def _hit_local(self, checks: list[tuple[RateLimitRule, str]]) -> RateLimitDecision:
+        now_ms = self._clock() * 1000
+        buckets: list[tuple[RateLimitRule, _LocalBucket]] = []
+        retry_ms = 0.0
+        for rule, identity in checks:
+            cache = self._local[rule.name]
+            bucket = cache.get(identity) or _LocalBucket(tokens=rule.limit, updated_ms=now_ms)
+            # Re-set on every hit so only idle (and therefore already refilled) buckets expire.
+            cache.set(identity, bucket)
+            bucket.refill(rule, now_ms)
+            if bucket.tokens < 1:
+                retry_ms = max(retry_ms, (1 - bucket.tokens) / rule.tokens_per_ms)
+            buckets.append((rule, bucket))
+
+        if retry_ms > 0:
+            return RateLimitDecision(allowed=False, retry_after_seconds=math.ceil(retry_ms / 1000))
+        for _, bucket in buckets:
+            bucket.tokens -= 1
+        return RateLimitDecision(allowed=True)
+
+    async def _hit_shared(
+        self, checks: list[tuple[RateLimitRule, str]], *, fallback: RateLimitDecision
+    ) -> RateLimitDecision:
+        if self._redis_factory is None or self._clock() < self._redis_down_until:
+            return fallback
+
+        keys = [f"{self.key_prefix}:{rule.name}:{identity}" for rule, identity in checks]
+        args: list[str] = []
+        for rule, _ in checks:
+            args.extend((str(rule.limit), repr(rule.tokens_per_ms)))
+        try:
+            if self._script is None:
+                self._script = self._redis_factory().register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, retry_ms = await self._script(keys=keys, args=args)
+        except RedisError:
+            self._redis_down_until = self._clock() + self.redis_retry_seconds
+            return fallback
+
+        if int(allowed):
+            return RateLimitDecision(allowed=True)
+        return RateLimitDecision(allowed=False, retry_after_seconds=max(1, math.ceil(int(retry_ms) / 1000)))
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.config import get_settings
+
+settings = get_settings()
+
+DEFAULT_POOL = "default"
+
+# Pool name -> client. Separate pools keep a burst in one subsystem (say, rate limiting)
+# from starving the others; each is bound to the event loop that first used it.
+_clients: dict[str, Redis] = {}
+
+
+def _pool_size(name: str) -> int:
+    return settings.REDIS_POOL_SIZES.get(name, settings.REDIS_MAX_CONNECTIONS)
+
+
+def get_redis(name: str = DEFAULT_POOL) -> Redis:
+    """Return the shared client for pool ``name``, creating the pool on first use."""
+    client = _clients.get(name)
+    if client is None:
+        pool = BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=_pool_size(name),
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+            health_check_interval=30,
+            decode_responses=True,
+        )
+        client = _clients[name] = Redis.from_pool(pool)
+    return client
+
+
+def init_redis() -> Redis:
+    """Create every configured pool up front and return the default client."""
+    for name in settings.REDIS_POOL_SIZES:
+        get_redis(name)
+    return get_redis()
+
+
+async def close_redis() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+class RedisPoolCollector:
+    """Exposes connection counts of every live pool on the Prometheus registry."""
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            "redis_pool_connections", "Connections held by a Redis pool", labels=["pool", "state"]
+        )
+        capacity = GaugeMetricFamily("redis_pool_max_connections", "Configured Redis pool size", labels=["pool"])
+        for name, client in list(_clients.items()):
+            pool = client.connection_pool
+            connections.add_metric([name, "in_use"], len(pool._in_use_connections))
+            connections.add_metric([name, "idle"], len(pool._available_connections))
+            capacity.add_metric([name], pool.max_connections)
+        yield connections
+        yield capacity
+
+
+if settings.REDIS_POOL_METRICS_ENABLED:
+    REGISTRY.register(RedisPoolCollector())
@@ -0,0 +1,39 @@
+"""One response per question of an attempt, for the ON CONFLICT upsert of answers."""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002_unique_assessment_response"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = "uq_assessment_response_question"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Tables created by create_all after this model change already carry the constraint.
+    if not inspector.has_table("assessment_responses"):
+        return
+    if CONSTRAINT in {constraint["name"] for constraint in inspector.get_unique_constraints("assessment_responses")}:
+        return
+    # Keep the latest answer per (attempt, question), as the upsert would have.
+    op.execute(
+        """
+        DELETE FROM assessment_responses AS response
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY attempt_id, question_id
+                ORDER BY updated_at DESC, created_at DESC, id DESC
+            ) AS rank
+            FROM assessment_responses
+        ) AS ranked
+        WHERE response.id = ranked.id AND ranked.rank > 1
+        """
+    )
+    op.create_unique_constraint(CONSTRAINT, "assessment_responses", ["attempt_id", "question_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint(CONSTRAINT, "assessment_responses", type_="unique")
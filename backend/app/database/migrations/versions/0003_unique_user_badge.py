@@ -0,0 +1,39 @@
+"""One award per badge and user, for the ON CONFLICT DO NOTHING of the nightly badge pass."""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003_unique_user_badge"
+down_revision = "0002_unique_assessment_response"
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = "uq_user_badge"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Tables created by create_all after this model change already carry the constraint.
+    if not inspector.has_table("user_badges"):
+        return
+    if CONSTRAINT in {constraint["name"] for constraint in inspector.get_unique_constraints("user_badges")}:
+        return
+    # Keep the first award of each badge.
+    op.execute(
+        """
+        DELETE FROM user_badges AS award
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY institution_id, user_id, badge_id
+                ORDER BY awarded_at, created_at, id
+            ) AS rank
+            FROM user_badges
+        ) AS ranked
+        WHERE award.id = ranked.id AND ranked.rank > 1
+        """
+    )
+    op.create_unique_constraint(CONSTRAINT, "user_badges", ["institution_id", "user_id", "badge_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint(CONSTRAINT, "user_badges", type_="unique")
@@ -1,14 +1,25 @@
 from collections.abc import AsyncGenerator
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, SessionTransaction
 
 from app.config import get_settings
+from app.core.after_commit import wait_after_commit
 
 settings = get_settings()
 
+
+class AppSession(AsyncSession):
+    """An ``AsyncSession`` whose ``commit`` returns only once its after-commit side effects are done."""
+
+    async def commit(self) -> None:
+        await super().commit()
+        await wait_after_commit(self)
+
+
 engine: AsyncEngine = create_async_engine(settings.ASYNC_DATABASE_URL, pool_pre_ping=True, future=True)
-AsyncSessionFactory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+AsyncSessionFactory = async_sessionmaker(bind=engine, class_=AppSession, expire_on_commit=False)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -17,5 +28,17 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def set_tenant_context(session: AsyncSession, institution_id: str) -> None:
-    # Used by RLS policies in PostgreSQL.
+    # Used by RLS policies in PostgreSQL. The setting is transaction-local, so it is only
+    # sent once per transaction; the marker is cleared when the transaction ends.
+    if session.info.get("tenant_context") == institution_id:
+        return
+    if session.get_bind().dialect.name != "postgresql":
+        return
     await session.execute(text("SELECT set_config('app.current_institution_id', :institution_id, true)"), {"institution_id": institution_id})
+    session.info["tenant_context"] = institution_id
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_tenant_context(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("tenant_context", None)
@@ -6,17 +6,18 @@ from uuid import uuid4
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
-from redis.asyncio import Redis
 from sqlalchemy import select, text
 
 from app.api import api_router
 from app.config import get_settings
 from app.core.middleware import RateLimitMiddleware, RequestContextMiddleware
 from app.core.rbac import PERMISSION_DEFINITIONS, ROLE_DEFINITIONS_BY_CODE
+from app.core.redis import close_redis, init_redis
 from app.database import Base
 from app.database.session import AsyncSessionFactory, engine
 from app.models.iam import Institution, Permission, Role, RoleBinding, RolePermission, User
 from app.models.student_success import Badge, Quote
+from app.services.email import close_smtp_pool
 from app.utils.logging import configure_logging
 
 settings = get_settings()
@@ -157,8 +158,7 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
-    app.state.redis = redis
+    app.state.redis = init_redis()
 
     async with AsyncSessionFactory() as db:
         institution_stmt = select(Institution).where(Institution.code == "UDSM")
@@ -196,7 +196,8 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    await redis.close()
+    await close_smtp_pool()
+    await close_redis()
     await engine.dispose()
 
 
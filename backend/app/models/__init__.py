@@ -77,7 +77,7 @@ from app.models.iam import (  # noqa: E402
     User,
 )
 from app.models.offline import OfflineOutbox, SyncConflict  # noqa: E402
-from app.models.receipts import Receipt  # noqa: E402
+from app.models.receipts import Receipt, ReceiptChainHead, ReceiptCheckpoint, ReceiptMerkleNode  # noqa: E402
 from app.models.student_success import (  # noqa: E402
     AcademicStreak,
     Badge,
@@ -129,6 +129,9 @@ __all__ = [
     "VenueAlias",
     "RouteCache",
     "Receipt",
+    "ReceiptChainHead",
+    "ReceiptCheckpoint",
+    "ReceiptMerkleNode",
     "OfflineOutbox",
     "SyncConflict",
     "NotificationTemplate",
@@ -92,6 +92,7 @@ class AssessmentAttempt(TenantBase):
 
 class AssessmentResponse(TenantBase):
     __tablename__ = "assessment_responses"
+    __table_args__ = (UniqueConstraint("attempt_id", "question_id", name="uq_assessment_response_question"),)
 
     attempt_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("assessment_attempts.id"), nullable=False, index=True)
     question_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("assessment_questions.id"), nullable=False, index=True)
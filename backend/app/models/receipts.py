@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import JSON, DateTime, ForeignKey, Integer, String, Text, Uuid, UniqueConstraint
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Integer, String, Text, Uuid, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import TenantBase
@@ -23,3 +23,46 @@ class Receipt(TenantBase):
     receipt_hash: Mapped[str] = mapped_column(String(128), nullable=False)
     payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
     chain_position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ReceiptChainHead(TenantBase):
+    """Tail of one user's receipt chain; locked FOR UPDATE while receipts are appended."""
+
+    __tablename__ = "receipt_chain_heads"
+    __table_args__ = (UniqueConstraint("institution_id", "user_id", name="uq_receipt_chain_head_user"),)
+
+    user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    last_hash: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ReceiptCheckpoint(TenantBase):
+    """Signed Merkle root over every receipt hash an institution issued on one UTC day."""
+
+    __tablename__ = "receipt_checkpoints"
+    __table_args__ = (UniqueConstraint("institution_id", "day", name="uq_receipt_checkpoint_day"),)
+
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    leaf_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    root_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Recorded per row so the scheme and key can be rotated without re-signing old days.
+    signature_scheme: Mapped[str] = mapped_column(String(32), nullable=False)
+    signing_key_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    signature: Mapped[str] = mapped_column(String(128), nullable=False)
+
+
+class ReceiptMerkleNode(TenantBase):
+    """One node of a checkpoint's tree; leaves (level 0) point back at their receipt."""
+
+    __tablename__ = "receipt_merkle_nodes"
+    __table_args__ = (UniqueConstraint("checkpoint_id", "level", "position", name="uq_receipt_merkle_node"),)
+
+    checkpoint_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("receipt_checkpoints.id"), nullable=False
+    )
+    level: Mapped[int] = mapped_column(Integer, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    node_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    receipt_id: Mapped[uuid.UUID | None] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("receipts.id"), nullable=True, index=True
+    )
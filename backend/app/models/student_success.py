@@ -54,6 +54,7 @@ class Badge(TenantBase):
 
 class UserBadge(TenantBase):
     __tablename__ = "user_badges"
+    __table_args__ = (UniqueConstraint("institution_id", "user_id", "badge_id", name="uq_user_badge"),)
 
     user_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     badge_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), ForeignKey("badges.id"), nullable=False, index=True)
@@ -7,6 +7,7 @@ from app.schemas.receipt import ReceiptRead, ReceiptVerifyResponse
 from app.schemas.submission import (
     AssessmentAttemptCreate,
     AssessmentAttemptRead,
+    AssessmentResponseBatch,
     AssessmentResponseCreate,
     AssessmentResultRead,
     SubmitAttemptRequest,
@@ -31,6 +32,7 @@ __all__ = [
     "AssessmentAttemptCreate",
     "AssessmentAttemptRead",
     "AssessmentResponseCreate",
+    "AssessmentResponseBatch",
     "SubmitAttemptRequest",
     "AssessmentResultRead",
     "VenueRead",
@@ -34,3 +34,17 @@ class AssessmentRead(BaseModel):
     max_score: float
 
     model_config = {"from_attributes": True}
+
+
+class RegradeJobRead(BaseModel):
+    id: str
+    assessment_id: UUID
+    status: str
+    total: int
+    processed: int
+    updated: int
+    conflicts: int
+    progress_pct: float
+    error: str | None
+
+    model_config = {"from_attributes": True}
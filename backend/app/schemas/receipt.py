@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -19,8 +20,64 @@ class ReceiptRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class MerkleProofStep(BaseModel):
+    hash: str
+    side: Literal["left", "right"]
+
+
+class ReceiptInclusionProof(BaseModel):
+    """Everything needed to check a receipt offline against its day's signed checkpoint root."""
+
+    day: date
+    leaf_index: int
+    leaf_count: int
+    leaf_hash: str
+    root_hash: str
+    signature_scheme: str
+    signing_key_id: str
+    signature: str
+    path: list[MerkleProofStep]
+
+
+class ReceiptSigningKeyRead(BaseModel):
+    """Public half of the key checkpoint roots are signed with."""
+
+    signature_scheme: str
+    key_id: str
+    public_key_pem: str
+
+
 class ReceiptVerifyResponse(BaseModel):
     valid: bool
     receipt_code: str
     receipt_hash: str
     previous_receipt_hash: str | None
+    inclusion_proof: ReceiptInclusionProof | None = None
+
+
+class ReceiptChainBreakRead(BaseModel):
+    user_id: UUID
+    receipt_code: str
+    chain_position: int
+    reason: str
+
+    model_config = {"from_attributes": True}
+
+
+class ReceiptChainVerificationRead(BaseModel):
+    scope: str
+    scope_id: UUID
+    valid: bool
+    chains: int
+    receipts: int
+    elapsed_seconds: float
+    receipts_per_second: float
+    breaks: list[ReceiptChainBreakRead]
+
+    model_config = {"from_attributes": True}
+
+
+class ReceiptVerificationJobRead(BaseModel):
+    job_id: str
+    status: str
+    report: ReceiptChainVerificationRead | None = None
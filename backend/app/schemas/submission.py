@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class AssessmentAttemptCreate(BaseModel):
@@ -14,6 +14,10 @@ class AssessmentResponseCreate(BaseModel):
     answer_text: str | None = None
 
 
+class AssessmentResponseBatch(BaseModel):
+    responses: list[AssessmentResponseCreate] = Field(min_length=1, max_length=500)
+
+
 class SubmitAttemptRequest(BaseModel):
     idempotency_key: str
 
@@ -29,6 +33,17 @@ class AssessmentAttemptRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class AssessmentResponseRead(BaseModel):
+    question_id: UUID
+    selected_option_id: UUID | None = None
+    answer_text: str | None = None
+    buffered: bool = False
+
+
+class AssessmentAttemptDetail(AssessmentAttemptRead):
+    responses: list[AssessmentResponseRead] = Field(default_factory=list)
+
+
 class AssessmentResultRead(BaseModel):
     id: UUID
     attempt_id: UUID
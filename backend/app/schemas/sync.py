@@ -26,3 +26,11 @@ class SyncBatchResult(BaseModel):
     server_entity_id: UUID | None = None
     conflict: dict | None = None
     error: str | None = None
+
+
+class SyncStreamError(BaseModel):
+    """Terminal record of a streamed batch; actions before ``line`` were acknowledged."""
+
+    line: int
+    success: bool = False
+    error: str
@@ -1,5 +1,6 @@
 from app.services.auth import AuthService
 from app.services.receipt import ReceiptService
+from app.services.risk import RiskService
 from app.services.sync import SyncService
 
-__all__ = ["AuthService", "ReceiptService", "SyncService"]
+__all__ = ["AuthService", "ReceiptService", "RiskService", "SyncService"]
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import UUID, uuid4
+
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database.session import set_tenant_context
+from app.database.upsert import insert_for
+from app.models.student_success import AcademicStreak, Badge, EngagementEvent, UserBadge
+from app.services.dashboard import mark_dashboards_stale
+from app.services.streak import DAILY_ACTIVITY_STREAK, StreakState, advance_streak
+from app.utils.constants import BadgeCode
+
+settings = get_settings()
+
+# Badges earned from activity alone: the metric compared against ``Badge.threshold``.
+# Badges about grades or skills are awarded where those are computed.
+ACTIVITY_BADGE_RULES: dict[str, Callable[[StreakState], float]] = {
+    BadgeCode.CONSISTENCY_CHAMPION: lambda state: state.longest_length,
+}
+
+
+class AchievementService:
+    """Advances daily-activity streaks and awards activity badges for a whole day at once.
+
+    Users active on the day are processed in chunks: one read of their streaks, the
+    transitions computed in memory with ``advance_streak``, then one upsert of
+    ``academic_streaks`` and one insert of new ``user_badges`` per chunk, each chunk in
+    its own transaction. Replaying a day is a no-op.
+    """
+
+    def __init__(self, db: AsyncSession, *, chunk_size: int | None = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.ACHIEVEMENT_CHUNK_SIZE
+
+    async def process_day(self, institution_id: UUID, day: date) -> dict[str, int]:
+        await set_tenant_context(self.db, str(institution_id))
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        active_stmt = (
+            select(EngagementEvent.user_id)
+            .where(
+                EngagementEvent.institution_id == institution_id,
+                EngagementEvent.occurred_at >= start,
+                EngagementEvent.occurred_at < start + timedelta(days=1),
+            )
+            .group_by(EngagementEvent.user_id)
+            .order_by(EngagementEvent.user_id)
+        )
+        user_ids = (await self.db.execute(active_stmt)).scalars().all()
+        badge_stmt = select(Badge.id, Badge.code, Badge.threshold).where(
+            Badge.institution_id == institution_id,
+            Badge.code.in_(list(ACTIVITY_BADGE_RULES)),
+            Badge.deleted_at.is_(None),
+        )
+        badges = (await self.db.execute(badge_stmt)).all()
+
+        awarded = 0
+        for offset in range(0, len(user_ids), self.chunk_size):
+            # The tenant context is transaction-local, so each chunk's transaction sets it again.
+            await set_tenant_context(self.db, str(institution_id))
+            awarded += await self._process_chunk(
+                institution_id, day, user_ids[offset : offset + self.chunk_size], badges
+            )
+            await self.db.commit()
+        return {"users": len(user_ids), "badges_awarded": awarded}
+
+    async def _process_chunk(
+        self, institution_id: UUID, day: date, user_ids: Sequence[UUID], badges: Sequence[Row]
+    ) -> int:
+        stmt = select(
+            AcademicStreak.user_id,
+            AcademicStreak.current_length,
+            AcademicStreak.longest_length,
+            AcademicStreak.last_activity_date,
+            AcademicStreak.freeze_used,
+        ).where(
+            AcademicStreak.institution_id == institution_id,
+            AcademicStreak.streak_type == DAILY_ACTIVITY_STREAK,
+            AcademicStreak.user_id.in_(user_ids),
+        )
+        states = {
+            row.user_id: StreakState(
+                current_length=row.current_length,
+                longest_length=row.longest_length,
+                last_activity_date=row.last_activity_date,
+                freeze_used=row.freeze_used,
+            )
+            for row in (await self.db.execute(stmt)).all()
+        }
+        streak_rows = []
+        badge_rows = []
+        for user_id in user_ids:
+            state = advance_streak(states.get(user_id, StreakState()), day)
+            streak_rows.append(
+                {
+                    "id": uuid4(),
+                    "institution_id": institution_id,
+                    "created_by": user_id,
+                    "user_id": user_id,
+                    "streak_type": DAILY_ACTIVITY_STREAK,
+                    "current_length": state.current_length,
+                    "longest_length": state.longest_length,
+                    "last_activity_date": state.last_activity_date,
+                    "freeze_used": state.freeze_used,
+                }
+            )
+            for badge in badges:
+                metric = ACTIVITY_BADGE_RULES[badge.code](state)
+                if metric >= badge.threshold:
+                    badge_rows.append(
+                        {
+                            "id": uuid4(),
+                            "institution_id": institution_id,
+                            "created_by": user_id,
+                            "user_id": user_id,
+                            "badge_id": badge.id,
+                            "awarded_at": datetime.now(timezone.utc),
+                            "evidence_json": {"metric": metric, "threshold": badge.threshold, "day": day.isoformat()},
+                        }
+                    )
+
+        streak_stmt = insert_for(self.db, AcademicStreak).values(streak_rows)
+        streak_stmt = streak_stmt.on_conflict_do_update(
+            index_elements=["institution_id", "user_id", "streak_type"],
+            set_={
+                "current_length": streak_stmt.excluded.current_length,
+                "longest_length": streak_stmt.excluded.longest_length,
+                "last_activity_date": streak_stmt.excluded.last_activity_date,
+                "freeze_used": streak_stmt.excluded.freeze_used,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(streak_stmt)
+        mark_dashboards_stale(self.db, ((institution_id, user_id) for user_id in user_ids))
+        if not badge_rows:
+            return 0
+        badge_stmt = (
+            insert_for(self.db, UserBadge)
+            .values(badge_rows)
+            .on_conflict_do_nothing(index_elements=["institution_id", "user_id", "badge_id"])
+            .returning(UserBadge.id)
+        )
+        return len((await self.db.execute(badge_stmt)).all())
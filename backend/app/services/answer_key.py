@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import and_, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.core.after_commit import run_after_commit
+from app.core.cache import TTLCache
+from app.core.redis import get_redis
+from app.models.academics import AssessmentQuestion, AssessmentQuestionOption
+
+settings = get_settings()
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerKey:
+    """Points per question and the ``(question_id, option_id)`` pairs that score them."""
+
+    assessment_id: UUID
+    generation: int
+    points: dict[UUID, float]
+    correct: frozenset[tuple[UUID, UUID]]
+
+    @property
+    def possible(self) -> float:
+        return sum(self.points.values())
+
+    def award(self, selections: Iterable[tuple[UUID, UUID | None]]) -> list[float]:
+        """Points earned by each ``(question_id, selected_option_id)`` selection."""
+        return [
+            self.points[question_id] if (question_id, option_id) in self.correct else 0.0
+            for question_id, option_id in selections
+        ]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "generation": self.generation,
+                "points": {str(question_id): points for question_id, points in self.points.items()},
+                "correct": [[str(question_id), str(option_id)] for question_id, option_id in self.correct],
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, assessment_id: UUID, raw: str) -> AnswerKey:
+        data = json.loads(raw)
+        return cls(
+            assessment_id=assessment_id,
+            generation=int(data["generation"]),
+            points={UUID(question_id): float(points) for question_id, points in data["points"].items()},
+            correct=frozenset((UUID(question_id), UUID(option_id)) for question_id, option_id in data["correct"]),
+        )
+
+
+class AnswerKeyStore:
+    """Redis copy of answer keys shared by every worker.
+
+    Each assessment has a generation counter that question and option writes bump;
+    in-process keys stamped with an older generation are reloaded. Redis failures are
+    swallowed, leaving the in-process TTL as the only bound on staleness.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _generation_key(assessment_id: UUID) -> str:
+        return f"answer_key:gen:{assessment_id}"
+
+    @staticmethod
+    def _key(assessment_id: UUID) -> str:
+        return f"answer_key:{assessment_id}"
+
+    async def generation(self, assessment_id: UUID) -> int | None:
+        try:
+            value = await get_redis().get(self._generation_key(assessment_id))
+        except RedisError:
+            return None
+        return int(value) if value is not None else 0
+
+    async def load(self, assessment_id: UUID, generation: int) -> AnswerKey | None:
+        try:
+            raw = await get_redis().get(self._key(assessment_id))
+        except RedisError:
+            return None
+        if raw is None:
+            return None
+        key = AnswerKey.from_json(assessment_id, raw)
+        return key if key.generation == generation else None
+
+    async def save(self, key: AnswerKey) -> None:
+        try:
+            await get_redis().set(self._key(key.assessment_id), key.to_json(), ex=self.ttl_seconds)
+        except RedisError:
+            return
+
+    async def bump(self, assessment_ids: Iterable[UUID]) -> None:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for assessment_id in assessment_ids:
+                    pipe.incr(self._generation_key(assessment_id))
+                    pipe.delete(self._key(assessment_id))
+                await pipe.execute()
+        except RedisError:
+            return
+
+
+answer_key_store = AnswerKeyStore(ttl_seconds=settings.ANSWER_KEY_REDIS_TTL_SECONDS)
+
+answer_key_cache: TTLCache[UUID, AnswerKey] = TTLCache(
+    maxsize=settings.ANSWER_KEY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ANSWER_KEY_CACHE_TTL_SECONDS,
+)
+
+
+async def invalidate_answer_keys(assessment_ids: Iterable[UUID]) -> None:
+    """For writes the session listeners cannot see, such as bulk UPDATE statements."""
+    assessment_ids = set(assessment_ids)
+    for assessment_id in assessment_ids:
+        answer_key_cache.pop(assessment_id)
+    await answer_key_store.bump(assessment_ids)
+
+
+class AnswerKeyService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, assessment_id: UUID) -> AnswerKey:
+        generation = await answer_key_store.generation(assessment_id)
+        key = answer_key_cache.get(assessment_id)
+        if key is not None and (generation is None or key.generation == generation):
+            return key
+
+        key = await answer_key_store.load(assessment_id, generation) if generation is not None else None
+        if key is None:
+            # A key saved after a concurrent bump carries the old generation and is ignored by readers.
+            key = await self.load(assessment_id, generation=generation or 0)
+            if generation is not None:
+                await answer_key_store.save(key)
+        answer_key_cache.set(assessment_id, key)
+        return key
+
+    async def load(self, assessment_id: UUID, *, generation: int = 0) -> AnswerKey:
+        stmt = (
+            select(AssessmentQuestion.id, AssessmentQuestion.points, AssessmentQuestionOption.id.label("option_id"))
+            .outerjoin(
+                AssessmentQuestionOption,
+                and_(
+                    AssessmentQuestionOption.question_id == AssessmentQuestion.id,
+                    AssessmentQuestionOption.is_correct.is_(True),
+                    AssessmentQuestionOption.deleted_at.is_(None),
+                ),
+            )
+            .where(AssessmentQuestion.assessment_id == assessment_id, AssessmentQuestion.deleted_at.is_(None))
+        )
+        rows = (await self.db.execute(stmt)).all()
+        return AnswerKey(
+            assessment_id=assessment_id,
+            generation=generation,
+            points={row.id: float(row.points) for row in rows},
+            correct=frozenset((row.id, row.option_id) for row in rows if row.option_id is not None),
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _on_answer_key_flush(session: Session, flush_context) -> None:
+    pending: set[UUID] = session.info.setdefault("answer_key_invalidations", set())
+    question_ids: set[UUID] = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, AssessmentQuestion):
+            pending.add(instance.assessment_id)
+        elif isinstance(instance, AssessmentQuestionOption):
+            question_ids.add(instance.question_id)
+    if question_ids:
+        stmt = select(AssessmentQuestion.assessment_id).where(AssessmentQuestion.id.in_(question_ids))
+        pending.update(session.connection().execute(stmt).scalars())
+    for assessment_id in pending:
+        answer_key_cache.pop(assessment_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_answer_key_commit(session: Session) -> None:
+    pending = session.info.pop("answer_key_invalidations", None)
+    if pending:
+        for assessment_id in pending:
+            answer_key_cache.pop(assessment_id)
+        run_after_commit(session, answer_key_store.bump(pending))
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_answer_key_rollback(session: Session) -> None:
+    for assessment_id in session.info.pop("answer_key_invalidations", ()):
+        answer_key_cache.pop(assessment_id)
@@ -7,9 +7,19 @@ from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.models.iam import Device, DeviceTrustToken, User
 from app.schemas.auth import DeviceRegisterRequest
-from app.utils.security import create_access_token, create_refresh_token, hash_password, verify_password
+from app.services.rbac import RbacService
+from app.utils.security import (
+    create_access_token,
+    create_refresh_token,
+    hash_password,
+    scope_hash,
+    verify_password,
+)
+
+settings = get_settings()
 
 
 class AuthService:
@@ -30,9 +40,9 @@ class AuthService:
             "institution_id": str(user.institution_id),
             "verification_level": user.verification_level,
             "device_id": str(device_id) if device_id else None,
-            "scope_hash": hashlib.sha256(f"{user.id}:{user.updated_at.timestamp()}".encode()).hexdigest(),
+            "scope_hash": scope_hash(user.id, user.updated_at),
         }
-        access = create_access_token(subject=str(user.id), extra=extra)
+        access = create_access_token(subject=str(user.id), extra=await self._access_claims(user, extra))
         refresh = create_refresh_token(subject=str(user.id), extra=extra)
         return access, refresh
 
@@ -41,9 +51,15 @@ class AuthService:
             "institution_id": str(user.institution_id),
             "verification_level": user.verification_level,
             "device_id": str(device_id) if device_id else None,
-            "scope_hash": hashlib.sha256(f"{user.id}:{user.updated_at.timestamp()}".encode()).hexdigest(),
+            "scope_hash": scope_hash(user.id, user.updated_at),
         }
-        return create_access_token(subject=str(user.id), extra=extra)
+        return create_access_token(subject=str(user.id), extra=await self._access_claims(user, extra))
+
+    async def _access_claims(self, user: User, extra: dict) -> dict:
+        if not settings.JWT_EMBED_PERMISSION_DIGEST:
+            return extra
+        snapshot = await RbacService(self.db).get_authorization_snapshot(user=user)
+        return {**extra, "authz": snapshot.to_digest()}
 
     async def register_device(self, user: User, payload: DeviceRegisterRequest) -> tuple[Device, str, datetime]:
         device = Device(
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.redis import get_redis
+from app.database.session import set_tenant_context
+from app.models.academics import AssessmentAttempt, AssessmentResponse
+from app.schemas.submission import AssessmentResponseCreate, AssessmentResponseRead
+from app.services.answer_key import AnswerKeyService
+from app.services.submission import SubmissionService
+
+settings = get_settings()
+
+DIRTY_KEY = "autosave:dirty"
+OWNER_FIELD = "_owner"
+DRAFT_PREFIX = "q:"
+
+# Drops the drafts that still hold the flushed values, so answers saved while a flush
+# was in flight stay buffered. An emptied buffer is removed from the dirty set.
+ACKNOWLEDGE_SCRIPT = """
+for i = 2, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+if redis.call('HLEN', KEYS[1]) <= 1 then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# Drops the drafts named in ARGV[2..], superseded by answers written to the database
+# directly, and removes an emptied buffer from the dirty set.
+DISCARD_SCRIPT = """
+for i = 2, #ARGV do
+    redis.call('HDEL', KEYS[1], ARGV[i])
+end
+if redis.call('HLEN', KEYS[1]) <= 1 then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class BufferedAttempt:
+    attempt_id: UUID
+    institution_id: UUID
+    user_id: UUID
+    fields: dict[str, str]
+
+    @property
+    def drafts(self) -> list[AssessmentResponseCreate]:
+        return [
+            AssessmentResponseCreate.model_validate_json(value)
+            for field, value in self.fields.items()
+            if field.startswith(DRAFT_PREFIX)
+        ]
+
+
+class AutosaveBuffer:
+    """Write-behind buffer of answer drafts: one Redis hash per in-progress attempt.
+
+    Each hash holds the latest draft per question, so repeated saves coalesce in place,
+    plus the attempt's owner for the flusher. Flushing is snapshot, upsert, commit, then
+    ``acknowledge``; a failed flush leaves the drafts in place for the next run.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(attempt_id: UUID) -> str:
+        return f"autosave:attempt:{attempt_id}"
+
+    async def write(
+        self,
+        *,
+        institution_id: UUID,
+        user_id: UUID,
+        attempt_id: UUID,
+        responses: Sequence[AssessmentResponseCreate],
+    ) -> int:
+        drafts = {f"{DRAFT_PREFIX}{response.question_id}": response.model_dump_json() for response in responses}
+        key = self._key(attempt_id)
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={OWNER_FIELD: f"{institution_id}:{user_id}", **drafts})
+            pipe.expire(key, self.ttl_seconds)
+            pipe.sadd(DIRTY_KEY, str(attempt_id))
+            await pipe.execute()
+        return len(drafts)
+
+    async def snapshot_many(self, attempt_ids: Sequence[UUID]) -> list[BufferedAttempt]:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for attempt_id in attempt_ids:
+                pipe.hgetall(self._key(attempt_id))
+            results = await pipe.execute()
+        snapshots = []
+        for attempt_id, fields in zip(attempt_ids, results, strict=True):
+            if not fields or OWNER_FIELD not in fields:
+                await get_redis().srem(DIRTY_KEY, str(attempt_id))
+                continue
+            institution_id, user_id = fields[OWNER_FIELD].split(":")
+            snapshots.append(BufferedAttempt(attempt_id, UUID(institution_id), UUID(user_id), fields))
+        return snapshots
+
+    async def snapshot(self, attempt_id: UUID) -> BufferedAttempt | None:
+        snapshots = await self.snapshot_many([attempt_id])
+        return snapshots[0] if snapshots else None
+
+    async def acknowledge(self, snapshot: BufferedAttempt) -> None:
+        script = get_redis().register_script(ACKNOWLEDGE_SCRIPT)
+        args = [str(snapshot.attempt_id)]
+        for field, value in snapshot.fields.items():
+            if field.startswith(DRAFT_PREFIX):
+                args.extend((field, value))
+        await script(keys=[self._key(snapshot.attempt_id), DIRTY_KEY], args=args)
+
+    async def discard(self, attempt_id: UUID, question_ids: Collection[UUID]) -> None:
+        script = get_redis().register_script(DISCARD_SCRIPT)
+        fields = [f"{DRAFT_PREFIX}{question_id}" for question_id in question_ids]
+        await script(keys=[self._key(attempt_id), DIRTY_KEY], args=[str(attempt_id), *fields])
+
+    async def dirty_attempts(self, count: int) -> list[UUID]:
+        return [UUID(member) for member in await get_redis().srandmember(DIRTY_KEY, count)]
+
+
+autosave_buffer = AutosaveBuffer(ttl_seconds=settings.AUTOSAVE_BUFFER_TTL_SECONDS)
+
+
+class AutosaveService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def merged_responses(
+        self, attempt_id: UUID, buffered: BufferedAttempt | None
+    ) -> list[AssessmentResponseRead]:
+        """Persisted answers of the attempt with any buffered drafts laid over them."""
+        stmt = select(
+            AssessmentResponse.question_id, AssessmentResponse.selected_option_id, AssessmentResponse.answer_text
+        ).where(AssessmentResponse.attempt_id == attempt_id)
+        merged = {
+            row.question_id: AssessmentResponseRead(
+                question_id=row.question_id,
+                selected_option_id=row.selected_option_id,
+                answer_text=row.answer_text,
+                buffered=False,
+            )
+            for row in (await self.db.execute(stmt)).all()
+        }
+        for draft in buffered.drafts if buffered is not None else ():
+            merged[draft.question_id] = AssessmentResponseRead(**draft.model_dump(), buffered=True)
+        return list(merged.values())
+
+    async def flush(self, buffered: BufferedAttempt, question_ids: Collection[UUID]) -> int:
+        """Upsert the snapshot's drafts of ``question_ids``, dropping drafts of any other question.
+
+        The caller commits and then acknowledges the snapshot.
+        """
+        return await SubmissionService(self.db).upsert_responses(
+            institution_id=buffered.institution_id,
+            user_id=buffered.user_id,
+            attempt_id=buffered.attempt_id,
+            responses=[draft for draft in buffered.drafts if draft.question_id in question_ids],
+        )
+
+    async def flush_dirty(self, limit: int) -> dict[str, int]:
+        """Flush up to ``limit`` buffered attempts, one transaction per institution."""
+        snapshots = await autosave_buffer.snapshot_many(await autosave_buffer.dirty_attempts(limit))
+        by_institution: dict[UUID, list[BufferedAttempt]] = defaultdict(list)
+        for snapshot in snapshots:
+            by_institution[snapshot.institution_id].append(snapshot)
+
+        totals = {"attempts": len(snapshots), "responses": 0, "discarded": 0, "failed": 0}
+        for institution_id, group in by_institution.items():
+            counts, settled = await self.flush_institution(institution_id, group)
+            for name, count in counts.items():
+                totals[name] += count
+            for snapshot in settled:
+                await autosave_buffer.acknowledge(snapshot)
+        return totals
+
+    async def flush_institution(
+        self, institution_id: UUID, group: Sequence[BufferedAttempt]
+    ) -> tuple[dict[str, int], list[BufferedAttempt]]:
+        """Write one institution's snapshots and commit; returns counts and the snapshots to acknowledge.
+
+        Each attempt is written under its own savepoint, so an attempt whose drafts the
+        database rejects stays buffered without holding back the rest of the batch.
+        """
+        await set_tenant_context(self.db, str(institution_id))
+        status_stmt = select(AssessmentAttempt.id, AssessmentAttempt.assessment_id).where(
+            AssessmentAttempt.id.in_([snapshot.attempt_id for snapshot in group]),
+            AssessmentAttempt.status == "in_progress",
+        )
+        open_attempts = dict((await self.db.execute(status_stmt)).all())
+        answer_keys = AnswerKeyService(self.db)
+        counts = {"responses": 0, "discarded": 0, "failed": 0}
+        settled = []
+        for snapshot in group:
+            assessment_id = open_attempts.get(snapshot.attempt_id)
+            # Drafts of attempts submitted or abandoned since are dropped, not written.
+            if assessment_id is None:
+                counts["discarded"] += 1
+                settled.append(snapshot)
+                continue
+            question_ids = (await answer_keys.get(assessment_id)).points
+            try:
+                async with self.db.begin_nested():
+                    counts["responses"] += await self.flush(snapshot, question_ids)
+            except SQLAlchemyError:
+                counts["failed"] += 1
+                continue
+            settled.append(snapshot)
+        await self.db.commit()
+        return counts, settled
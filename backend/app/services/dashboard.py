@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import Select, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.core.after_commit import run_after_commit
+from app.core.redis import get_redis
+from app.database.session import AsyncSessionFactory, set_tenant_context
+from app.models.academics import SkillDefinition, UserSkill
+from app.models.student_success import AcademicStreak, Badge, StudentRiskScore, UserBadge
+from app.schemas.analytics import DashboardResponse, RiskRead
+
+settings = get_settings()
+
+_DASHBOARD_INPUTS = (StudentRiskScore, AcademicStreak, UserBadge, UserSkill)
+
+
+@dataclass(frozen=True, slots=True)
+class CachedDashboard:
+    body: str
+    etag: str
+
+
+def dashboard_etag(body: str) -> str:
+    return f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+
+class DashboardStore:
+    """Per-user Redis hash holding the serialised dashboard and its ETag.
+
+    Each user also has a generation counter, bumped after any commit that touches their
+    risk, streak, badge or skill rows. A hash stamped with an older generation is stale;
+    stamping it with the generation read *before* the rebuild means a rebuild racing an
+    invalidation can never pass its result off as current. Redis failures are swallowed
+    and the dashboard is built from the database.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(institution_id: UUID, user_id: UUID) -> str:
+        return f"dashboard:{institution_id}:{user_id}"
+
+    @staticmethod
+    def _generation_key(institution_id: UUID, user_id: UUID) -> str:
+        return f"dashboard:gen:{institution_id}:{user_id}"
+
+    async def load(self, institution_id: UUID, user_id: UUID) -> tuple[str | None, CachedDashboard | None]:
+        """The user's current generation and, if it is still current, their cached dashboard."""
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.get(self._generation_key(institution_id, user_id))
+                pipe.hgetall(self._key(institution_id, user_id))
+                generation, cached = await pipe.execute()
+        except RedisError:
+            return None, None
+        generation = generation or "0"
+        if not cached or cached.get("generation") != generation:
+            return generation, None
+        return generation, CachedDashboard(body=cached["body"], etag=cached["etag"])
+
+    async def save(self, institution_id: UUID, user_id: UUID, generation: str, dashboard: CachedDashboard) -> None:
+        key = self._key(institution_id, user_id)
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"generation": generation, "body": dashboard.body, "etag": dashboard.etag})
+                pipe.expire(key, self.ttl_seconds)
+                await pipe.execute()
+        except RedisError:
+            return
+
+    async def invalidate(self, pairs: Iterable[tuple[UUID, UUID]]) -> None:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for institution_id, user_id in pairs:
+                    pipe.incr(self._generation_key(institution_id, user_id))
+                await pipe.execute()
+        except RedisError:
+            return
+
+
+dashboard_store = DashboardStore(ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def mark_dashboards_stale(db: AsyncSession, pairs: Iterable[tuple[UUID, UUID]]) -> None:
+    """For bulk statements the flush hook cannot see; applied when ``db`` commits."""
+    db.info.setdefault("dashboard_invalidations", set()).update(pairs)
+
+
+class DashboardService:
+    """The student dashboard, read from its Redis read model in one round trip.
+
+    On a miss the four sections are queried concurrently, each on its own pooled
+    connection, and the result is written back for the next request.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = AsyncSessionFactory):
+        self.session_factory = session_factory
+
+    async def get(self, institution_id: UUID, user_id: UUID) -> CachedDashboard:
+        generation, cached = await dashboard_store.load(institution_id, user_id)
+        if cached is not None:
+            return cached
+        body = (await self.build(institution_id, user_id)).model_dump_json()
+        dashboard = CachedDashboard(body=body, etag=dashboard_etag(body))
+        if generation is not None:
+            await dashboard_store.save(institution_id, user_id, generation, dashboard)
+        return dashboard
+
+    async def build(self, institution_id: UUID, user_id: UUID) -> DashboardResponse:
+        risk_stmt = (
+            select(
+                StudentRiskScore.score,
+                StudentRiskScore.level,
+                StudentRiskScore.factors_json,
+                StudentRiskScore.computed_at,
+            )
+            .where(StudentRiskScore.institution_id == institution_id, StudentRiskScore.user_id == user_id)
+            .order_by(StudentRiskScore.computed_at.desc())
+            .limit(1)
+        )
+        streaks_stmt = select(
+            AcademicStreak.streak_type,
+            AcademicStreak.current_length,
+            AcademicStreak.longest_length,
+            AcademicStreak.last_activity_date,
+            AcademicStreak.freeze_used,
+        ).where(AcademicStreak.institution_id == institution_id, AcademicStreak.user_id == user_id)
+        badges_stmt = (
+            select(UserBadge.badge_id, Badge.code, Badge.name, UserBadge.awarded_at, UserBadge.evidence_json)
+            .join(Badge, Badge.id == UserBadge.badge_id)
+            .where(UserBadge.institution_id == institution_id, UserBadge.user_id == user_id)
+            .order_by(UserBadge.awarded_at)
+        )
+        skills_stmt = (
+            select(
+                UserSkill.skill_id,
+                SkillDefinition.code,
+                SkillDefinition.name,
+                UserSkill.progress_pct,
+                UserSkill.mastery_level,
+            )
+            .join(SkillDefinition, SkillDefinition.id == UserSkill.skill_id)
+            .where(UserSkill.institution_id == institution_id, UserSkill.user_id == user_id)
+            .order_by(SkillDefinition.code)
+        )
+        risk, streaks, badges, skills = await asyncio.gather(
+            *(self._fetch(institution_id, stmt) for stmt in (risk_stmt, streaks_stmt, badges_stmt, skills_stmt))
+        )
+        return DashboardResponse(
+            user_id=user_id,
+            risk=RiskRead.model_validate(risk[0]._asdict()) if risk else None,
+            streaks={
+                row.streak_type: {key: value for key, value in row._asdict().items() if key != "streak_type"}
+                for row in streaks
+            },
+            badges=[row._asdict() for row in badges],
+            skills=[row._asdict() for row in skills],
+        )
+
+    async def _fetch(self, institution_id: UUID, stmt: Select) -> list:
+        async with self.session_factory() as db:
+            await set_tenant_context(db, str(institution_id))
+            return list((await db.execute(stmt)).all())
+
+
+@event.listens_for(Session, "after_flush")
+def _on_dashboard_flush(session: Session, flush_context) -> None:
+    pending: set[tuple[UUID, UUID]] = session.info.setdefault("dashboard_invalidations", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _DASHBOARD_INPUTS):
+            pending.add((instance.institution_id, instance.user_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _on_dashboard_commit(session: Session) -> None:
+    pending = session.info.pop("dashboard_invalidations", None)
+    if pending:
+        run_after_commit(session, dashboard_store.invalidate(pending))
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_dashboard_rollback(session: Session) -> None:
+    session.info.pop("dashboard_invalidations", None)
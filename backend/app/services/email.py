@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+
 import aiosmtplib
 
 from app.config import get_settings
@@ -7,17 +9,81 @@ from app.config import get_settings
 settings = get_settings()
 
 
-async def send_email_message(email_to: str, subject: str, body: str) -> bool:
-    if not settings.EMAIL_ENABLED:
+def _format_message(email_to: str, subject: str, body: str) -> str:
+    return f"From: {settings.SMTP_USER}\nTo: {email_to}\nSubject: {subject}\n\n{body}"
+
+
+class SmtpPool:
+    """Up to ``size`` authenticated SMTP connections, kept open and reused across messages.
+
+    Connections are opened on demand and returned to the pool after each message; one
+    that fails is dropped, and a message that found its idle connection closed by the
+    server is retried once on a fresh one. Bound to the event loop it is first used on;
+    :func:`get_smtp_pool` shares one per process.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: asyncio.LifoQueue[aiosmtplib.SMTP] = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+
+    async def send(self, email_to: str, subject: str, body: str) -> bool:
+        if not settings.EMAIL_ENABLED:
+            return True
+
+        message = _format_message(email_to, subject, body)
+        async with self._slots:
+            client = self._idle.get_nowait() if not self._idle.empty() else await self._connect()
+            try:
+                await self._sendmail(client, email_to, message)
+            except aiosmtplib.SMTPServerDisconnected:
+                client = await self._connect()
+                await self._sendmail(client, email_to, message)
+            self._idle.put_nowait(client)
         return True
 
-    message = f"From: {settings.SMTP_USER}\nTo: {email_to}\nSubject: {subject}\n\n{body}"
-    await aiosmtplib.send(
-        message,
-        hostname=settings.SMTP_HOST,
-        port=settings.SMTP_PORT,
-        username=settings.SMTP_USER,
-        password=settings.SMTP_PASSWORD,
-        start_tls=True,
-    )
-    return True
+    @staticmethod
+    async def _connect() -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(hostname=settings.SMTP_HOST, port=settings.SMTP_PORT, start_tls=True)
+        await client.connect()
+        if settings.SMTP_USER:
+            await client.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        return client
+
+    async def _sendmail(self, client: aiosmtplib.SMTP, email_to: str, message: str) -> None:
+        try:
+            await client.sendmail(settings.SMTP_USER, [email_to], message)
+        except aiosmtplib.SMTPException:
+            await self._discard(client)
+            raise
+
+    @staticmethod
+    async def _discard(client: aiosmtplib.SMTP) -> None:
+        try:
+            await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+
+
+# Created on first use and kept until close_smtp_pool, so consecutive sends on the same
+# event loop reuse the authenticated connections.
+_smtp_pool: SmtpPool | None = None
+
+
+def get_smtp_pool() -> SmtpPool:
+    """Return the process's shared SMTP pool, creating it on first use."""
+    global _smtp_pool
+    if _smtp_pool is None:
+        _smtp_pool = SmtpPool(settings.NOTIFICATION_CHANNEL_CONCURRENCY.get("email", 1))
+    return _smtp_pool
+
+
+async def close_smtp_pool() -> None:
+    global _smtp_pool
+    pool, _smtp_pool = _smtp_pool, None
+    if pool is not None:
+        await pool.close()
@@ -1,14 +1,29 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from dataclasses import dataclass
+from uuid import UUID, uuid4
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.academics import (
-    AssessmentAttempt,
-    AssessmentQuestionOption,
-    AssessmentResponse,
-    AssessmentResult,
-)
+from app.models.academics import AssessmentAttempt, AssessmentResponse, AssessmentResult
+from app.services.answer_key import AnswerKeyService
+from app.services.skill import SkillService
+
+
+@dataclass(frozen=True, slots=True)
+class AttemptScore:
+    institution_id: UUID
+    user_id: UUID
+    assessment_id: UUID
+    earned: float
+    possible: float
+    answered: int
+    correct: int
+
+    @property
+    def percentage(self) -> float:
+        return self.earned / self.possible * 100 if self.possible else 0.0
 
 
 class GradingService:
@@ -16,34 +31,69 @@ class GradingService:
         self.db = db
 
     async def grade_attempt(self, attempt_id):
-        attempt_stmt = select(AssessmentAttempt).where(AssessmentAttempt.id == attempt_id)
-        attempt = (await self.db.execute(attempt_stmt)).scalar_one_or_none()
-        if attempt is None:
+        score = await self.score_attempt(attempt_id)
+        if score is None:
             raise ValueError("attempt not found")
 
-        score_stmt = (
-            select(func.count(AssessmentResponse.id))
-            .join(AssessmentQuestionOption, AssessmentQuestionOption.id == AssessmentResponse.selected_option_id)
-            .where(
-                AssessmentResponse.attempt_id == attempt_id,
-                AssessmentQuestionOption.is_correct.is_(True),
+        result = AssessmentResult(
+            id=uuid4(),
+            institution_id=score.institution_id,
+            created_by=score.user_id,
+            attempt_id=attempt_id,
+            user_id=score.user_id,
+            total_score=score.earned,
+            percentage=score.percentage,
+        )
+        self.db.add(result)
+        await self.db.flush()
+        await SkillService(self.db).apply_results(score.institution_id, score.assessment_id, {score.user_id: result.id})
+        await self.db.commit()
+        await self.db.refresh(result)
+        return result
+
+    async def score_attempt(self, attempt_id: UUID) -> AttemptScore | None:
+        """Award points to every response of the attempt and total them.
+
+        One read fetches the attempt with its responses; points come from the cached
+        answer key of the assessment, so the option and question tables are not touched
+        per submission. Only responses whose points change are written, in one batch.
+        """
+        stmt = (
+            select(
+                AssessmentAttempt.institution_id,
+                AssessmentAttempt.user_id,
+                AssessmentAttempt.assessment_id,
+                AssessmentResponse.id.label("response_id"),
+                AssessmentResponse.question_id,
+                AssessmentResponse.selected_option_id,
+                AssessmentResponse.points_awarded,
             )
+            .outerjoin(AssessmentResponse, AssessmentResponse.attempt_id == AssessmentAttempt.id)
+            .where(AssessmentAttempt.id == attempt_id)
         )
-        score = int((await self.db.execute(score_stmt)).scalar_one())
+        rows = (await self.db.execute(stmt)).all()
+        if not rows:
+            return None
+        attempt = rows[0]
+        responses = [row for row in rows if row.response_id is not None]
 
-        total_stmt = select(func.count(AssessmentResponse.id)).where(AssessmentResponse.attempt_id == attempt_id)
-        total = int((await self.db.execute(total_stmt)).scalar_one())
-        percentage = (score / total * 100) if total else 0
+        key = await AnswerKeyService(self.db).get(attempt.assessment_id)
+        selections = [(row.question_id, row.selected_option_id) for row in responses]
+        awarded = key.award(selections)
+        changes = [
+            {"id": row.response_id, "points_awarded": points}
+            for row, points in zip(responses, awarded, strict=True)
+            if points != row.points_awarded
+        ]
+        if changes:
+            await self.db.execute(update(AssessmentResponse), changes)
 
-        result = AssessmentResult(
+        return AttemptScore(
             institution_id=attempt.institution_id,
-            created_by=attempt.user_id,
-            attempt_id=attempt.id,
             user_id=attempt.user_id,
-            total_score=float(score),
-            percentage=float(percentage),
+            assessment_id=attempt.assessment_id,
+            earned=sum(awarded),
+            possible=key.possible,
+            answered=len(responses),
+            correct=sum(1 for selection in selections if selection in key.correct),
         )
-        self.db.add(result)
-        await self.db.commit()
-        await self.db.refresh(result)
-        return result
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+from collections import defaultdict
+from collections.abc import Sequence
 from datetime import datetime, timezone
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+import aiosmtplib
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.models.communication import Notification, NotificationDelivery, NotificationPreference, NotificationTemplate
-from app.services.email import send_email_message
+from app.services.email import SmtpPool, get_smtp_pool
 from app.services.sms import send_sms_message
 
+settings = get_settings()
+
+CHANNELS = ("in_app", "push", "email", "sms")
+
 
 class NotificationService:
     def __init__(self, db: AsyncSession):
@@ -41,50 +51,77 @@ class NotificationService:
         await self.db.refresh(notification)
         return notification
 
-    async def deliver_notification(self, notification: Notification) -> list[NotificationDelivery]:
-        channels = ["in_app", "push", "email", "sms"]
-        deliveries: list[NotificationDelivery] = []
+    async def deliver_notification(self, notification: Notification) -> int:
+        """Deliver one notification; returns the number of delivery attempts recorded."""
+        return await self.deliver_many([notification])
 
-        prefs_stmt = select(NotificationPreference).where(
-            NotificationPreference.user_id == notification.user_id,
-            NotificationPreference.institution_id == notification.institution_id,
+    async def deliver_many(self, notifications: Sequence[Notification]) -> int:
+        """Deliver a batch of notifications concurrently; returns the delivery attempts recorded.
+
+        Each notification runs in its own task of a task group, trying its channels in
+        order until one succeeds, or all at once when ``require_all`` or P0 asks for every
+        channel. Provider calls are bounded per channel by a semaphore, and email goes
+        through the shared pool of kept-alive SMTP connections. Preferences are read in one query,
+        and the deliveries and status changes are written in bulk under one commit.
+        """
+        if not notifications:
+            return 0
+        prefs_stmt = select(NotificationPreference.user_id, NotificationPreference.channel).where(
+            NotificationPreference.user_id.in_({notification.user_id for notification in notifications}),
+            NotificationPreference.institution_id.in_({notification.institution_id for notification in notifications}),
+            NotificationPreference.enabled.is_(True),
         )
-        prefs = (await self.db.execute(prefs_stmt)).scalars().all()
-        enabled_channels = {pref.channel for pref in prefs if pref.enabled}
+        enabled_channels: dict[UUID, set[str]] = defaultdict(set)
+        for row in (await self.db.execute(prefs_stmt)).all():
+            enabled_channels[row.user_id].add(row.channel)
 
-        for channel in channels:
-            if enabled_channels and channel not in enabled_channels:
-                continue
+        concurrency = settings.NOTIFICATION_CHANNEL_CONCURRENCY
+        limits = {channel: asyncio.Semaphore(concurrency.get(channel, 1)) for channel in CHANNELS}
+        deliveries: list[dict] = []
+        sender = _ChannelSender(limits, get_smtp_pool())
+        async with asyncio.TaskGroup() as group:
+            for notification in notifications:
+                enabled = enabled_channels[notification.user_id]
+                group.create_task(self._fan_out(sender, notification, enabled, deliveries))
 
-            success = True
-            response_payload = {"message": "queued"}
-            if channel == "email":
-                success = await send_email_message("student@udsm.ac.tz", "UDSM Notification", str(notification.payload))
-                response_payload = {"provider": "smtp", "accepted": success}
-            elif channel == "sms":
-                success = await send_sms_message("+255700000000", str(notification.payload))
-                response_payload = {"provider": "africas_talking", "accepted": success}
-
-            delivery = NotificationDelivery(
-                institution_id=notification.institution_id,
-                created_by=notification.created_by,
-                notification_id=notification.id,
-                channel=channel,
-                status="sent" if success else "failed",
-                provider_response=response_payload,
-                attempts=1,
-                delivered_at=datetime.now(timezone.utc) if success else None,
-            )
-            self.db.add(delivery)
-            deliveries.append(delivery)
+        if deliveries:
+            await self.db.execute(insert(NotificationDelivery), deliveries)
+        await self.db.execute(
+            update(Notification)
+            .where(Notification.id.in_([notification.id for notification in notifications]))
+            .values(status="sent", sent_at=datetime.now(timezone.utc))
+        )
+        await self.db.commit()
+        return len(deliveries)
 
-            if success and not notification.require_all and notification.priority != "P0":
-                break
+    @staticmethod
+    async def _fan_out(
+        sender: _ChannelSender, notification: Notification, enabled: set[str], deliveries: list[dict]
+    ) -> None:
+        channels = [channel for channel in CHANNELS if not enabled or channel in enabled]
+        if notification.require_all or notification.priority == "P0":
+            outcomes = await asyncio.gather(*(sender.send(channel, notification) for channel in channels))
+        else:
+            outcomes = []
+            for channel in channels:
+                outcomes.append(await sender.send(channel, notification))
+                if outcomes[-1][1]:
+                    break
 
-        notification.status = "sent"
-        notification.sent_at = datetime.now(timezone.utc)
-        await self.db.commit()
-        return deliveries
+        for channel, (response_payload, success) in zip(channels, outcomes, strict=False):
+            deliveries.append(
+                {
+                    "id": uuid4(),
+                    "institution_id": notification.institution_id,
+                    "created_by": notification.created_by,
+                    "notification_id": notification.id,
+                    "channel": channel,
+                    "status": "sent" if success else "failed",
+                    "provider_response": response_payload,
+                    "attempts": 1,
+                    "delivered_at": datetime.now(timezone.utc) if success else None,
+                }
+            )
 
     async def render_template(self, template_name: str, channel: str, language: str, context: dict) -> tuple[str | None, str]:
         stmt = select(NotificationTemplate).where(
@@ -101,3 +138,24 @@ class NotificationService:
         for key, value in context.items():
             body = body.replace(f"{{{{{key}}}}}", str(value))
         return template.subject, body
+
+
+class _ChannelSender:
+    """Provider calls for one delivery batch, at most N in flight per channel."""
+
+    def __init__(self, limits: dict[str, asyncio.Semaphore], smtp: SmtpPool):
+        self.limits = limits
+        self.smtp = smtp
+
+    async def send(self, channel: str, notification: Notification) -> tuple[dict, bool]:
+        async with self.limits[channel]:
+            if channel == "email":
+                try:
+                    success = await self.smtp.send("student@udsm.ac.tz", "UDSM Notification", str(notification.payload))
+                except (aiosmtplib.SMTPException, OSError) as exc:
+                    return {"provider": "smtp", "accepted": False, "error": str(exc)}, False
+                return {"provider": "smtp", "accepted": success}, success
+            if channel == "sms":
+                success = await send_sms_message("+255700000000", str(notification.payload))
+                return {"provider": "africas_talking", "accepted": success}, success
+            return {"message": "queued"}, True
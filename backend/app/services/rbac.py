@@ -1,31 +1,348 @@
 from __future__ import annotations
 
+import hashlib
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from uuid import UUID
 
-from sqlalchemy import and_, or_, select
+from redis.exceptions import RedisError
+from sqlalchemy import and_, event, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.config import get_settings
+from app.core.after_commit import run_after_commit
+from app.core.cache import TTLCache
+from app.core.rbac import PERMISSION_DEFINITIONS
+from app.core.redis import get_redis
 from app.models.iam import Permission, Role, RoleBinding, RolePermission, User
 
+settings = get_settings()
 
-class RbacService:
-    def __init__(self, db: AsyncSession):
-        self.db = db
+# Bit positions for the token permission digest. The version changes whenever the
+# permission catalogue does, so digests minted against an older catalogue are ignored.
+PERMISSION_CODES: tuple[str, ...] = tuple(sorted(PERMISSION_DEFINITIONS))
+PERMISSION_BITS: dict[str, int] = {code: 1 << index for index, code in enumerate(PERMISSION_CODES)}
+PERMISSION_DIGEST_VERSION = hashlib.sha256(",".join(PERMISSION_CODES).encode()).hexdigest()[:8]
 
-    @staticmethod
-    def _scope_matches(binding: RoleBinding, scope_type: str | None, scope_id: str | None) -> bool:
-        if binding.scope_type == "institution":
-            return True
-        if scope_type is None:
+
+@dataclass(frozen=True, slots=True)
+class ScopeGrant:
+    scope_type: str
+    scope_id: str | None
+    start_at: datetime | None
+    end_at: datetime | None
+    unrestricted: bool = False
+
+    def active_at(self, now: datetime) -> bool:
+        if self.start_at is not None and self.start_at > now:
             return False
-        if binding.scope_type != scope_type:
+        if self.end_at is not None and self.end_at < now:
             return False
-        if scope_id is None:
-            return True
-        if binding.scope_id is None:
+        return True
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPermissions:
+    """Permission code -> scope grants for one user, built from a single RBAC query."""
+
+    grants: dict[str, tuple[ScopeGrant, ...]]
+    generation: int | None = None
+
+    def allows(self, permission_code: str, scope_type: str | None, scope_id: str | None, now: datetime) -> bool:
+        for grant in self.grants.get(permission_code, ()):
+            if not grant.active_at(now):
+                continue
+            if grant.unrestricted or _scope_matches(grant, scope_type, scope_id):
+                return True
+        return False
+
+    @classmethod
+    def from_digest(cls, digest: dict) -> CompiledPermissions | None:
+        """Rebuild grants from a token digest; returns None for unknown or malformed digests."""
+        try:
+            if digest["v"] != PERMISSION_DIGEST_VERSION:
+                return None
+            grants: dict[str, list[ScopeGrant]] = {}
+            for bits, scope_type, scope_id, start_ts, end_ts, unrestricted in digest["g"]:
+                mask = int(bits, 16)
+                grant = ScopeGrant(
+                    scope_type=scope_type,
+                    scope_id=scope_id,
+                    start_at=datetime.fromtimestamp(start_ts, UTC) if start_ts is not None else None,
+                    end_at=datetime.fromtimestamp(end_ts, UTC) if end_ts is not None else None,
+                    unrestricted=bool(unrestricted),
+                )
+                for code, bit in PERMISSION_BITS.items():
+                    if mask & bit:
+                        grants.setdefault(code, []).append(grant)
+        except (KeyError, TypeError, ValueError):
+            return None
+        return cls(grants={code: tuple(items) for code, items in grants.items()})
+
+
+@dataclass(frozen=True, slots=True)
+class BindingSnapshot:
+    role_id: str
+    role_code: str
+    scope_type: str
+    scope_id: str | None
+    start_at: datetime | None
+    end_at: datetime | None
+    active: bool
+    permissions: tuple[str, ...]
+
+    def active_at(self, now: datetime) -> bool:
+        if self.start_at is not None and self.start_at > now:
             return False
-        return str(binding.scope_id) == scope_id
+        if self.end_at is not None and self.end_at < now:
+            return False
+        return True
+
+
+@dataclass(frozen=True, slots=True)
+class AuthorizationSnapshot:
+    """Effective bindings of one user, stamped with the institution generation it was read at."""
+
+    generation: int
+    bindings: tuple[BindingSnapshot, ...]
+
+    def active_bindings(self, now: datetime) -> list[BindingSnapshot]:
+        return [binding for binding in self.bindings if binding.active_at(now)]
+
+    def permission_codes(self, now: datetime) -> list[str]:
+        return sorted({code for binding in self.active_bindings(now) for code in binding.permissions})
+
+    def compile(self) -> CompiledPermissions:
+        grants: dict[str, list[ScopeGrant]] = {}
+        for binding in self.bindings:
+            grant = ScopeGrant(
+                scope_type=binding.scope_type,
+                scope_id=binding.scope_id,
+                start_at=binding.start_at,
+                end_at=binding.end_at,
+                unrestricted=binding.role_code == "super_admin",
+            )
+            for code in binding.permissions:
+                grants.setdefault(code, []).append(grant)
+        return CompiledPermissions(
+            grants={code: tuple(items) for code, items in grants.items()},
+            generation=self.generation,
+        )
+
+    def to_digest(self) -> dict:
+        """Compact token claim: one permission bitset per distinct scope grant.
+
+        Permissions outside ``PERMISSION_DEFINITIONS`` have no bit and are always
+        checked against the database.
+        """
+        merged: dict[tuple, int] = {}
+        for binding in self.bindings:
+            key = (
+                binding.scope_type,
+                binding.scope_id,
+                int(binding.start_at.timestamp()) if binding.start_at else None,
+                int(binding.end_at.timestamp()) if binding.end_at else None,
+                int(binding.role_code == "super_admin"),
+            )
+            mask = merged.get(key, 0)
+            for code in binding.permissions:
+                mask |= PERMISSION_BITS.get(code, 0)
+            merged[key] = mask
+        return {
+            "v": PERMISSION_DIGEST_VERSION,
+            "g": [[format(mask, "x"), *key] for key, mask in merged.items() if mask],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "generation": self.generation,
+                "bindings": [
+                    {
+                        "role_id": binding.role_id,
+                        "role_code": binding.role_code,
+                        "scope_type": binding.scope_type,
+                        "scope_id": binding.scope_id,
+                        "start_at": binding.start_at.isoformat() if binding.start_at else None,
+                        "end_at": binding.end_at.isoformat() if binding.end_at else None,
+                        "active": binding.active,
+                        "permissions": list(binding.permissions),
+                    }
+                    for binding in self.bindings
+                ],
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> AuthorizationSnapshot:
+        data = json.loads(raw)
+        return cls(
+            generation=int(data["generation"]),
+            bindings=tuple(
+                BindingSnapshot(
+                    role_id=item["role_id"],
+                    role_code=item["role_code"],
+                    scope_type=item["scope_type"],
+                    scope_id=item["scope_id"],
+                    start_at=datetime.fromisoformat(item["start_at"]) if item["start_at"] else None,
+                    end_at=datetime.fromisoformat(item["end_at"]) if item["end_at"] else None,
+                    active=item["active"],
+                    permissions=tuple(item["permissions"]),
+                )
+                for item in data["bindings"]
+            ),
+        )
+
+
+class AuthorizationSnapshotStore:
+    """Redis copy of per-user authorization snapshots shared by every worker.
+
+    Each institution has a generation counter; any RBAC write bumps it, which makes
+    every snapshot and in-process entry stamped with an older generation stale.
+    Redis failures are swallowed so authorization degrades to the database.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _generation_key(institution_id: UUID) -> str:
+        return f"authz:gen:{institution_id}"
+
+    @staticmethod
+    def _snapshot_key(institution_id: UUID, user_id: UUID) -> str:
+        return f"authz:snapshot:{institution_id}:{user_id}"
+
+    async def generation(self, institution_id: UUID) -> int | None:
+        try:
+            value = await get_redis().get(self._generation_key(institution_id))
+        except RedisError:
+            return None
+        return int(value) if value is not None else 0
+
+    async def load(self, institution_id: UUID, user_id: UUID, generation: int) -> AuthorizationSnapshot | None:
+        try:
+            raw = await get_redis().get(self._snapshot_key(institution_id, user_id))
+        except RedisError:
+            return None
+        if raw is None:
+            return None
+        snapshot = AuthorizationSnapshot.from_json(raw)
+        return snapshot if snapshot.generation == generation else None
+
+    async def save(self, institution_id: UUID, user_id: UUID, snapshot: AuthorizationSnapshot) -> None:
+        try:
+            await get_redis().set(self._snapshot_key(institution_id, user_id), snapshot.to_json(), ex=self.ttl_seconds)
+        except RedisError:
+            return
+
+    async def bump(self, institution_ids: Iterable[UUID]) -> None:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for institution_id in institution_ids:
+                    pipe.incr(self._generation_key(institution_id))
+                await pipe.execute()
+        except RedisError:
+            return
+
+
+snapshot_store = AuthorizationSnapshotStore(ttl_seconds=settings.RBAC_SNAPSHOT_TTL_SECONDS)
+
+
+# Keyed by (institution_id, user_id). Entries are dropped by the flush/commit listeners below
+# whenever a RoleBinding, Role, Permission or RolePermission row is written through the ORM.
+permission_cache: TTLCache[tuple[UUID, UUID], CompiledPermissions] = TTLCache(
+    maxsize=settings.RBAC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RBAC_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_user_permissions(institution_id: UUID, user_id: UUID) -> None:
+    permission_cache.pop((institution_id, user_id))
+
+
+def invalidate_institution_permissions(institution_id: UUID) -> None:
+    permission_cache.pop_where(lambda key: key[0] == institution_id)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=UTC)
+
+
+def _scope_matches(grant: ScopeGrant | RoleBinding, scope_type: str | None, scope_id: str | None) -> bool:
+    if grant.scope_type == "institution":
+        return True
+    if scope_type is None:
+        return False
+    if grant.scope_type != scope_type:
+        return False
+    if scope_id is None:
+        return True
+    if grant.scope_id is None:
+        return False
+    return str(grant.scope_id) == scope_id
+
+
+def _collect_rbac_writes(session: Session) -> None:
+    pending: set[tuple[UUID, UUID | None]] = session.info.setdefault("rbac_invalidations", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, RoleBinding):
+            pending.add((instance.institution_id, instance.user_id))
+        elif isinstance(instance, (Role, Permission, RolePermission)):
+            pending.add((instance.institution_id, None))
+
+
+def _apply_rbac_invalidations(session: Session, *, clear: bool) -> None:
+    pending = session.info.get("rbac_invalidations")
+    if not pending:
+        return
+    session.info.pop("rbac_compiled", None)
+    for institution_id, user_id in pending:
+        if user_id is None:
+            invalidate_institution_permissions(institution_id)
+        else:
+            invalidate_user_permissions(institution_id, user_id)
+    if clear:
+        pending.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _on_rbac_flush(session: Session, flush_context) -> None:
+    _collect_rbac_writes(session)
+    _apply_rbac_invalidations(session, clear=False)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_rbac_commit(session: Session) -> None:
+    # Invalidate again once the rows are visible so a concurrent request cannot
+    # re-cache the pre-commit state it read between our flush and commit. Other
+    # workers learn of the write through the bumped institution generation.
+    institution_ids = {
+        institution_id
+        for institution_id, _ in session.info.get("rbac_invalidations", ())
+        if institution_id is not None
+    }
+    _apply_rbac_invalidations(session, clear=True)
+    session.info.pop("rbac_compiled", None)
+    if institution_ids:
+        run_after_commit(session, snapshot_store.bump(institution_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rbac_rollback(session: Session) -> None:
+    _apply_rbac_invalidations(session, clear=True)
+    session.info.pop("rbac_compiled", None)
+
+
+class RbacService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
 
     async def ensure_role_binding(
         self,
@@ -57,7 +374,9 @@ class RbacService:
         if existing is not None:
             if not existing.active:
                 existing.active = True
+                user.updated_at = datetime.now(UTC)
                 await self.db.flush()
+                invalidate_user_permissions(user.institution_id, user.id)
             return existing
 
         binding = RoleBinding(
@@ -70,21 +389,27 @@ class RbacService:
             active=True,
         )
         self.db.add(binding)
+        # Touching the user changes its token scope_hash, retiring permission digests minted before this binding.
+        user.updated_at = datetime.now(UTC)
         await self.db.flush()
+        invalidate_user_permissions(user.institution_id, user.id)
         return binding
 
-    async def user_has_permission(
-        self,
-        *,
-        user: User,
-        permission_code: str,
-        scope_type: str | None = None,
-        scope_id: str | None = None,
-    ) -> bool:
+    async def load_authorization_snapshot(self, *, user: User, generation: int = 0) -> AuthorizationSnapshot:
         now = datetime.now(UTC)
         stmt = (
-            select(RoleBinding, Role.code)
-            .join(
+            select(
+                RoleBinding.id,
+                RoleBinding.role_id,
+                Role.code,
+                RoleBinding.scope_type,
+                RoleBinding.scope_id,
+                RoleBinding.start_at,
+                RoleBinding.end_at,
+                RoleBinding.active,
+                Permission.code,
+            )
+            .outerjoin(
                 Role,
                 and_(
                     Role.id == RoleBinding.role_id,
@@ -92,7 +417,7 @@ class RbacService:
                     Role.deleted_at.is_(None),
                 ),
             )
-            .join(
+            .outerjoin(
                 RolePermission,
                 and_(
                     RolePermission.role_id == Role.id,
@@ -100,13 +425,12 @@ class RbacService:
                     RolePermission.deleted_at.is_(None),
                 ),
             )
-            .join(
+            .outerjoin(
                 Permission,
                 and_(
                     Permission.id == RolePermission.permission_id,
                     Permission.institution_id == Role.institution_id,
                     Permission.deleted_at.is_(None),
-                    Permission.code == permission_code,
                 ),
             )
             .where(
@@ -114,17 +438,78 @@ class RbacService:
                 RoleBinding.user_id == user.id,
                 RoleBinding.active.is_(True),
                 RoleBinding.deleted_at.is_(None),
-                or_(RoleBinding.start_at.is_(None), RoleBinding.start_at <= now),
                 or_(RoleBinding.end_at.is_(None), RoleBinding.end_at >= now),
             )
         )
-        rows = (await self.db.execute(stmt)).all()
-        for binding, role_code in rows:
-            if role_code == "super_admin":
-                return True
-            if self._scope_matches(binding, scope_type, scope_id):
-                return True
-        return False
+        bindings: dict[UUID, dict] = {}
+        for binding_id, role_id, role_code, scope_type, scope_id, start_at, end_at, active, permission_code in (
+            await self.db.execute(stmt)
+        ).all():
+            entry = bindings.setdefault(
+                binding_id,
+                {
+                    "role_id": str(role_id),
+                    "role_code": role_code or "unknown",
+                    "scope_type": scope_type,
+                    "scope_id": str(scope_id) if scope_id is not None else None,
+                    "start_at": _as_utc(start_at),
+                    "end_at": _as_utc(end_at),
+                    "active": active,
+                    "permissions": [],
+                },
+            )
+            if permission_code is not None:
+                entry["permissions"].append(permission_code)
+        return AuthorizationSnapshot(
+            generation=generation,
+            bindings=tuple(
+                BindingSnapshot(**{**entry, "permissions": tuple(sorted(entry["permissions"]))})
+                for entry in bindings.values()
+            ),
+        )
+
+    async def get_authorization_snapshot(
+        self, *, user: User, generation: int | None = None
+    ) -> AuthorizationSnapshot:
+        if generation is None:
+            generation = await snapshot_store.generation(user.institution_id)
+        if generation is not None:
+            snapshot = await snapshot_store.load(user.institution_id, user.id, generation)
+            if snapshot is not None:
+                return snapshot
+
+        snapshot = await self.load_authorization_snapshot(user=user, generation=generation or 0)
+        if generation is not None:
+            await snapshot_store.save(user.institution_id, user.id, snapshot)
+        return snapshot
+
+    async def get_compiled_permissions(self, *, user: User) -> CompiledPermissions:
+        # Memoized on the session so repeated checks within one request skip the
+        # generation lookup; RBAC writes in the same session drop the memo on flush.
+        key = (user.institution_id, user.id)
+        memo: dict[tuple[UUID, UUID], CompiledPermissions] = self.db.info.setdefault("rbac_compiled", {})
+        if key in memo:
+            return memo[key]
+
+        generation = await snapshot_store.generation(user.institution_id)
+        compiled = permission_cache.get(key)
+        if compiled is None or (generation is not None and compiled.generation != generation):
+            snapshot = await self.get_authorization_snapshot(user=user, generation=generation)
+            compiled = snapshot.compile()
+            permission_cache.set(key, compiled)
+        memo[key] = compiled
+        return compiled
+
+    async def user_has_permission(
+        self,
+        *,
+        user: User,
+        permission_code: str,
+        scope_type: str | None = None,
+        scope_id: str | None = None,
+    ) -> bool:
+        compiled = await self.get_compiled_permissions(user=user)
+        return compiled.allows(permission_code, scope_type, scope_id, datetime.now(UTC))
 
     async def get_user_permissions(self, *, user: User) -> list[str]:
         now = datetime.now(UTC)
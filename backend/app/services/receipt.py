@@ -2,13 +2,30 @@ from __future__ import annotations
 
 import hashlib
 import json
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.receipts import Receipt
+from app.database.upsert import insert_for
+from app.models.receipts import Receipt, ReceiptChainHead
+
+
+def compute_receipt_hash(payload: dict, previous_hash: str | None) -> str:
+    canonical_payload = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    chain_data = f"{canonical_payload}:{previous_hash or 'GENESIS'}"
+    return hashlib.sha256(chain_data.encode()).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class ReceiptDraft:
+    entity_id: UUID
+    entity_type: str
+    action: str
+    payload: dict
 
 
 class ReceiptService:
@@ -25,49 +42,105 @@ class ReceiptService:
         action: str,
         payload: dict,
     ) -> Receipt:
-        last_stmt = (
-            select(Receipt)
-            .where(Receipt.institution_id == institution_id, Receipt.user_id == user_id)
-            .order_by(Receipt.timestamp.desc())
-            .limit(1)
-        )
-        previous = (await self.db.execute(last_stmt)).scalar_one_or_none()
-        previous_hash = previous.receipt_hash if previous else None
+        draft = ReceiptDraft(entity_id=entity_id, entity_type=entity_type, action=action, payload=payload)
+        (receipt,) = await self.generate_receipt_chain(institution_id=institution_id, user_id=user_id, drafts=[draft])
+        return receipt
+
+    async def generate_receipt_chain(
+        self,
+        *,
+        institution_id: UUID,
+        user_id: UUID,
+        drafts: Sequence[ReceiptDraft],
+    ) -> list[Receipt]:
+        """Append ``drafts`` to the user's chain in order: one tail lookup, then one flush."""
+        if not drafts:
+            return []
+
+        # Pending rows of the caller are flushed together with the receipts below.
+        with self.db.no_autoflush:
+            head = await self._lock_chain_head(institution_id, user_id)
 
-        canonical_payload = json.dumps(payload, sort_keys=True, separators=(",", ":"))
         now = datetime.now(timezone.utc)
-        code_seed = f"{institution_id}-{user_id}-{entity_type}-{action}-{now.timestamp()}"
-        receipt_code = f"UDSM-{hashlib.sha256(code_seed.encode()).hexdigest()[:12].upper()}"
-        chain_data = f"{canonical_payload}:{previous_hash or 'GENESIS'}"
-        receipt_hash = hashlib.sha256(chain_data.encode()).hexdigest()
-
-        chain_position_stmt = select(func.count(Receipt.id)).where(
-            Receipt.institution_id == institution_id,
-            Receipt.user_id == user_id,
+        previous_hash, chain_position = head.last_hash, head.position
+        receipts: list[Receipt] = []
+        for draft in drafts:
+            chain_position += 1
+            code_seed = (
+                f"{institution_id}-{user_id}-{draft.entity_type}-{draft.action}-{now.timestamp()}-{chain_position}"
+            )
+            receipt_code = f"UDSM-{hashlib.sha256(code_seed.encode()).hexdigest()[:12].upper()}"
+            receipt_hash = compute_receipt_hash(draft.payload, previous_hash)
+
+            receipts.append(
+                Receipt(
+                    institution_id=institution_id,
+                    created_by=user_id,
+                    user_id=user_id,
+                    receipt_code=receipt_code,
+                    entity_id=draft.entity_id,
+                    entity_type=draft.entity_type,
+                    action=draft.action,
+                    timestamp=now,
+                    previous_receipt_hash=previous_hash,
+                    receipt_hash=receipt_hash,
+                    payload=draft.payload,
+                    chain_position=chain_position,
+                )
+            )
+            previous_hash = receipt_hash
+
+        head.last_hash = previous_hash
+        head.position = chain_position
+        self.db.add_all(receipts)
+        await self.db.flush()
+        return receipts
+
+    async def _lock_chain_head(self, institution_id: UUID, user_id: UUID) -> ReceiptChainHead:
+        """Return the user's chain head locked FOR UPDATE, creating it on first use.
+
+        Concurrent appenders for the same user serialize on this row lock for the rest of
+        their transaction, so positions and hash links cannot fork.
+        """
+        stmt = (
+            select(ReceiptChainHead)
+            .where(ReceiptChainHead.institution_id == institution_id, ReceiptChainHead.user_id == user_id)
+            .with_for_update()
         )
-        chain_position = int((await self.db.execute(chain_position_stmt)).scalar_one()) + 1
-
-        receipt = Receipt(
-            institution_id=institution_id,
-            created_by=user_id,
-            user_id=user_id,
-            receipt_code=receipt_code,
-            entity_id=entity_id,
-            entity_type=entity_type,
-            action=action,
-            timestamp=now,
-            previous_receipt_hash=previous_hash,
-            receipt_hash=receipt_hash,
-            payload=payload,
-            chain_position=chain_position,
+        head = (await self.db.execute(stmt)).scalar_one_or_none()
+        if head is not None:
+            return head
+
+        # One-off backfill for chains written before heads existed. Losing the insert race is
+        # fine: the re-select below then waits for the winner's lock.
+        last_hash, position = await self._chain_tail(institution_id, user_id)
+        insert_stmt = (
+            insert_for(self.db, ReceiptChainHead)
+            .values(
+                id=uuid4(),
+                institution_id=institution_id,
+                created_by=user_id,
+                user_id=user_id,
+                last_hash=last_hash,
+                position=position,
+            )
+            .on_conflict_do_nothing(index_elements=["institution_id", "user_id"])
         )
-        self.db.add(receipt)
-        await self.db.flush()
-        return receipt
+        await self.db.execute(insert_stmt)
+        return (await self.db.execute(stmt.execution_options(populate_existing=True))).scalar_one()
+
+    async def _chain_tail(self, institution_id: UUID, user_id: UUID) -> tuple[str | None, int]:
+        stmt = (
+            select(Receipt.receipt_hash, Receipt.chain_position)
+            .where(Receipt.institution_id == institution_id, Receipt.user_id == user_id)
+            .order_by(Receipt.chain_position.desc(), Receipt.timestamp.desc())
+            .limit(1)
+        )
+        row = (await self.db.execute(stmt)).first()
+        if row is None:
+            return None, 0
+        return row.receipt_hash, row.chain_position
 
     @staticmethod
     def verify_receipt(receipt: Receipt) -> bool:
-        canonical_payload = json.dumps(receipt.payload, sort_keys=True, separators=(",", ":"))
-        chain_data = f"{canonical_payload}:{receipt.previous_receipt_hash or 'GENESIS'}"
-        expected = hashlib.sha256(chain_data.encode()).hexdigest()
-        return expected == receipt.receipt_hash
+        return compute_receipt_hash(receipt.payload, receipt.previous_receipt_hash) == receipt.receipt_hash
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.receipts import Receipt, ReceiptCheckpoint, ReceiptMerkleNode
+from app.utils.merkle import ProofSide, build_levels, leaf_hash, sibling_positions, verify_inclusion
+from app.utils.security import RECEIPT_SIGNATURE_SCHEME, sign_receipt_root, verify_receipt_root
+
+NODE_INSERT_CHUNK = 5000
+
+
+def checkpoint_message(checkpoint: ReceiptCheckpoint) -> str:
+    return f"{checkpoint.institution_id}:{checkpoint.day.isoformat()}:{checkpoint.leaf_count}:{checkpoint.root_hash}"
+
+
+@dataclass(frozen=True, slots=True)
+class InclusionProof:
+    checkpoint: ReceiptCheckpoint
+    leaf_index: int
+    leaf_hash: str
+    path: list[tuple[str, ProofSide]]
+
+    @property
+    def valid(self) -> bool:
+        checkpoint = self.checkpoint
+        return (
+            verify_inclusion(self.leaf_hash, self.path, checkpoint.root_hash)
+            and checkpoint.signature_scheme == RECEIPT_SIGNATURE_SCHEME
+            and verify_receipt_root(checkpoint_message(checkpoint), checkpoint.signature, checkpoint.signing_key_id)
+        )
+
+
+class ReceiptCheckpointService:
+    """Builds daily Merkle checkpoints over receipt hashes and serves inclusion proofs.
+
+    Roots are signed with the institution-wide Ed25519 receipt key, so a client holding
+    the published public key can check a proof and its root without asking the server.
+    Every node of a checkpoint's tree is stored, so a proof is two indexed reads and
+    O(log n) hashes instead of a replay of the receipt chain from GENESIS.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def build_checkpoint(self, institution_id: UUID, day: date) -> ReceiptCheckpoint | None:
+        existing = (
+            await self.db.execute(
+                select(ReceiptCheckpoint).where(
+                    ReceiptCheckpoint.institution_id == institution_id, ReceiptCheckpoint.day == day
+                )
+            )
+        ).scalar_one_or_none()
+        if existing is not None:
+            return existing
+
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        stmt = (
+            select(Receipt.id, Receipt.receipt_hash)
+            .where(
+                Receipt.institution_id == institution_id,
+                Receipt.timestamp >= start,
+                Receipt.timestamp < start + timedelta(days=1),
+            )
+            .order_by(Receipt.timestamp, Receipt.receipt_code)
+        )
+        rows = (await self.db.execute(stmt)).all()
+        if not rows:
+            return None
+
+        levels = build_levels([leaf_hash(row.receipt_hash) for row in rows])
+        checkpoint = ReceiptCheckpoint(
+            id=uuid4(),
+            institution_id=institution_id,
+            day=day,
+            leaf_count=len(rows),
+            root_hash=levels[-1][0],
+            signature_scheme=RECEIPT_SIGNATURE_SCHEME,
+        )
+        checkpoint.signing_key_id, checkpoint.signature = sign_receipt_root(checkpoint_message(checkpoint))
+        self.db.add(checkpoint)
+        await self.db.flush()
+
+        nodes = [
+            {
+                "institution_id": institution_id,
+                "checkpoint_id": checkpoint.id,
+                "level": level,
+                "position": position,
+                "node_hash": node,
+                "receipt_id": rows[position].id if level == 0 else None,
+            }
+            for level, hashes in enumerate(levels)
+            for position, node in enumerate(hashes)
+        ]
+        for offset in range(0, len(nodes), NODE_INSERT_CHUNK):
+            await self.db.execute(insert(ReceiptMerkleNode), nodes[offset : offset + NODE_INSERT_CHUNK])
+        return checkpoint
+
+    async def inclusion_proof(self, receipt: Receipt) -> InclusionProof | None:
+        """Proof that ``receipt`` is under its day's signed root, or None before the day is checkpointed."""
+        leaf = (
+            await self.db.execute(
+                select(ReceiptMerkleNode).where(
+                    ReceiptMerkleNode.receipt_id == receipt.id, ReceiptMerkleNode.level == 0
+                )
+            )
+        ).scalar_one_or_none()
+        if leaf is None:
+            return None
+        checkpoint = await self.db.get(ReceiptCheckpoint, leaf.checkpoint_id)
+
+        wanted = sibling_positions(leaf.position, checkpoint.leaf_count)
+        siblings: dict[tuple[int, int], str] = {}
+        if wanted:
+            stmt = select(ReceiptMerkleNode.level, ReceiptMerkleNode.position, ReceiptMerkleNode.node_hash).where(
+                ReceiptMerkleNode.checkpoint_id == checkpoint.id,
+                or_(*(and_(ReceiptMerkleNode.level == lvl, ReceiptMerkleNode.position == pos) for lvl, pos in wanted)),
+            )
+            siblings = {(row.level, row.position): row.node_hash for row in (await self.db.execute(stmt)).all()}
+
+        # A missing sibling means the node was promoted unchanged at that level.
+        path: list[tuple[str, ProofSide]] = [
+            (siblings[key], "left" if key[1] % 2 == 0 else "right") for key in wanted if key in siblings
+        ]
+        # Hash the receipt as stored now, so a receipt edited after the checkpoint fails the proof.
+        return InclusionProof(
+            checkpoint=checkpoint, leaf_index=leaf.position, leaf_hash=leaf_hash(receipt.receipt_hash), path=path
+        )
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Literal
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.redis import get_redis
+from app.models.academics import Assessment, AssessmentAttempt
+from app.models.receipts import Receipt
+from app.services.receipt import compute_receipt_hash
+
+settings = get_settings()
+
+ChainBreakReason = Literal["position", "link", "payload_hash"]
+VerificationScope = Literal["user", "course", "institution"]
+
+# Created on first use and kept for the life of the process.
+_hash_pool: ProcessPoolExecutor | None = None
+
+
+def _shared_hash_pool(workers: int) -> ProcessPoolExecutor | None:
+    """The process's hashing pool, or None to hash on a thread of the default executor.
+
+    Daemonic processes, such as Celery prefork children, may not start child processes,
+    so they always get None.
+    """
+    global _hash_pool
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        return None
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=workers)
+    return _hash_pool
+
+
+class VerificationJobOwners:
+    """The institution that queued each verification job, so only its admins can read the job."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"receipt-verify:job:{job_id}"
+
+    async def register(self, job_id: str, institution_id: UUID) -> None:
+        await get_redis().set(self._key(job_id), str(institution_id), ex=self.ttl_seconds)
+
+    async def owner(self, job_id: str) -> UUID | None:
+        value = await get_redis().get(self._key(job_id))
+        return UUID(value) if value else None
+
+
+verification_jobs = VerificationJobOwners(ttl_seconds=settings.RECEIPT_VERIFY_JOB_TTL_SECONDS)
+
+
+def mismatched_hashes(rows: Sequence[tuple[dict, str | None, str]]) -> list[int]:
+    """Indexes of ``(payload, previous_hash, receipt_hash)`` rows whose stored hash is wrong.
+
+    Module level so it can be shipped to a process pool worker.
+    """
+    return [
+        index
+        for index, (payload, previous_hash, receipt_hash) in enumerate(rows)
+        if compute_receipt_hash(payload, previous_hash) != receipt_hash
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class ChainBreak:
+    user_id: UUID
+    receipt_code: str
+    chain_position: int
+    reason: ChainBreakReason
+
+
+@dataclass(slots=True)
+class ChainVerificationReport:
+    scope: VerificationScope
+    scope_id: UUID
+    chains: int = 0
+    receipts: int = 0
+    elapsed_seconds: float = 0.0
+    breaks: list[ChainBreak] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.breaks
+
+    @property
+    def receipts_per_second(self) -> float:
+        return self.receipts / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+@dataclass(slots=True)
+class _ChainCursor:
+    user_id: UUID | None = None
+    previous_hash: str | None = None
+    position: int = 0
+
+
+class ReceiptChainVerifier:
+    """Verifies whole receipt chains for a user, a course's students or an institution.
+
+    Receipts are streamed per chain in ``chain_position`` order through a server-side
+    cursor, ``batch_size`` rows at a time. Positions and hash links are checked inline
+    while the SHA-256 recomputation of each batch runs on the shared process pool, with
+    up to ``workers`` batches in flight so the database read overlaps the hashing. Only
+    the first break of every chain is reported: anything after it is suspect anyway.
+    """
+
+    def __init__(self, db: AsyncSession, *, batch_size: int = 2000, workers: int = 4):
+        self.db = db
+        self.batch_size = batch_size
+        self.workers = workers
+
+    async def verify_user(self, institution_id: UUID, user_id: UUID) -> ChainVerificationReport:
+        return await self._verify("user", user_id, institution_id, Receipt.user_id == user_id)
+
+    async def verify_course(self, institution_id: UUID, course_id: UUID) -> ChainVerificationReport:
+        students = (
+            select(AssessmentAttempt.user_id)
+            .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+            .where(Assessment.course_id == course_id)
+        )
+        return await self._verify("course", course_id, institution_id, Receipt.user_id.in_(students))
+
+    async def verify_institution(self, institution_id: UUID) -> ChainVerificationReport:
+        return await self._verify("institution", institution_id, institution_id, None)
+
+    async def _verify(
+        self,
+        scope: VerificationScope,
+        scope_id: UUID,
+        institution_id: UUID,
+        criterion: ColumnElement[bool] | None,
+    ) -> ChainVerificationReport:
+        report = ChainVerificationReport(scope=scope, scope_id=scope_id)
+        started = time.perf_counter()
+        stmt = (
+            select(
+                Receipt.user_id,
+                Receipt.receipt_code,
+                Receipt.chain_position,
+                Receipt.previous_receipt_hash,
+                Receipt.receipt_hash,
+                Receipt.payload,
+            )
+            .where(Receipt.institution_id == institution_id)
+            .order_by(Receipt.user_id, Receipt.chain_position)
+            .execution_options(yield_per=self.batch_size)
+        )
+        if criterion is not None:
+            stmt = stmt.where(criterion)
+
+        first_breaks: dict[UUID, ChainBreak] = {}
+        cursor = _ChainCursor()
+        in_flight: deque[tuple[Sequence[Row], asyncio.Future[list[int]]]] = deque()
+        # Without a process pool the hashing still leaves the event loop via the default executor.
+        pool = _shared_hash_pool(self.workers)
+        loop = asyncio.get_running_loop()
+        result = await self.db.stream(stmt)
+        async for rows in result.partitions():
+            report.receipts += len(rows)
+            report.chains += self._check_links(rows, cursor, first_breaks)
+            batch = [(row.payload, row.previous_receipt_hash, row.receipt_hash) for row in rows]
+            in_flight.append((rows, loop.run_in_executor(pool, mismatched_hashes, batch)))
+            if len(in_flight) >= max(self.workers, 1):
+                await self._collect_hashes(*in_flight.popleft(), first_breaks)
+        while in_flight:
+            await self._collect_hashes(*in_flight.popleft(), first_breaks)
+
+        report.breaks = sorted(first_breaks.values(), key=lambda item: str(item.user_id))
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _check_links(rows: Sequence[Row], cursor: _ChainCursor, first_breaks: dict[UUID, ChainBreak]) -> int:
+        """Check positions and hash links of ``rows``; returns how many chains start in them."""
+        started = 0
+        for row in rows:
+            if row.user_id != cursor.user_id:
+                cursor.user_id, cursor.previous_hash, cursor.position = row.user_id, None, 0
+                started += 1
+            if row.chain_position != cursor.position + 1:
+                _record_break(first_breaks, row, "position")
+            elif row.previous_receipt_hash != cursor.previous_hash:
+                _record_break(first_breaks, row, "link")
+            cursor.previous_hash, cursor.position = row.receipt_hash, row.chain_position
+        return started
+
+    @staticmethod
+    async def _collect_hashes(
+        rows: Sequence[Row], future: asyncio.Future[list[int]], first_breaks: dict[UUID, ChainBreak]
+    ) -> None:
+        for index in await future:
+            _record_break(first_breaks, rows[index], "payload_hash")
+
+
+def _record_break(first_breaks: dict[UUID, ChainBreak], row: Row, reason: ChainBreakReason) -> None:
+    # Hash results arrive after the link checks of later rows, so keep the lowest position.
+    current = first_breaks.get(row.user_id)
+    if current is None or row.chain_position < current.chain_position:
+        first_breaks[row.user_id] = ChainBreak(
+            user_id=row.user_id,
+            receipt_code=row.receipt_code,
+            chain_position=row.chain_position,
+            reason=reason,
+        )
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from typing import Literal
+from uuid import UUID, uuid4
+
+from redis.asyncio import Redis
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.redis import get_redis
+from app.models.academics import AssessmentAttempt, AssessmentResponse, AssessmentResult
+from app.services.answer_key import AnswerKeyService
+from app.services.skill import SkillService
+
+settings = get_settings()
+
+RegradeStatus = Literal["queued", "running", "paused", "completed", "failed"]
+
+# Moves a job to ARGV[1] only if its current status is one of ARGV[3..], so a pause
+# request and the worker finishing a chunk cannot overwrite each other. A non-empty
+# ARGV[2] also requires that run to still own the job.
+TRANSITION_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if not status then
+    return 0
+end
+if ARGV[2] ~= '' and redis.call('HGET', KEYS[1], 'run_id') ~= ARGV[2] then
+    return 0
+end
+for i = 3, #ARGV do
+    if ARGV[i] == status then
+        redis.call('HSET', KEYS[1], 'status', ARGV[1])
+        return 1
+    end
+end
+return 0
+"""
+
+# Starts a queued job under the run id ARGV[1]. A worker whose run has been replaced,
+# say by a quick pause and resume, sees the new id and stops.
+START_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'queued' then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', 'running', 'run_id', ARGV[1])
+return 1
+"""
+
+# Writes the field/value pairs in ARGV[2..] only while run ARGV[1] owns the job.
+SAVE_PROGRESS_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'run_id') ~= ARGV[1] then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+@dataclass(slots=True)
+class RegradeJob:
+    id: str
+    institution_id: UUID
+    assessment_id: UUID
+    requested_by: UUID | None
+    status: RegradeStatus = "queued"
+    total: int = 0
+    processed: int = 0
+    updated: int = 0
+    conflicts: int = 0
+    cursor: UUID | None = None
+    error: str | None = None
+    run_id: str | None = None
+
+    @property
+    def progress_pct(self) -> float:
+        return round(self.processed / self.total * 100, 2) if self.total else 100.0
+
+    def to_mapping(self) -> dict[str, str]:
+        return {name: "" if value is None else str(value) for name, value in asdict(self).items()}
+
+    @classmethod
+    def from_mapping(cls, data: dict[str, str]) -> RegradeJob:
+        return cls(
+            id=data["id"],
+            institution_id=UUID(data["institution_id"]),
+            assessment_id=UUID(data["assessment_id"]),
+            requested_by=UUID(data["requested_by"]) if data.get("requested_by") else None,
+            status=data["status"],
+            total=int(data["total"]),
+            processed=int(data["processed"]),
+            updated=int(data["updated"]),
+            conflicts=int(data["conflicts"]),
+            cursor=UUID(data["cursor"]) if data.get("cursor") else None,
+            error=data.get("error") or None,
+            run_id=data.get("run_id") or None,
+        )
+
+
+class RegradeJobStore:
+    """Progress and control state of bulk regrade jobs, shared by the API and Celery workers."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"regrade:job:{job_id}"
+
+    @staticmethod
+    def _redis() -> Redis:
+        return get_redis()
+
+    async def create(self, job: RegradeJob) -> None:
+        async with self._redis().pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job.id), mapping=job.to_mapping())
+            pipe.expire(self._key(job.id), self.ttl_seconds)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> RegradeJob | None:
+        data = await self._redis().hgetall(self._key(job_id))
+        return RegradeJob.from_mapping(data) if data else None
+
+    async def status(self, job_id: str) -> str | None:
+        return await self._redis().hget(self._key(job_id), "status")
+
+    async def run_status(self, job_id: str, run_id: str) -> str | None:
+        """The job's status while ``run_id`` owns it; None once another run has taken over."""
+        status, current = await self._redis().hmget(self._key(job_id), ["status", "run_id"])
+        return status if current == run_id else None
+
+    async def start_run(self, job_id: str) -> str | None:
+        """Move a queued job to running under a fresh run id, which is returned."""
+        run_id = uuid4().hex
+        script = self._redis().register_script(START_SCRIPT)
+        return run_id if await script(keys=[self._key(job_id)], args=[run_id]) else None
+
+    async def transition(
+        self, job_id: str, to: RegradeStatus, *, allowed: Iterable[RegradeStatus], run_id: str | None = None
+    ) -> bool:
+        script = self._redis().register_script(TRANSITION_SCRIPT)
+        return bool(await script(keys=[self._key(job_id)], args=[to, run_id or "", *allowed]))
+
+    async def save_progress(self, job: RegradeJob) -> bool:
+        # Status is left alone: it is only ever changed through ``transition``.
+        mapping = job.to_mapping()
+        args = [job.run_id or ""]
+        for name in ("processed", "updated", "conflicts", "cursor", "error"):
+            args.extend((name, mapping[name]))
+        script = self._redis().register_script(SAVE_PROGRESS_SCRIPT)
+        return bool(await script(keys=[self._key(job.id)], args=args))
+
+
+regrade_jobs = RegradeJobStore(ttl_seconds=settings.REGRADE_JOB_TTL_SECONDS)
+
+
+@dataclass(frozen=True, slots=True)
+class RegradeChunk:
+    last_result_id: UUID | None
+    processed: int
+    updated: int
+    # Rewritten result per user, for the follow-up work bulk updates do not trigger.
+    results: dict[UUID, UUID] = field(default_factory=dict)
+
+    @property
+    def conflicts(self) -> int:
+        return self.processed - self.updated
+
+
+class RegradeService:
+    """Recomputes every result of an assessment, a keyset-paginated chunk at a time.
+
+    Each chunk is a fixed number of statements whatever its size: the results and their
+    versions are read, the chunk's responses are re-scored in one batch against the
+    cached answer key grading uses, and the results are rewritten with ``version + 1``.
+    The rewrite only matches rows whose version is still the one read, so a result
+    overridden by hand in the meantime is left alone and counted as a conflict. The
+    skills linked to the assessment are then refreshed for the users whose results
+    were rewritten.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _results_of(assessment_id: UUID):
+        return (
+            select(
+                AssessmentResult.id,
+                AssessmentResult.institution_id,
+                AssessmentResult.attempt_id,
+                AssessmentResult.version,
+            )
+            .join(AssessmentAttempt, AssessmentAttempt.id == AssessmentResult.attempt_id)
+            .where(AssessmentAttempt.assessment_id == assessment_id, AssessmentResult.deleted_at.is_(None))
+        )
+
+    async def start(self, *, institution_id: UUID, assessment_id: UUID, requested_by: UUID | None) -> RegradeJob:
+        total_stmt = select(func.count()).select_from(self._results_of(assessment_id).subquery())
+        total = int((await self.db.execute(total_stmt)).scalar_one())
+        job = RegradeJob(
+            id=uuid4().hex,
+            institution_id=institution_id,
+            assessment_id=assessment_id,
+            requested_by=requested_by,
+            total=total,
+        )
+        await regrade_jobs.create(job)
+        return job
+
+    async def regrade_chunk(self, assessment_id: UUID, *, after: UUID | None, limit: int) -> RegradeChunk:
+        stmt = self._results_of(assessment_id).order_by(AssessmentResult.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(AssessmentResult.id > after)
+        rows = (await self.db.execute(stmt)).all()
+        if not rows:
+            return RegradeChunk(last_result_id=None, processed=0, updated=0)
+
+        key = await AnswerKeyService(self.db).get(assessment_id)
+        responses_stmt = select(
+            AssessmentResponse.id,
+            AssessmentResponse.question_id,
+            AssessmentResponse.selected_option_id,
+            AssessmentResponse.points_awarded,
+        ).where(AssessmentResponse.attempt_id.in_({row.attempt_id for row in rows}))
+        responses = (await self.db.execute(responses_stmt)).all()
+        awarded = key.award((response.question_id, response.selected_option_id) for response in responses)
+        changes = [
+            {"id": response.id, "points_awarded": points}
+            for response, points in zip(responses, awarded, strict=True)
+            if points != response.points_awarded
+        ]
+        if changes:
+            await self.db.execute(update(AssessmentResponse), changes)
+
+        earned = (
+            select(func.coalesce(func.sum(AssessmentResponse.points_awarded), 0.0))
+            .where(AssessmentResponse.attempt_id == AssessmentResult.attempt_id)
+            .scalar_subquery()
+        )
+        rewrite = (
+            update(AssessmentResult)
+            .where(tuple_(AssessmentResult.id, AssessmentResult.version).in_([(row.id, row.version) for row in rows]))
+            .values(
+                total_score=earned,
+                percentage=earned * (100.0 / key.possible) if key.possible else 0.0,
+                version=AssessmentResult.version + 1,
+            )
+            .returning(AssessmentResult.id, AssessmentResult.user_id)
+        )
+        updated = (await self.db.execute(rewrite, execution_options={"synchronize_session": False})).all()
+        results = {row.user_id: row.id for row in updated}
+        await SkillService(self.db).apply_results(rows[0].institution_id, assessment_id, results)
+        return RegradeChunk(last_result_id=rows[-1].id, processed=len(rows), updated=len(updated), results=results)
+
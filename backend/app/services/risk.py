@@ -1,12 +1,77 @@
 from __future__ import annotations
 
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+import numpy as np
+from redis.exceptions import RedisError
+from sqlalchemy import event, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.config import get_settings
+from app.core.after_commit import run_after_commit
+from app.core.redis import get_redis
 from app.models.academics import AssessmentAttempt, AssessmentResult
 from app.models.student_success import EngagementEvent, StudentRiskScore
+from app.services.dashboard import mark_dashboards_stale
+from app.utils.constants import RISK_THRESHOLD_HIGH, RISK_THRESHOLD_LOW, RISK_THRESHOLD_MEDIUM
+
+settings = get_settings()
+
+RISK_DIRTY_KEY = "risk:dirty"
+RISK_PROCESSING_KEY = "risk:dirty:processing"
+
+# Returns expired claims to the dirty set, then moves up to ARGV[1] dirty members into
+# the processing zset, scored by the claim time ARGV[2].
+CLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[2]) - tonumber(ARGV[3]))
+for _, member in ipairs(expired) do
+    redis.call('SADD', KEYS[1], member)
+    redis.call('ZREM', KEYS[2], member)
+end
+local members = redis.call('SPOP', KEYS[1], ARGV[1])
+for _, member in ipairs(members) do
+    redis.call('ZADD', KEYS[2], ARGV[2], member)
+end
+return members
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class RiskScores:
+    """Per-factor points, totals and levels of a population, aligned by index."""
+
+    factors: dict[str, np.ndarray]
+    scores: np.ndarray
+    levels: np.ndarray
+
+    def factors_of(self, index: int) -> dict[str, int]:
+        return {name: int(points[index]) for name, points in self.factors.items() if points[index]}
+
+
+def score_users(missed: np.ndarray, avg_score: np.ndarray, idle_days: np.ndarray) -> RiskScores:
+    """Vectorised form of the rules in ``RiskService.compute_risk``.
+
+    ``avg_score`` is NaN for users without recent results and ``idle_days`` is NaN for
+    users with no activity at all; both count against the user.
+    """
+    factors = {
+        "missed_deadlines": np.where(missed >= 2, missed * 30, 0),
+        "low_scores": np.where(np.nan_to_num(avg_score, nan=0.0) < 40, 40, 0),
+        "no_activity": np.where(np.isnan(idle_days) | (idle_days > 7), 25, 0),
+    }
+    scores = sum(factors.values(), np.zeros(len(missed), dtype=np.int64))
+    levels = np.select(
+        [scores >= RISK_THRESHOLD_HIGH, scores >= RISK_THRESHOLD_MEDIUM, scores >= RISK_THRESHOLD_LOW],
+        ["critical", "high", "medium"],
+        default="low",
+    )
+    return RiskScores(factors=factors, scores=scores, levels=levels)
 
 
 class RiskService:
@@ -68,10 +133,200 @@ class RiskService:
         await self.db.refresh(risk)
         return risk
 
-    async def compute_all_users(self, institution_id):
-        users_stmt = select(EngagementEvent.user_id).where(EngagementEvent.institution_id == institution_id).distinct()
-        user_ids = [row[0] for row in (await self.db.execute(users_stmt)).all()]
-        results = []
-        for user_id in user_ids:
-            results.append(await self.compute_risk(user_id=user_id, institution_id=institution_id))
-        return results
+    async def compute_all_users(self, institution_id: UUID) -> int:
+        """Score every user with engagement events in the institution; returns rows written."""
+        return await self._compute(institution_id, None)
+
+    async def compute_users(self, institution_id: UUID, user_ids: Iterable[UUID]) -> int:
+        """Score only ``user_ids``, such as the users whose inputs changed; returns rows written."""
+        return await self._compute(institution_id, list(user_ids))
+
+    async def _compute(self, institution_id: UUID, user_ids: list[UUID] | None) -> int:
+        """Score ``user_ids``, or everyone with engagement events when ``None``.
+
+        Three grouped queries fetch the factors of the whole population, the scoring is
+        done on NumPy arrays, and the rows go out as chunked multi-row inserts under a
+        single commit.
+        """
+        now = datetime.now(timezone.utc)
+        activity_stmt = (
+            select(EngagementEvent.user_id, func.max(EngagementEvent.occurred_at))
+            .where(EngagementEvent.institution_id == institution_id)
+            .group_by(EngagementEvent.user_id)
+        )
+        missed_stmt = (
+            select(AssessmentAttempt.user_id, func.count(AssessmentAttempt.id))
+            .where(
+                AssessmentAttempt.institution_id == institution_id,
+                AssessmentAttempt.status == "in_progress",
+                AssessmentAttempt.started_at >= now - timedelta(days=14),
+            )
+            .group_by(AssessmentAttempt.user_id)
+        )
+        result_stmt = (
+            select(AssessmentResult.user_id, func.avg(AssessmentResult.percentage))
+            .where(
+                AssessmentResult.institution_id == institution_id,
+                AssessmentResult.created_at >= now - timedelta(days=30),
+            )
+            .group_by(AssessmentResult.user_id)
+        )
+        if user_ids is not None:
+            if not user_ids:
+                return 0
+            activity_stmt = activity_stmt.where(EngagementEvent.user_id.in_(user_ids))
+            missed_stmt = missed_stmt.where(AssessmentAttempt.user_id.in_(user_ids))
+            result_stmt = result_stmt.where(AssessmentResult.user_id.in_(user_ids))
+
+        last_activity = dict((await self.db.execute(activity_stmt)).all())
+        if user_ids is None:
+            user_ids = list(last_activity)
+            if not user_ids:
+                return 0
+        missed = dict((await self.db.execute(missed_stmt)).all())
+        avg_scores = dict((await self.db.execute(result_stmt)).all())
+
+        risk = score_users(
+            missed=np.array([missed.get(user_id, 0) for user_id in user_ids], dtype=np.int64),
+            avg_score=np.array([avg_scores.get(user_id, np.nan) for user_id in user_ids], dtype=np.float64),
+            idle_days=np.array(
+                [
+                    (now - _as_utc(last_activity[user_id])).total_seconds() / 86400
+                    if user_id in last_activity
+                    else np.nan
+                    for user_id in user_ids
+                ],
+                dtype=np.float64,
+            ),
+        )
+        rows = [
+            {
+                "id": uuid4(),
+                "institution_id": institution_id,
+                "created_by": user_id,
+                "user_id": user_id,
+                "score": int(risk.scores[index]),
+                "level": str(risk.levels[index]),
+                "factors_json": risk.factors_of(index),
+                "computed_at": now,
+            }
+            for index, user_id in enumerate(user_ids)
+        ]
+        chunk_size = settings.RISK_INSERT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            await self.db.execute(insert(StudentRiskScore), rows[start : start + chunk_size])
+        mark_dashboards_stale(self.db, ((institution_id, user_id) for user_id in user_ids))
+        await self.db.commit()
+        return len(rows)
+
+    async def decayed_users(self, institution_id: UUID, *, lookback: timedelta) -> set[UUID]:
+        """Users whose score may have changed with time alone during the last ``lookback``.
+
+        These are the users whose last activity, oldest open attempt or a result crossed
+        the 7, 14 or 30 day window of its factor; nothing was written for them, so the
+        write hooks never marked them.
+        """
+        now = datetime.now(timezone.utc)
+        idle_since = now - timedelta(days=7)
+        idle_stmt = (
+            select(EngagementEvent.user_id)
+            .where(EngagementEvent.institution_id == institution_id)
+            .group_by(EngagementEvent.user_id)
+            .having(func.max(EngagementEvent.occurred_at).between(idle_since - lookback, idle_since))
+        )
+        missed_since = now - timedelta(days=14)
+        missed_stmt = select(AssessmentAttempt.user_id).where(
+            AssessmentAttempt.institution_id == institution_id,
+            AssessmentAttempt.status == "in_progress",
+            AssessmentAttempt.started_at.between(missed_since - lookback, missed_since),
+        )
+        results_since = now - timedelta(days=30)
+        result_stmt = select(AssessmentResult.user_id).where(
+            AssessmentResult.institution_id == institution_id,
+            AssessmentResult.created_at.between(results_since - lookback, results_since),
+        )
+        users: set[UUID] = set()
+        for stmt in (idle_stmt, missed_stmt.distinct(), result_stmt.distinct()):
+            users.update((await self.db.execute(stmt)).scalars())
+        return users
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class RiskDirtySet:
+    """Users whose risk inputs changed since they were last scored.
+
+    One Redis set of ``institution_id:user_id`` members, filled by the write hooks below
+    and drained in batches by the recompute task. Claimed members move to a processing
+    set until the worker acknowledges them after its commit; a claim left there longer
+    than the lease (the worker was killed or timed out) goes back to the dirty set on the
+    next claim. Marking is best effort: a user missed during a Redis outage is picked up
+    by their next write or a full ``compute_all_risk_scores``.
+    """
+
+    def __init__(self, lease_seconds: int):
+        self.lease_seconds = lease_seconds
+
+    async def mark(self, pairs: Iterable[tuple[UUID, UUID]]) -> None:
+        members = {f"{institution_id}:{user_id}" for institution_id, user_id in pairs}
+        if not members:
+            return
+        try:
+            await get_redis().sadd(RISK_DIRTY_KEY, *members)
+        except RedisError:
+            return
+
+    async def claim(self, count: int) -> dict[UUID, set[UUID]]:
+        script = get_redis().register_script(CLAIM_SCRIPT)
+        members = await script(
+            keys=[RISK_DIRTY_KEY, RISK_PROCESSING_KEY], args=[count, time.time(), self.lease_seconds]
+        )
+        grouped: dict[UUID, set[UUID]] = defaultdict(set)
+        for member in members:
+            institution_id, user_id = member.split(":")
+            grouped[UUID(institution_id)].add(UUID(user_id))
+        return grouped
+
+    async def acknowledge(self, institution_id: UUID, user_ids: Iterable[UUID]) -> None:
+        members = [f"{institution_id}:{user_id}" for user_id in user_ids]
+        if members:
+            await get_redis().zrem(RISK_PROCESSING_KEY, *members)
+
+    async def release(self, grouped: dict[UUID, set[UUID]]) -> None:
+        """Hand claimed members back to the dirty set, for a batch that failed."""
+        members = [
+            f"{institution_id}:{user_id}" for institution_id, user_ids in grouped.items() for user_id in user_ids
+        ]
+        if not members:
+            return
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.sadd(RISK_DIRTY_KEY, *members)
+            pipe.zrem(RISK_PROCESSING_KEY, *members)
+            await pipe.execute()
+
+
+risk_dirty = RiskDirtySet(lease_seconds=settings.RISK_DIRTY_LEASE_SECONDS)
+
+_RISK_INPUTS = (AssessmentAttempt, AssessmentResult, EngagementEvent)
+
+@event.listens_for(Session, "after_flush")
+def _on_risk_input_flush(session: Session, flush_context) -> None:
+    pending: set[tuple[UUID, UUID]] = session.info.setdefault("risk_dirty_users", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _RISK_INPUTS) and instance.user_id is not None:
+            pending.add((instance.institution_id, instance.user_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _on_risk_input_commit(session: Session) -> None:
+    pending = session.info.pop("risk_dirty_users", None)
+    if pending:
+        run_after_commit(session, risk_dirty.mark(pending))
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_risk_input_rollback(session: Session) -> None:
+    session.info.pop("risk_dirty_users", None)
@@ -1,71 +1,173 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from collections.abc import Mapping
+from uuid import UUID, uuid4
+
+from sqlalchemy import Select, and_, func, literal, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.academics import AssessmentQuestion, AssessmentResponse, SkillAssessmentLink, UserSkill
+from app.config import get_settings
+from app.database.upsert import insert_for
+from app.models.academics import (
+    AssessmentAttempt,
+    AssessmentQuestion,
+    AssessmentResponse,
+    SkillAssessmentLink,
+    UserSkill,
+)
+from app.models.iam import Role, RoleBinding, ScopeType, User
+from app.services.dashboard import mark_dashboards_stale
+
+settings = get_settings()
+
+
+def mastery_for(progress: float) -> str:
+    if progress >= 100:
+        return "master"
+    if progress >= 90:
+        return "proficient"
+    if progress >= 80:
+        return "novice"
+    return "beginner"
 
 
 class SkillService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def recalculate_user_skills(self, user_id, institution_id):
-        link_stmt = select(SkillAssessmentLink.skill_id).where(SkillAssessmentLink.institution_id == institution_id).distinct()
-        skill_ids = [row[0] for row in (await self.db.execute(link_stmt)).all()]
-        updated = []
+    async def recalculate_user_skills(self, user_id: UUID, institution_id: UUID) -> int:
+        """Recompute every skill of one user; returns the number of skill rows written."""
+        written = await self._recalculate(institution_id, select(literal(user_id).label("user_id")))
+        await self.db.commit()
+        return written
 
-        for skill_id in skill_ids:
-            total_stmt = (
-                select(func.sum(AssessmentQuestion.points))
-                .join(SkillAssessmentLink, SkillAssessmentLink.question_id == AssessmentQuestion.id)
-                .where(SkillAssessmentLink.skill_id == skill_id, AssessmentQuestion.institution_id == institution_id)
+    async def recalculate_course_skills(self, course_id: UUID, institution_id: UUID) -> int:
+        """Recompute every skill of the students enrolled in a course, in the same single pass."""
+        students = (
+            select(RoleBinding.user_id)
+            .join(Role, Role.id == RoleBinding.role_id)
+            .where(
+                RoleBinding.institution_id == institution_id,
+                RoleBinding.scope_type == ScopeType.COURSE.value,
+                RoleBinding.scope_id == course_id,
+                RoleBinding.active.is_(True),
+                Role.code == "student",
             )
-            total = float((await self.db.execute(total_stmt)).scalar_one() or 0)
+            .distinct()
+        )
+        written = await self._recalculate(institution_id, students)
+        await self.db.commit()
+        return written
 
-            earned_stmt = (
-                select(func.sum(AssessmentResponse.points_awarded))
-                .join(AssessmentQuestion, AssessmentQuestion.id == AssessmentResponse.question_id)
-                .join(SkillAssessmentLink, SkillAssessmentLink.question_id == AssessmentQuestion.id)
-                .where(
-                    SkillAssessmentLink.skill_id == skill_id,
-                    AssessmentResponse.institution_id == institution_id,
-                    AssessmentResponse.created_by == user_id,
-                )
-            )
-            earned = float((await self.db.execute(earned_stmt)).scalar_one() or 0)
+    async def apply_results(self, institution_id: UUID, assessment_id: UUID, results: Mapping[UUID, UUID]) -> int:
+        """Refresh the skills linked to ``assessment_id`` for the users just graded.
 
-            progress = (earned / total * 100) if total > 0 else 0
-            if progress >= 100:
-                mastery = "master"
-            elif progress >= 90:
-                mastery = "proficient"
-            elif progress >= 80:
-                mastery = "novice"
-            else:
-                mastery = "beginner"
+        ``results`` maps each user to the result that changed their scores; it is recorded
+        as ``updated_from_result_id``. Skills not linked to the assessment's questions are
+        left alone. Runs in the caller's transaction.
+        """
+        if not results:
+            return 0
+        users = select(User.id.label("user_id")).where(User.id.in_(list(results)))
+        skills = (
+            select(SkillAssessmentLink.skill_id)
+            .join(AssessmentQuestion, AssessmentQuestion.id == SkillAssessmentLink.question_id)
+            .where(AssessmentQuestion.assessment_id == assessment_id, SkillAssessmentLink.deleted_at.is_(None))
+        )
+        return await self._recalculate(institution_id, users, skills=skills, result_ids=results)
 
-            stmt = select(UserSkill).where(
-                UserSkill.user_id == user_id,
-                UserSkill.skill_id == skill_id,
-                UserSkill.institution_id == institution_id,
-            )
-            user_skill = (await self.db.execute(stmt)).scalar_one_or_none()
-            if user_skill is None:
-                user_skill = UserSkill(
-                    institution_id=institution_id,
-                    created_by=user_id,
-                    user_id=user_id,
-                    skill_id=skill_id,
-                    progress_pct=progress,
-                    mastery_level=mastery,
-                )
-                self.db.add(user_skill)
-            else:
-                user_skill.progress_pct = progress
-                user_skill.mastery_level = mastery
+    async def _recalculate(
+        self,
+        institution_id: UUID,
+        users: Select,
+        *,
+        skills: Select | None = None,
+        result_ids: Mapping[UUID, UUID] | None = None,
+    ) -> int:
+        """Read weighted points per (user, skill) in one query and upsert them on ``uq_user_skill``.
 
-            updated.append(user_skill)
+        Points are weighted by ``SkillAssessmentLink.weight``. A question answered in
+        several attempts counts once, with its best score, and soft-deleted questions count
+        on neither side, so progress stays within 100%.
+        ``skills`` narrows the pass to a subset of skill ids.
+        """
+        users = users.subquery()
+        links = select(SkillAssessmentLink).where(
+            SkillAssessmentLink.institution_id == institution_id, SkillAssessmentLink.deleted_at.is_(None)
+        )
+        if skills is not None:
+            links = links.where(SkillAssessmentLink.skill_id.in_(skills))
+        links = links.subquery()
+        totals = (
+            select(links.c.skill_id, func.sum(AssessmentQuestion.points * links.c.weight).label("possible"))
+            .join(AssessmentQuestion, AssessmentQuestion.id == links.c.question_id)
+            .where(AssessmentQuestion.deleted_at.is_(None))
+            .group_by(links.c.skill_id)
+            .subquery()
+        )
+        best = (
+            select(
+                AssessmentAttempt.user_id,
+                AssessmentResponse.question_id,
+                func.max(AssessmentResponse.points_awarded).label("points"),
+            )
+            .join(AssessmentAttempt, AssessmentAttempt.id == AssessmentResponse.attempt_id)
+            .join(AssessmentQuestion, AssessmentQuestion.id == AssessmentResponse.question_id)
+            .where(
+                AssessmentResponse.institution_id == institution_id,
+                AssessmentResponse.question_id.in_(select(links.c.question_id)),
+                AssessmentQuestion.deleted_at.is_(None),
+                AssessmentAttempt.user_id.in_(select(users.c.user_id)),
+            )
+            .group_by(AssessmentAttempt.user_id, AssessmentResponse.question_id)
+            .subquery()
+        )
+        earned = (
+            select(best.c.user_id, links.c.skill_id, func.sum(best.c.points * links.c.weight).label("earned"))
+            .join(links, links.c.question_id == best.c.question_id)
+            .group_by(best.c.user_id, links.c.skill_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                users.c.user_id,
+                totals.c.skill_id,
+                totals.c.possible,
+                func.coalesce(earned.c.earned, 0.0).label("earned"),
+            )
+            .select_from(users)
+            .join(totals, true())
+            .outerjoin(earned, and_(earned.c.user_id == users.c.user_id, earned.c.skill_id == totals.c.skill_id))
+        )
+        rows = []
+        for row in (await self.db.execute(stmt)).all():
+            progress = min(row.earned / row.possible * 100, 100.0) if row.possible else 0.0
+            rows.append(
+                {
+                    "id": uuid4(),
+                    "institution_id": institution_id,
+                    "created_by": row.user_id,
+                    "user_id": row.user_id,
+                    "skill_id": row.skill_id,
+                    "progress_pct": progress,
+                    "mastery_level": mastery_for(progress),
+                    "updated_from_result_id": result_ids.get(row.user_id) if result_ids else None,
+                }
+            )
 
-        await self.db.commit()
-        return updated
+        chunk_size = settings.SKILL_UPSERT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            insert_stmt = insert_for(self.db, UserSkill).values(rows[start : start + chunk_size])
+            updates = {
+                "progress_pct": insert_stmt.excluded.progress_pct,
+                "mastery_level": insert_stmt.excluded.mastery_level,
+                "updated_at": func.now(),
+            }
+            if result_ids:
+                updates["updated_from_result_id"] = insert_stmt.excluded.updated_from_result_id
+            insert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=["institution_id", "user_id", "skill_id"], set_=updates
+            )
+            await self.db.execute(insert_stmt)
+        mark_dashboards_stale(self.db, {(institution_id, row["user_id"]) for row in rows})
+        return len(rows)
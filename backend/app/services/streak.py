@@ -1,12 +1,49 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
+from dataclasses import dataclass, replace
+from datetime import date
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.student_success import AcademicStreak
 
+DAILY_ACTIVITY_STREAK = "daily_activity"
+
+
+@dataclass(frozen=True, slots=True)
+class StreakState:
+    current_length: int = 0
+    longest_length: int = 0
+    last_activity_date: date | None = None
+    freeze_used: bool = False
+
+
+def advance_streak(state: StreakState, activity_date: date) -> StreakState:
+    """The streak after activity on ``activity_date``.
+
+    Consecutive days extend the streak. A single missed day is bridged by the streak's
+    one freeze; any longer gap starts a new streak with the freeze available again.
+    Activity on or before the last recorded day changes nothing, so replays are safe.
+    """
+    last = state.last_activity_date
+    if last is not None and activity_date <= last:
+        return state
+    gap = (activity_date - last).days if last is not None else None
+    if gap == 1:
+        current, freeze_used = state.current_length + 1, state.freeze_used
+    elif gap == 2 and not state.freeze_used:
+        current, freeze_used = state.current_length + 1, True
+    else:
+        current, freeze_used = 1, False
+    return replace(
+        state,
+        current_length=current,
+        longest_length=max(state.longest_length, current),
+        last_activity_date=activity_date,
+        freeze_used=freeze_used,
+    )
+
 
 class StreakService:
     def __init__(self, db: AsyncSession):
@@ -26,20 +63,24 @@ class StreakService:
                 created_by=user_id,
                 user_id=user_id,
                 streak_type=streak_type,
-                current_length=1,
-                longest_length=1,
-                last_activity_date=today,
             )
             self.db.add(streak)
+            state = StreakState()
         else:
-            if streak.last_activity_date == today:
+            state = StreakState(
+                current_length=streak.current_length,
+                longest_length=streak.longest_length,
+                last_activity_date=streak.last_activity_date,
+                freeze_used=streak.freeze_used,
+            )
+            if state.last_activity_date is not None and today <= state.last_activity_date:
                 return streak
-            if streak.last_activity_date == today - timedelta(days=1):
-                streak.current_length += 1
-            else:
-                streak.current_length = 1
-            streak.longest_length = max(streak.longest_length, streak.current_length)
-            streak.last_activity_date = today
+
+        state = advance_streak(state, today)
+        streak.current_length = state.current_length
+        streak.longest_length = state.longest_length
+        streak.last_activity_date = state.last_activity_date
+        streak.freeze_used = state.freeze_used
 
         await self.db.commit()
         await self.db.refresh(streak)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from uuid import UUID, uuid4
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.upsert import insert_for
+from app.models.academics import AssessmentResponse
+from app.schemas.submission import AssessmentResponseCreate
+
+
+class SubmissionService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def upsert_responses(
+        self,
+        *,
+        institution_id: UUID,
+        user_id: UUID,
+        attempt_id: UUID,
+        responses: Sequence[AssessmentResponseCreate],
+    ) -> int:
+        """Save answers in one INSERT .. ON CONFLICT (attempt_id, question_id) DO UPDATE.
+
+        A repeated save of a question overwrites the earlier answer; within one batch the
+        last answer per question wins, since a row may only be updated once per statement.
+        """
+        latest = {response.question_id: response for response in responses}
+        if not latest:
+            return 0
+
+        stmt = insert_for(self.db, AssessmentResponse).values(
+            [
+                {
+                    "id": uuid4(),
+                    "institution_id": institution_id,
+                    "created_by": user_id,
+                    "attempt_id": attempt_id,
+                    "question_id": response.question_id,
+                    "selected_option_id": response.selected_option_id,
+                    "answer_text": response.answer_text,
+                    "points_awarded": 0.0,
+                }
+                for response in latest.values()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["attempt_id", "question_id"],
+            set_={
+                "selected_option_id": stmt.excluded.selected_option_id,
+                "answer_text": stmt.excluded.answer_text,
+                "updated_by": user_id,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt)
+        return len(latest)
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
+from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database.session import set_tenant_context
 from app.models.academics import AssessmentAttempt
 from app.models.offline import OfflineOutbox, SyncConflict
-from app.schemas.sync import SyncActionEnvelope, SyncBatchResult
-from app.services.receipt import ReceiptService
-from app.utils.idempotency import check_idempotency, store_idempotency
+from app.schemas.sync import SyncActionEnvelope, SyncBatchResult, SyncStreamError
+from app.services.receipt import ReceiptDraft, ReceiptService
+from app.utils.idempotency import check_idempotency_many, store_idempotency_many
+
+SUBMIT_ATTEMPT = ("assessment_attempt", "submit")
 
 
 class SyncService:
@@ -25,30 +30,135 @@ class SyncService:
         user_id: UUID,
         actions: list[SyncActionEnvelope],
     ) -> list[SyncBatchResult]:
-        results: list[SyncBatchResult] = []
-
+        cached = await check_idempotency_many([action.idempotency_key for action in actions])
+        pending: dict[str, SyncActionEnvelope] = {}
         for action in actions:
-            cached = await check_idempotency(action.idempotency_key)
-            if cached is not None:
-                results.append(SyncBatchResult(**cached))
-                continue
-
-            result = await self._process_action(
-                institution_id=institution_id,
-                user_id=user_id,
-                action=action,
-            )
-            results.append(result)
-            await store_idempotency(action.idempotency_key, result.model_dump())
+            if action.idempotency_key not in cached:
+                pending.setdefault(action.idempotency_key, action)
 
+        processed = await self.apply_actions(
+            institution_id=institution_id,
+            user_id=user_id,
+            actions=list(pending.values()),
+        )
         await self.db.commit()
+        # Only remember results once they are committed, so a failed batch can be replayed.
+        await store_idempotency_many({key: result.model_dump(mode="json") for key, result in processed.items()})
+
+        return [
+            SyncBatchResult(**cached[action.idempotency_key])
+            if action.idempotency_key in cached
+            else processed[action.idempotency_key]
+            for action in actions
+        ]
+
+    async def process_stream(
+        self,
+        *,
+        institution_id: UUID,
+        user_id: UUID,
+        body: AsyncIterator[bytes],
+        chunk_size: int,
+        max_line_bytes: int,
+    ) -> AsyncIterator[SyncBatchResult | SyncStreamError]:
+        """Apply newline-delimited ``SyncActionEnvelope`` records in committed chunks.
+
+        Results are yielded only once their chunk has committed, so the last result a client
+        received is a safe point to resume from. A malformed line ends the stream with a
+        ``SyncStreamError`` after every action before it has been applied.
+        """
+        chunk: list[SyncActionEnvelope] = []
+        error: SyncStreamError | None = None
+        try:
+            async for line_number, line in _ndjson_lines(body, max_line_bytes):
+                chunk.append(_parse_envelope(line_number, line))
+                if len(chunk) >= chunk_size:
+                    for result in await self._process_chunk(institution_id, user_id, chunk):
+                        yield result
+                    chunk = []
+        except _MalformedLine as exc:
+            error = SyncStreamError(line=exc.line, error=exc.reason)
+
+        if chunk:
+            for result in await self._process_chunk(institution_id, user_id, chunk):
+                yield result
+        if error is not None:
+            yield error
+
+    async def _process_chunk(
+        self, institution_id: UUID, user_id: UUID, chunk: list[SyncActionEnvelope]
+    ) -> list[SyncBatchResult]:
+        # Each chunk commits, and the tenant setting only lives as long as a transaction.
+        await set_tenant_context(self.db, str(institution_id))
+        return await self.process_batch(institution_id=institution_id, user_id=user_id, actions=chunk)
+
+    async def apply_actions(
+        self,
+        *,
+        institution_id: UUID,
+        user_id: UUID,
+        actions: list[SyncActionEnvelope],
+    ) -> dict[str, SyncBatchResult]:
+        """Apply actions with a fixed number of statements, returning results by idempotency key.
+
+        Rows referenced by each (entity_type, action) group are loaded with one query per
+        group, the actions are then replayed in submission order against those rows, and
+        outbox rows, conflicts and the receipt chain segment are written in a single flush.
+        """
+        attempts = await self._load_attempts(institution_id, actions)
+        now = datetime.now(timezone.utc)
+        results: dict[str, SyncBatchResult] = {}
+        receipt_results: list[SyncBatchResult] = []
+        drafts: list[ReceiptDraft] = []
+        rows: list[OfflineOutbox | SyncConflict] = []
+
+        for action in actions:
+            if (action.entity_type, action.action) == SUBMIT_ATTEMPT:
+                result, draft = self._plan_assessment_submit(institution_id, user_id, action, attempts, rows, now)
+            else:
+                result, draft = self._plan_outbox(institution_id, user_id, action, rows, now)
+            results[action.idempotency_key] = result
+            if draft is not None:
+                receipt_results.append(result)
+                drafts.append(draft)
+
+        self.db.add_all(rows)
+        receipts = await self.receipt_service.generate_receipt_chain(
+            institution_id=institution_id,
+            user_id=user_id,
+            drafts=drafts,
+        )
+        for result, receipt in zip(receipt_results, receipts, strict=True):
+            result.receipt_code = receipt.receipt_code
         return results
 
-    async def _process_action(self, *, institution_id: UUID, user_id: UUID, action: SyncActionEnvelope) -> SyncBatchResult:
-        if action.entity_type == "assessment_attempt" and action.action == "submit":
-            return await self._handle_assessment_submit(institution_id, user_id, action)
+    async def _load_attempts(
+        self, institution_id: UUID, actions: list[SyncActionEnvelope]
+    ) -> dict[UUID, AssessmentAttempt]:
+        attempt_ids = {
+            attempt_id
+            for action in actions
+            if (action.entity_type, action.action) == SUBMIT_ATTEMPT
+            and (attempt_id := _parse_uuid(action.payload.get("attempt_id"))) is not None
+        }
+        if not attempt_ids:
+            return {}
+        stmt = select(AssessmentAttempt).where(
+            AssessmentAttempt.id.in_(attempt_ids),
+            AssessmentAttempt.institution_id == institution_id,
+        )
+        return {attempt.id: attempt for attempt in (await self.db.execute(stmt)).scalars().all()}
 
+    def _plan_outbox(
+        self,
+        institution_id: UUID,
+        user_id: UUID,
+        action: SyncActionEnvelope,
+        rows: list[OfflineOutbox | SyncConflict],
+        now: datetime,
+    ) -> tuple[SyncBatchResult, ReceiptDraft]:
         outbox = OfflineOutbox(
+            id=uuid4(),
             institution_id=institution_id,
             created_by=user_id,
             aggregate_id=uuid4(),
@@ -56,45 +166,37 @@ class SyncService:
             payload=action.payload,
             idempotency_key=action.idempotency_key,
             status="processed",
-            processed_at=datetime.now(timezone.utc),
+            processed_at=now,
         )
-        self.db.add(outbox)
-        await self.db.flush()
-
-        receipt = await self.receipt_service.generate_receipt(
-            institution_id=institution_id,
-            user_id=user_id,
+        rows.append(outbox)
+        draft = ReceiptDraft(
             entity_id=outbox.id,
             entity_type=action.entity_type,
             action=action.action,
             payload=action.payload,
         )
-        return SyncBatchResult(
-            id=action.id,
-            success=True,
-            receipt_code=receipt.receipt_code,
-            server_entity_id=outbox.id,
-        )
+        return SyncBatchResult(id=action.id, success=True, server_entity_id=outbox.id), draft
 
-    async def _handle_assessment_submit(
+    def _plan_assessment_submit(
         self,
         institution_id: UUID,
         user_id: UUID,
         action: SyncActionEnvelope,
-    ) -> SyncBatchResult:
+        attempts: dict[UUID, AssessmentAttempt],
+        rows: list[OfflineOutbox | SyncConflict],
+        now: datetime,
+    ) -> tuple[SyncBatchResult, ReceiptDraft | None]:
         attempt_id_raw = action.payload.get("attempt_id")
         if not isinstance(attempt_id_raw, str):
-            return SyncBatchResult(id=action.id, success=False, error="attempt_id missing")
-
-        attempt_id = UUID(attempt_id_raw)
-        attempt_stmt = select(AssessmentAttempt).where(
-            AssessmentAttempt.id == attempt_id,
-            AssessmentAttempt.institution_id == institution_id,
-        )
-        attempt = (await self.db.execute(attempt_stmt)).scalar_one_or_none()
+            return SyncBatchResult(id=action.id, success=False, error="attempt_id missing"), None
+        attempt_id = _parse_uuid(attempt_id_raw)
+        if attempt_id is None:
+            return SyncBatchResult(id=action.id, success=False, error="attempt_id invalid"), None
 
+        attempt = attempts.get(attempt_id)
         if attempt is None:
             conflict = SyncConflict(
+                id=uuid4(),
                 institution_id=institution_id,
                 created_by=user_id,
                 outbox_id=uuid4(),
@@ -103,17 +205,18 @@ class SyncService:
                 local_payload=action.payload,
                 server_payload={"error": "attempt_not_found"},
             )
-            self.db.add(conflict)
-            await self.db.flush()
-            return SyncBatchResult(
+            rows.append(conflict)
+            result = SyncBatchResult(
                 id=action.id,
                 success=False,
                 conflict={"type": "not_found", "conflict_id": str(conflict.id)},
                 error="attempt not found",
             )
+            return result, None
 
         if attempt.server_received_at and attempt.server_received_at > action.client_created_at:
             conflict = SyncConflict(
+                id=uuid4(),
                 institution_id=institution_id,
                 created_by=user_id,
                 outbox_id=uuid4(),
@@ -122,9 +225,8 @@ class SyncService:
                 local_payload=action.payload,
                 server_payload={"attempt_id": str(attempt.id), "server_received_at": attempt.server_received_at.isoformat()},
             )
-            self.db.add(conflict)
-            await self.db.flush()
-            return SyncBatchResult(
+            rows.append(conflict)
+            result = SyncBatchResult(
                 id=action.id,
                 success=False,
                 conflict={
@@ -134,20 +236,19 @@ class SyncService:
                 },
                 error="conflict detected",
             )
+            return result, None
 
         attempt.status = "submitted"
-        attempt.submitted_at = datetime.now(timezone.utc)
-        attempt.server_received_at = datetime.now(timezone.utc)
+        attempt.submitted_at = now
+        attempt.server_received_at = now
 
-        receipt = await self.receipt_service.generate_receipt(
-            institution_id=institution_id,
-            user_id=user_id,
+        draft = ReceiptDraft(
             entity_id=attempt.id,
             entity_type="assessment_attempt",
             action="submit",
             payload=action.payload,
         )
-        return SyncBatchResult(id=action.id, success=True, receipt_code=receipt.receipt_code, server_entity_id=attempt.id)
+        return SyncBatchResult(id=action.id, success=True, server_entity_id=attempt.id), draft
 
     async def resolve_conflict(self, conflict_id: UUID, resolver_id: UUID, strategy: str) -> SyncConflict | None:
         stmt = select(SyncConflict).where(SyncConflict.id == conflict_id)
@@ -161,3 +262,46 @@ class SyncService:
         await self.db.commit()
         await self.db.refresh(conflict)
         return conflict
+
+
+def _parse_uuid(value: object) -> UUID | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+
+class _MalformedLine(Exception):
+    def __init__(self, line: int, reason: str):
+        super().__init__(f"line {line}: {reason}")
+        self.line = line
+        self.reason = reason
+
+
+async def _ndjson_lines(body: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[tuple[int, bytes]]:
+    """Split a byte stream into numbered non-empty lines holding at most one partial line in memory."""
+    buffer = bytearray()
+    line_number = 0
+    async for data in body:
+        buffer.extend(data)
+        while (newline := buffer.find(b"\n")) >= 0:
+            line_number += 1
+            line = bytes(buffer[:newline])
+            del buffer[: newline + 1]
+            if len(line) > max_line_bytes:
+                raise _MalformedLine(line_number, "line too long")
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > max_line_bytes:
+            raise _MalformedLine(line_number + 1, "line too long")
+    if buffer.strip():
+        yield line_number + 1, bytes(buffer)
+
+
+def _parse_envelope(line_number: int, line: bytes) -> SyncActionEnvelope:
+    try:
+        return SyncActionEnvelope.model_validate_json(line)
+    except ValidationError as exc:
+        raise _MalformedLine(line_number, f"invalid action: {exc.errors()[0]['msg']}") from exc
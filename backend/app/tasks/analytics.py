@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-import asyncio
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
 from sqlalchemy import delete, func, select
 
 from app.database.session import AsyncSessionFactory
 from app.models.analytics import AnalyticsRollup
+from app.models.iam import Institution
 from app.models.student_success import EngagementEvent
-from app.tasks.celery_app import celery_app
+from app.services.achievements import AchievementService
+from app.tasks.celery_app import celery_app, run_async
 
 
 @celery_app.task(name="app.tasks.analytics.process_engagement_batch")
@@ -42,4 +43,23 @@ def process_engagement_batch() -> dict:
             await db.commit()
             return {"rollups": inserted}
 
-    return asyncio.run(_run())
+    return run_async(_run())
+
+
+@celery_app.task(name="app.tasks.analytics.process_daily_achievements")
+def process_daily_achievements(day: str | None = None) -> dict:
+    """Advance streaks and award activity badges from ``day``'s events (default: yesterday, UTC)."""
+
+    async def _run() -> dict:
+        target = date.fromisoformat(day) if day else datetime.now(timezone.utc).date() - timedelta(days=1)
+        users = badges = 0
+        async with AsyncSessionFactory() as db:
+            institution_ids = (await db.execute(select(Institution.id))).scalars().all()
+            service = AchievementService(db)
+            for institution_id in institution_ids:
+                counts = await service.process_day(institution_id, target)
+                users += counts["users"]
+                badges += counts["badges_awarded"]
+        return {"day": target.isoformat(), "users": users, "badges_awarded": badges}
+
+    return run_async(_run())
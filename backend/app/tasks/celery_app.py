@@ -1,10 +1,20 @@
+import asyncio
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 
 from app.config import get_settings
+from app.core.after_commit import drain_after_commit
+from app.core.redis import close_redis
+from app.services.email import close_smtp_pool
 
 settings = get_settings()
 
+T = TypeVar("T")
+
 celery_app = Celery(
     "udsm_lms",
     broker=settings.REDIS_URL,
@@ -16,17 +26,76 @@ celery_app = Celery(
         "app.tasks.risk",
         "app.tasks.course_pack",
         "app.tasks.backup",
+        "app.tasks.receipts",
+        "app.tasks.submissions",
     ],
 )
 
 celery_app.conf.beat_schedule = {
-    "daily-risk-scoring": {
-        "task": "app.tasks.risk.compute_all_risk_scores",
+    "daily-risk-decay-sweep": {
+        "task": "app.tasks.risk.sweep_risk_decay",
         "schedule": crontab(hour=3, minute=0),
     },
+    "risk-dirty-recompute": {
+        "task": "app.tasks.risk.recompute_dirty_risk_scores",
+        "schedule": float(settings.RISK_RECOMPUTE_INTERVAL_SECONDS),
+    },
+    "nightly-receipt-checkpoints": {
+        "task": "app.tasks.receipts.build_receipt_checkpoints",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "autosave-flush": {
+        "task": "app.tasks.submissions.flush_autosaves",
+        "schedule": float(settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS),
+    },
+    "nightly-streaks-and-badges": {
+        "task": "app.tasks.analytics.process_daily_achievements",
+        "schedule": crontab(hour=3, minute=15),
+    },
     "hourly-notification-digest": {
         "task": "app.tasks.notifications.process_digest",
         "schedule": crontab(minute=0),
     },
 }
 celery_app.conf.timezone = "Africa/Dar_es_Salaam"
+
+
+# One event loop per worker process, so the loop-bound Redis and SMTP pools stay open
+# across tasks instead of reconnecting for every one.
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a task body on the worker process's event loop.
+
+    Side effects still pending from the body's commits are finished before it returns, so
+    they never outlive the task that scheduled them.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+
+    async def _main() -> T:
+        try:
+            return await coro
+        finally:
+            await drain_after_commit()
+
+    return _loop.run_until_complete(_main())
+
+
+@worker_process_shutdown.connect
+def close_worker_loop(**_) -> None:
+    global _loop
+    loop, _loop = _loop, None
+    if loop is None or loop.is_closed():
+        return
+
+    async def _close() -> None:
+        await close_smtp_pool()
+        await close_redis()
+
+    try:
+        loop.run_until_complete(_close())
+    finally:
+        loop.close()
@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-import asyncio
 from uuid import UUID
 
 from app.database.session import AsyncSessionFactory
 from app.services.course_pack import CoursePackService
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import celery_app, run_async
 
 
 @celery_app.task(name="app.tasks.course_pack.generate_offline_pack")
@@ -15,4 +14,4 @@ def generate_offline_pack(course_id: str, institution_id: str, actor_id: str) ->
             pack = await CoursePackService(db).generate_course_pack(UUID(institution_id), UUID(actor_id), UUID(course_id))
             return {"pack_id": str(pack.id), "manifest_hash": pack.manifest_hash}
 
-    return asyncio.run(_run())
+    return run_async(_run())
@@ -1,20 +1,74 @@
 from __future__ import annotations
 
-import asyncio
 from uuid import UUID
 
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.database.session import AsyncSessionFactory
+from app.config import get_settings
+from app.database.session import AsyncSessionFactory, set_tenant_context
+from app.services.answer_key import invalidate_answer_keys
 from app.services.grading import GradingService
-from app.tasks.celery_app import celery_app
+from app.services.regrade import RegradeService, regrade_jobs
+from app.services.risk import risk_dirty
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
 
 
 @celery_app.task(name="app.tasks.grading.grade_assessment")
 def grade_assessment(attempt_id: str) -> dict:
     async def _run() -> dict:
-        async with AsyncSessionFactory() as db:  # type: AsyncSession
+        async with AsyncSessionFactory() as db:
             result = await GradingService(db).grade_attempt(UUID(attempt_id))
             return {"result_id": str(result.id), "score": result.total_score, "percentage": result.percentage}
 
-    return asyncio.run(_run())
+    return run_async(_run())
+
+
+@celery_app.task(name="app.tasks.grading.regrade_assessment")
+def regrade_assessment(job_id: str) -> dict:
+    """Run (or resume) a bulk regrade job, committing and reporting after every chunk.
+
+    Pausing flips the job's status in Redis; the loop stops before its next chunk and a
+    resume enqueues this task again, which continues from the stored cursor. Each run
+    owns the job through its run id, so a run still inside a chunk when a quick resume
+    starts the next one stops at its next check instead of carrying on beside it.
+    """
+
+    async def _run() -> dict:
+        run_id = await regrade_jobs.start_run(job_id)
+        if run_id is None:
+            return {"job_id": job_id, "status": await regrade_jobs.status(job_id)}
+        job = await regrade_jobs.get(job_id)
+        await invalidate_answer_keys([job.assessment_id])
+
+        async with AsyncSessionFactory() as db:
+            service = RegradeService(db)
+            try:
+                while True:
+                    status = await regrade_jobs.run_status(job_id, run_id)
+                    if status != "running":
+                        return {"job_id": job_id, "status": status or "superseded", "processed": job.processed}
+                    await set_tenant_context(db, str(job.institution_id))
+                    chunk = await service.regrade_chunk(
+                        job.assessment_id, after=job.cursor, limit=settings.REGRADE_CHUNK_SIZE
+                    )
+                    await db.commit()
+                    if chunk.last_result_id is None:
+                        break
+                    # Bulk updates bypass the session hooks that mark risk inputs as changed.
+                    await risk_dirty.mark((job.institution_id, user_id) for user_id in chunk.results)
+                    job.cursor = chunk.last_result_id
+                    job.processed += chunk.processed
+                    job.updated += chunk.updated
+                    job.conflicts += chunk.conflicts
+                    await regrade_jobs.save_progress(job)
+            except Exception as exc:
+                await db.rollback()
+                job.error = str(exc)
+                await regrade_jobs.save_progress(job)
+                await regrade_jobs.transition(job_id, "failed", allowed=("running", "paused"), run_id=run_id)
+                raise
+
+        await regrade_jobs.transition(job_id, "completed", allowed=("running", "paused"), run_id=run_id)
+        return {"job_id": job_id, "status": "completed", "processed": job.processed, "updated": job.updated}
+
+    return run_async(_run())
@@ -1,42 +1,73 @@
 from __future__ import annotations
 
-import asyncio
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
 
+from app.config import get_settings
 from app.database.session import AsyncSessionFactory
 from app.models.communication import Notification
 from app.services.notification import NotificationService
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
 
 
 @celery_app.task(name="app.tasks.notifications.send_notification")
 def send_notification(notification_id: str) -> dict:
     async def _run() -> dict:
-        async with AsyncSessionFactory() as db:  # type: AsyncSession
+        async with AsyncSessionFactory() as db:
             stmt = select(Notification).where(Notification.id == UUID(notification_id))
             notification = (await db.execute(stmt)).scalar_one_or_none()
             if notification is None:
                 return {"status": "not_found"}
             deliveries = await NotificationService(db).deliver_notification(notification)
-            return {"status": "sent", "deliveries": len(deliveries)}
+            return {"status": "sent", "deliveries": deliveries}
 
-    return asyncio.run(_run())
+    return run_async(_run())
 
 
 @celery_app.task(name="app.tasks.notifications.process_digest")
 def process_digest() -> dict:
+    """Drain the queue in batches of ``NOTIFICATION_DIGEST_BATCH_SIZE``.
+
+    Each batch is claimed by marking it ``sending`` under a short locking transaction, so
+    no row locks are held while the providers are called. Rows left ``sending`` by a run
+    that died are queued again once ``NOTIFICATION_SENDING_TIMEOUT_SECONDS`` has passed.
+    """
+
     async def _run() -> dict:
         async with AsyncSessionFactory() as db:
-            stmt = select(Notification).where(Notification.status == "queued").limit(100)
-            notifications = (await db.execute(stmt)).scalars().all()
             service = NotificationService(db)
-            count = 0
-            for notification in notifications:
-                await service.deliver_notification(notification)
-                count += 1
-            return {"processed": count}
+            processed = deliveries = 0
+            stale = datetime.now(timezone.utc) - timedelta(seconds=settings.NOTIFICATION_SENDING_TIMEOUT_SECONDS)
+            await db.execute(
+                update(Notification)
+                .where(Notification.status == "sending", Notification.updated_at < stale)
+                .values(status="queued")
+            )
+            await db.commit()
+            while True:
+                # Locked rows are skipped, so overlapping digest runs split the queue between them.
+                stmt = (
+                    select(Notification)
+                    .where(Notification.status == "queued")
+                    .order_by(Notification.created_at)
+                    .limit(settings.NOTIFICATION_DIGEST_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )
+                notifications = (await db.execute(stmt)).scalars().all()
+                if not notifications:
+                    break
+                await db.execute(
+                    update(Notification)
+                    .where(Notification.id.in_([notification.id for notification in notifications]))
+                    .values(status="sending")
+                )
+                await db.commit()
+                deliveries += await service.deliver_many(notifications)
+                processed += len(notifications)
+            return {"processed": processed, "deliveries": deliveries}
 
-    return asyncio.run(_run())
+    return run_async(_run())
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database.session import AsyncSessionFactory, set_tenant_context
+from app.models.receipts import Receipt
+from app.schemas.receipt import ReceiptChainVerificationRead
+from app.services.receipt_checkpoint import ReceiptCheckpointService
+from app.services.receipt_verification import ReceiptChainVerifier
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
+
+
+@celery_app.task(name="app.tasks.receipts.verify_receipt_chains")
+def verify_receipt_chains(institution_id: str, user_id: str | None = None, course_id: str | None = None) -> dict:
+    async def _run() -> dict:
+        async with AsyncSessionFactory() as db:
+            await set_tenant_context(db, institution_id)
+            verifier = ReceiptChainVerifier(
+                db, batch_size=settings.RECEIPT_VERIFY_BATCH_SIZE, workers=settings.RECEIPT_VERIFY_WORKERS
+            )
+            if user_id is not None:
+                report = await verifier.verify_user(UUID(institution_id), UUID(user_id))
+            elif course_id is not None:
+                report = await verifier.verify_course(UUID(institution_id), UUID(course_id))
+            else:
+                report = await verifier.verify_institution(UUID(institution_id))
+            return ReceiptChainVerificationRead.model_validate(report).model_dump(mode="json")
+
+    return run_async(_run())
+
+
+@celery_app.task(name="app.tasks.receipts.build_receipt_checkpoints")
+def build_receipt_checkpoints(day: str | None = None) -> dict:
+    """Checkpoint every institution's receipts for ``day`` (default: yesterday, UTC)."""
+
+    async def _run() -> dict:
+        target = date.fromisoformat(day) if day else datetime.now(timezone.utc).date() - timedelta(days=1)
+        start = datetime.combine(target, datetime.min.time(), tzinfo=timezone.utc)
+        built = 0
+        async with AsyncSessionFactory() as db:
+            stmt = (
+                select(Receipt.institution_id)
+                .where(Receipt.timestamp >= start, Receipt.timestamp < start + timedelta(days=1))
+                .distinct()
+            )
+            institution_ids = (await db.execute(stmt)).scalars().all()
+            for institution_id in institution_ids:
+                await set_tenant_context(db, str(institution_id))
+                if await ReceiptCheckpointService(db).build_checkpoint(institution_id, target) is not None:
+                    built += 1
+                await db.commit()
+        return {"day": target.isoformat(), "checkpoints": built}
+
+    return run_async(_run())
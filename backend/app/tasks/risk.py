@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-import asyncio
+from datetime import timedelta
 from uuid import UUID
 
 from sqlalchemy import select
 
-from app.database.session import AsyncSessionFactory
+from app.config import get_settings
+from app.database.session import AsyncSessionFactory, set_tenant_context
 from app.models.iam import Institution
-from app.services.risk import RiskService
-from app.tasks.celery_app import celery_app
+from app.services.risk import RiskService, risk_dirty
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
 
 
 @celery_app.task(name="app.tasks.risk.compute_all_risk_scores")
@@ -19,8 +22,53 @@ def compute_all_risk_scores() -> dict:
             total = 0
             service = RiskService(db)
             for institution_id in institutions:
-                scores = await service.compute_all_users(UUID(str(institution_id)))
-                total += len(scores)
+                total += await service.compute_all_users(UUID(str(institution_id)))
             return {"scores_computed": total}
 
-    return asyncio.run(_run())
+    return run_async(_run())
+
+
+@celery_app.task(name="app.tasks.risk.recompute_dirty_risk_scores")
+def recompute_dirty_risk_scores() -> dict:
+    """Rescore a batch of users whose attempts, results or activity changed."""
+
+    async def _run() -> dict:
+        dirty = await risk_dirty.claim(settings.RISK_RECOMPUTE_BATCH_SIZE)
+        total = 0
+        async with AsyncSessionFactory() as db:
+            service = RiskService(db)
+            while dirty:
+                institution_id, user_ids = next(iter(dirty.items()))
+                try:
+                    await set_tenant_context(db, str(institution_id))
+                    total += await service.compute_users(institution_id, user_ids)
+                except Exception:
+                    await db.rollback()
+                    await risk_dirty.release(dirty)
+                    raise
+                # Acknowledged only once the scores are committed.
+                await risk_dirty.acknowledge(institution_id, user_ids)
+                del dirty[institution_id]
+        return {"scores_computed": total}
+
+    return run_async(_run())
+
+
+@celery_app.task(name="app.tasks.risk.sweep_risk_decay")
+def sweep_risk_decay() -> dict:
+    """Mark users whose factors expired by age alone, for the next recompute."""
+
+    async def _run() -> dict:
+        lookback = timedelta(hours=settings.RISK_DECAY_LOOKBACK_HOURS)
+        marked = 0
+        async with AsyncSessionFactory() as db:
+            institutions = (await db.execute(select(Institution.id))).scalars().all()
+            service = RiskService(db)
+            for institution_id in institutions:
+                await set_tenant_context(db, str(institution_id))
+                user_ids = await service.decayed_users(institution_id, lookback=lookback)
+                await risk_dirty.mark((institution_id, user_id) for user_id in user_ids)
+                marked += len(user_ids)
+        return {"users_marked": marked}
+
+    return run_async(_run())
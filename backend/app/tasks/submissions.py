@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from app.config import get_settings
+from app.database.session import AsyncSessionFactory
+from app.services.autosave import AutosaveService
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
+
+
+@celery_app.task(name="app.tasks.submissions.flush_autosaves")
+def flush_autosaves() -> dict:
+    """Write buffered answer drafts to the database in bulk upserts."""
+
+    async def _run() -> dict:
+        async with AsyncSessionFactory() as db:
+            return await AutosaveService(db).flush_dirty(settings.AUTOSAVE_FLUSH_BATCH_SIZE)
+
+    return run_async(_run())
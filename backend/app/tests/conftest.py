@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import os
+import tempfile
 from collections.abc import AsyncGenerator
+from pathlib import Path
 
 import pytest
 import pytest_asyncio
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
@@ -14,6 +18,15 @@ os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
 os.environ.setdefault("SYNC_DATABASE_URL", "sqlite:///./test.db")
 os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
 
+# Throwaway key for signing receipt checkpoints.
+_receipt_signing_key = Path(tempfile.mkdtemp()) / "receipt_signing.pem"
+_receipt_signing_key.write_bytes(
+    Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+)
+os.environ.setdefault("RECEIPT_SIGNING_KEY_PATH", str(_receipt_signing_key))
+
 from app.api.deps import get_db
 from app.database.base import Base
 from app.main import app
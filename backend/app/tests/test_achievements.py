@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from app.models.iam import Institution, User
+from app.models.student_success import AcademicStreak, Badge, EngagementEvent, UserBadge
+from app.services.achievements import AchievementService
+from app.services.streak import DAILY_ACTIVITY_STREAK, StreakState, advance_streak
+from app.utils.constants import BadgeCode
+
+
+def test_advance_streak_bridges_one_missed_day_per_streak():
+    day = date(2025, 3, 1)
+    state = advance_streak(StreakState(), day)
+    assert state == StreakState(1, 1, day, False)
+    state = advance_streak(state, day + timedelta(days=1))
+    assert (state.current_length, state.freeze_used) == (2, False)
+    state = advance_streak(state, day + timedelta(days=3))
+    assert (state.current_length, state.freeze_used) == (3, True)
+    assert advance_streak(state, day + timedelta(days=3)) is state
+    state = advance_streak(state, day + timedelta(days=5))
+    assert state == StreakState(1, 3, day + timedelta(days=5), False)
+
+
+@pytest.mark.asyncio
+async def test_process_day_upserts_streaks_and_awards_badges_once(db_session):
+    day = date(2025, 3, 10)
+    institution = Institution(id=uuid4(), name="Streaks", code=f"S-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    institution_id = institution.id
+    users = [
+        User(
+            id=uuid4(),
+            institution_id=institution_id,
+            email=f"{uuid4().hex[:8]}@test.ac.tz",
+            full_name=f"Student {index}",
+            reg_number=f"REG-{uuid4().hex[:8]}",
+            password_hash="x",
+        )
+        for index in range(3)
+    ]
+    badge = Badge(
+        id=uuid4(),
+        institution_id=institution_id,
+        code=BadgeCode.CONSISTENCY_CHAMPION,
+        name="Consistency",
+        threshold=3,
+    )
+    db_session.add_all([*users, badge])
+    await db_session.flush()
+    veteran, newcomer, absent = (user.id for user in users)
+    badge_id = badge.id
+    db_session.add(
+        AcademicStreak(
+            institution_id=institution_id,
+            user_id=veteran,
+            streak_type=DAILY_ACTIVITY_STREAK,
+            current_length=2,
+            longest_length=2,
+            last_activity_date=day - timedelta(days=1),
+        )
+    )
+    noon = datetime.combine(day, time(12), tzinfo=timezone.utc)
+    logins = ((veteran, noon), (veteran, noon), (newcomer, noon), (absent, noon - timedelta(days=2)))
+    for user_id, occurred_at in logins:
+        db_session.add(
+            EngagementEvent(institution_id=institution_id, user_id=user_id, event_type="login", occurred_at=occurred_at)
+        )
+    await db_session.flush()
+
+    service = AchievementService(db_session, chunk_size=1)
+    assert await service.process_day(institution_id, day) == {"users": 2, "badges_awarded": 1}
+    # Replaying the day changes nothing.
+    assert await service.process_day(institution_id, day) == {"users": 2, "badges_awarded": 0}
+
+    streaks = (
+        await db_session.execute(
+            select(AcademicStreak.user_id, AcademicStreak.current_length).where(
+                AcademicStreak.institution_id == institution_id
+            )
+        )
+    ).all()
+    assert dict(streaks) == {veteran: 3, newcomer: 1}
+    awarded = (
+        await db_session.execute(select(UserBadge.user_id).where(UserBadge.badge_id == badge_id))
+    ).scalars().all()
+    assert awarded == [veteran]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.after_commit import run_after_commit
+from app.models.academics import SkillDefinition, UserSkill
+from app.models.iam import Institution, User
+from app.models.student_success import AcademicStreak, Badge, StudentRiskScore, UserBadge
+from app.services.dashboard import DashboardService, dashboard_etag
+from app.tasks.celery_app import run_async
+
+
+@pytest.mark.asyncio
+async def test_dashboard_build_reads_sections_concurrently(db_session):
+    institution = Institution(id=uuid4(), name="Dashboard", code=f"D-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    institution_id = institution.id
+    user = User(
+        id=uuid4(),
+        institution_id=institution_id,
+        email=f"{uuid4().hex[:8]}@test.ac.tz",
+        full_name="Dashboard Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    badge = Badge(
+        id=uuid4(), institution_id=institution_id, code="CONSISTENCY_CHAMPION", name="Consistency", threshold=3
+    )
+    skill = SkillDefinition(id=uuid4(), institution_id=institution_id, code="ALG", name="Algorithms")
+    db_session.add_all([user, badge, skill])
+    await db_session.flush()
+    user_id = user.id
+    db_session.add_all(
+        [
+            StudentRiskScore(
+                institution_id=institution_id,
+                user_id=user_id,
+                score=25,
+                level="medium",
+                factors_json={"no_activity": 25},
+                computed_at=datetime(2025, 3, 1, tzinfo=timezone.utc),
+            ),
+            AcademicStreak(
+                institution_id=institution_id,
+                user_id=user_id,
+                streak_type="daily_activity",
+                current_length=3,
+                longest_length=5,
+                last_activity_date=date(2025, 3, 1),
+            ),
+            UserBadge(institution_id=institution_id, user_id=user_id, badge_id=badge.id, evidence_json={}),
+            UserSkill(
+                institution_id=institution_id,
+                user_id=user_id,
+                skill_id=skill.id,
+                progress_pct=90.0,
+                mastery_level="proficient",
+            ),
+        ]
+    )
+    await db_session.flush()
+
+    # Sessions on the test connection see its uncommitted rows.
+    service = DashboardService(async_sessionmaker(bind=db_session.bind, class_=AsyncSession))
+    dashboard = await service.build(institution_id, user_id)
+    assert (dashboard.risk.score, dashboard.risk.level) == (25, "medium")
+    assert dashboard.streaks["daily_activity"]["longest_length"] == 5
+    assert [item["code"] for item in dashboard.badges] == ["CONSISTENCY_CHAMPION"]
+    assert [(item["code"], item["mastery_level"]) for item in dashboard.skills] == [("ALG", "proficient")]
+
+    body = dashboard.model_dump_json()
+    assert json.loads(body)["streaks"]["daily_activity"]["last_activity_date"] == "2025-03-01"
+    assert dashboard_etag(body) == dashboard_etag(dashboard.model_dump_json())
+    assert db_session.info["dashboard_invalidations"] >= {(institution_id, user_id)}
+
+
+def test_run_async_finishes_after_commit_work():
+    invalidated = []
+
+    async def invalidate() -> None:
+        await asyncio.sleep(0.01)
+        invalidated.append(True)
+
+    async def body() -> str:
+        run_after_commit(Session(), invalidate())
+        return "done"
+
+    # The invalidation would otherwise still be in flight when the task body returns.
+    assert run_async(body()) == "done"
+    assert invalidated == [True]
@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.api.v1 import submissions as submissions_api
+from app.database.session import AppSession
+from app.models.academics import (
+    Assessment,
+    AssessmentAttempt,
+    AssessmentQuestion,
+    AssessmentQuestionOption,
+    AssessmentResponse,
+    AssessmentResult,
+    Course,
+    SkillAssessmentLink,
+    SkillDefinition,
+    UserSkill,
+)
+from app.models.iam import Institution, Role, RoleBinding, User
+from app.schemas.submission import AssessmentResponseBatch, AssessmentResponseCreate, SubmitAttemptRequest
+from app.services.answer_key import answer_key_cache, answer_key_store
+from app.services.autosave import DRAFT_PREFIX, OWNER_FIELD, AutosaveService, BufferedAttempt
+from app.services.grading import GradingService
+from app.services.regrade import RegradeService
+from app.services.skill import SkillService
+from app.services.submission import SubmissionService
+
+
+async def _seed_attempt(db_session) -> tuple[AssessmentAttempt, AssessmentQuestionOption]:
+    """Questions worth 1, 2, 3 and 4 points; the first three are answered, the third wrongly.
+
+    Returns the attempt and the wrong option that was picked.
+    """
+    institution = Institution(id=uuid4(), name="Test", code=f"T-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    user = User(
+        institution_id=institution.id,
+        email=f"{uuid4().hex[:8]}@test.ac.tz",
+        full_name="Grading Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    course = Course(institution_id=institution.id, code=f"CS-{uuid4().hex[:6]}", title="Algorithms")
+    db_session.add_all([user, course])
+    await db_session.flush()
+    assessment = Assessment(institution_id=institution.id, course_id=course.id, title="Quiz")
+    db_session.add(assessment)
+    await db_session.flush()
+    attempt = AssessmentAttempt(id=uuid4(), institution_id=institution.id, assessment_id=assessment.id, user_id=user.id)
+    db_session.add(attempt)
+
+    for index, points in enumerate([1.0, 2.0, 3.0, 4.0]):
+        question = AssessmentQuestion(
+            id=uuid4(),
+            institution_id=institution.id,
+            assessment_id=assessment.id,
+            question_text=f"Q{index}",
+            points=points,
+        )
+        right = AssessmentQuestionOption(
+            id=uuid4(), institution_id=institution.id, question_id=question.id, option_text="right", is_correct=True
+        )
+        wrong = AssessmentQuestionOption(
+            id=uuid4(), institution_id=institution.id, question_id=question.id, option_text="wrong"
+        )
+        db_session.add_all([question, right, wrong])
+        if index == 2:
+            flipped = wrong
+        if index < 3:
+            db_session.add(
+                AssessmentResponse(
+                    institution_id=institution.id,
+                    attempt_id=attempt.id,
+                    question_id=question.id,
+                    selected_option_id=(wrong if index == 2 else right).id,
+                )
+            )
+    await db_session.flush()
+    return attempt, flipped
+
+
+@pytest.mark.asyncio
+async def test_grade_attempt_weights_by_question_points(db_session):
+    attempt, flipped = await _seed_attempt(db_session)
+    attempt_id, assessment_id = attempt.id, attempt.assessment_id
+    service = GradingService(db_session)
+    score = await service.score_attempt(attempt_id)
+    assert (score.earned, score.possible, score.answered, score.correct) == (3.0, 10.0, 3, 2)
+
+    result = await service.grade_attempt(attempt_id)
+    assert (result.total_score, result.percentage) == (3.0, 30.0)
+    awarded = (
+        await db_session.execute(
+            select(AssessmentResponse.points_awarded).where(AssessmentResponse.attempt_id == attempt_id)
+        )
+    ).scalars().all()
+    assert sorted(awarded) == [0.0, 1.0, 2.0]
+
+    # Editing an option drops the cached answer key on flush.
+    await service.score_attempt(attempt_id)
+    assert answer_key_cache.get(assessment_id) is not None
+    flipped.is_correct = True
+    await db_session.flush()
+    assert answer_key_cache.get(assessment_id) is None
+    assert (await service.score_attempt(attempt_id)).earned == 6.0
+
+    with pytest.raises(ValueError):
+        await service.grade_attempt(uuid4())
+
+
+@pytest.mark.asyncio
+async def test_answer_key_bump_is_awaited_by_commit(db_session, monkeypatch):
+    attempt, _ = await _seed_attempt(db_session)
+    assessment_id = attempt.assessment_id
+    bumped: list[set] = []
+
+    async def bump(assessment_ids) -> None:
+        await asyncio.sleep(0)
+        bumped.append(set(assessment_ids))
+
+    monkeypatch.setattr(answer_key_store, "bump", bump)
+    session = AppSession(bind=db_session.bind)
+    question_stmt = select(AssessmentQuestion).where(AssessmentQuestion.assessment_id == assessment_id).limit(1)
+    question = (await session.execute(question_stmt)).scalar_one()
+    question.points = 5.0
+    await session.commit()
+    assert bumped == [{assessment_id}]
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_regrade_chunks_rescore_and_bump_versions(db_session):
+    attempt, flipped = await _seed_attempt(db_session)
+    attempt_id, assessment_id = attempt.id, attempt.assessment_id
+    grading = GradingService(db_session)
+    result_ids = sorted([(await grading.grade_attempt(attempt_id)).id for _ in range(2)])
+
+    # The key is corrected after the exam: the "wrong" option was in fact right.
+    flipped.is_correct = True
+    await db_session.flush()
+
+    service = RegradeService(db_session)
+    chunk = await service.regrade_chunk(assessment_id, after=None, limit=1)
+    assert (chunk.last_result_id, chunk.processed, chunk.updated) == (result_ids[0], 1, 1)
+    chunk = await service.regrade_chunk(assessment_id, after=chunk.last_result_id, limit=1)
+    assert (chunk.last_result_id, chunk.conflicts) == (result_ids[1], 0)
+    assert (await service.regrade_chunk(assessment_id, after=chunk.last_result_id, limit=1)).last_result_id is None
+
+    rows = (
+        await db_session.execute(
+            select(AssessmentResult.total_score, AssessmentResult.percentage, AssessmentResult.version).where(
+                AssessmentResult.id.in_(result_ids)
+            )
+        )
+    ).all()
+    assert sorted(rows) == [(6.0, 60.0, 2), (6.0, 60.0, 2)]
+
+
+@pytest.mark.asyncio
+async def test_upsert_responses_overwrites_per_question(db_session):
+    attempt, flipped = await _seed_attempt(db_session)
+    service = SubmissionService(db_session)
+    saved = await service.upsert_responses(
+        institution_id=attempt.institution_id,
+        user_id=attempt.user_id,
+        attempt_id=attempt.id,
+        responses=[
+            AssessmentResponseCreate(question_id=flipped.question_id, answer_text="draft"),
+            AssessmentResponseCreate(
+                question_id=flipped.question_id, selected_option_id=flipped.id, answer_text="final"
+            ),
+        ],
+    )
+    assert saved == 1
+
+    rows = (
+        await db_session.execute(
+            select(AssessmentResponse.question_id, AssessmentResponse.answer_text).where(
+                AssessmentResponse.attempt_id == attempt.id
+            )
+        )
+    ).all()
+    assert len(rows) == 3
+    assert dict(rows)[flipped.question_id] == "final"
+
+
+@pytest.mark.asyncio
+async def test_autosave_drafts_overlay_and_flush(db_session):
+    attempt, flipped = await _seed_attempt(db_session)
+    attempt_id = attempt.id
+    extra_question = uuid4()
+    drafts = [
+        AssessmentResponseCreate(question_id=flipped.question_id, selected_option_id=flipped.id, answer_text="changed"),
+        AssessmentResponseCreate(question_id=extra_question, answer_text="new"),
+    ]
+    buffered = BufferedAttempt(
+        attempt_id=attempt_id,
+        institution_id=attempt.institution_id,
+        user_id=attempt.user_id,
+        fields={
+            OWNER_FIELD: "ignored",
+            **{f"{DRAFT_PREFIX}{draft.question_id}": draft.model_dump_json() for draft in drafts},
+        },
+    )
+    service = AutosaveService(db_session)
+
+    merged = {response.question_id: response for response in await service.merged_responses(attempt_id, buffered)}
+    assert len(merged) == 4
+    assert (merged[flipped.question_id].answer_text, merged[flipped.question_id].buffered) == ("changed", True)
+    assert sum(response.buffered for response in merged.values()) == 2
+
+    assert await service.flush(buffered, {flipped.question_id}) == 1
+    persisted = await service.merged_responses(attempt_id, None)
+    flipped_answers = [response.answer_text for response in persisted if response.question_id == flipped.question_id]
+    assert flipped_answers == ["changed"]
+    assert extra_question not in {response.question_id for response in persisted}
+
+
+@pytest.mark.asyncio
+async def test_autosave_flush_isolates_bad_drafts_per_attempt(db_session, monkeypatch):
+    first, flipped = await _seed_attempt(db_session)
+    institution_id, user_id, assessment_id = first.institution_id, first.user_id, first.assessment_id
+    attempts = [first.id]
+    for _ in range(2):
+        attempt = AssessmentAttempt(
+            id=uuid4(), institution_id=institution_id, assessment_id=assessment_id, user_id=user_id
+        )
+        db_session.add(attempt)
+        attempts.append(attempt.id)
+    await db_session.flush()
+
+    def snapshot(attempt_id, *drafts):
+        fields = {f"{DRAFT_PREFIX}{draft.question_id}": draft.model_dump_json() for draft in drafts}
+        owner = f"{institution_id}:{user_id}"
+        return BufferedAttempt(attempt_id, institution_id, user_id, {OWNER_FIELD: owner, **fields})
+
+    option_id = flipped.id
+    answer = AssessmentResponseCreate(question_id=flipped.question_id, selected_option_id=option_id)
+    group = [
+        # A draft for a question of no assessment is dropped at flush, the rest is written.
+        snapshot(attempts[0], answer, AssessmentResponseCreate(question_id=uuid4(), answer_text="stray")),
+        # This one is rejected by the database; its savepoint is rolled back alone.
+        snapshot(attempts[1], answer),
+        snapshot(attempts[2], answer),
+    ]
+    service = AutosaveService(db_session)
+    flush = service.flush
+
+    async def failing_flush(buffered, question_ids):
+        written = await flush(buffered, question_ids)
+        if buffered.attempt_id == attempts[1]:
+            raise IntegrityError("INSERT", {}, Exception("rejected"))
+        return written
+
+    monkeypatch.setattr(service, "flush", failing_flush)
+    counts, settled = await service.flush_institution(institution_id, group)
+    assert counts == {"responses": 2, "discarded": 0, "failed": 1}
+    assert [item.attempt_id for item in settled] == [attempts[0], attempts[2]]
+    rows = (
+        await db_session.execute(
+            select(AssessmentResponse.attempt_id, AssessmentResponse.answer_text).where(
+                AssessmentResponse.attempt_id.in_(attempts), AssessmentResponse.selected_option_id == option_id
+            )
+        )
+    ).all()
+    assert sorted(row.attempt_id for row in rows) == sorted([attempts[0], attempts[2]])
+    stray_stmt = select(AssessmentResponse.id).where(AssessmentResponse.answer_text == "stray")
+    stray = (await db_session.execute(stray_stmt)).first()
+    assert stray is None
+
+
+class _MemoryBuffer:
+    """Stands in for the Redis autosave buffer, one dict of fields per attempt."""
+
+    def __init__(self):
+        self.hashes: dict[UUID, dict[str, str]] = {}
+
+    async def write(self, *, institution_id, user_id, attempt_id, responses):
+        fields = self.hashes.setdefault(attempt_id, {OWNER_FIELD: f"{institution_id}:{user_id}"})
+        fields.update({f"{DRAFT_PREFIX}{response.question_id}": response.model_dump_json() for response in responses})
+        return len(responses)
+
+    async def snapshot(self, attempt_id):
+        fields = self.hashes.get(attempt_id)
+        if fields is None:
+            return None
+        institution_id, user_id = fields[OWNER_FIELD].split(":")
+        return BufferedAttempt(attempt_id, UUID(institution_id), UUID(user_id), dict(fields))
+
+    async def acknowledge(self, snapshot):
+        self.hashes.pop(snapshot.attempt_id, None)
+
+    async def discard(self, attempt_id, question_ids):
+        fields = self.hashes.get(attempt_id, {})
+        for question_id in question_ids:
+            fields.pop(f"{DRAFT_PREFIX}{question_id}", None)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("buffer_enabled", [True, False])
+async def test_posted_answer_supersedes_earlier_autosave(db_session, monkeypatch, buffer_enabled):
+    attempt, flipped = await _seed_attempt(db_session)
+    attempt_id, question_id, wrong_id = attempt.id, flipped.question_id, flipped.id
+    right_id = (
+        await db_session.execute(
+            select(AssessmentQuestionOption.id).where(
+                AssessmentQuestionOption.question_id == question_id, AssessmentQuestionOption.is_correct.is_(True)
+            )
+        )
+    ).scalar_one()
+    user = SimpleNamespace(id=attempt.user_id, institution_id=attempt.institution_id)
+    monkeypatch.setattr(submissions_api, "autosave_buffer", _MemoryBuffer())
+    monkeypatch.setattr(submissions_api.settings, "AUTOSAVE_BUFFER_ENABLED", True)
+
+    # Q2 is autosaved wrongly into the buffer, then answered again through the single-answer POST.
+    autosaved = AssessmentResponseBatch(
+        responses=[AssessmentResponseCreate(question_id=question_id, selected_option_id=wrong_id)]
+    )
+    await submissions_api.save_responses(attempt_id, autosaved, db=db_session, current_user=user)
+    monkeypatch.setattr(submissions_api.settings, "AUTOSAVE_BUFFER_ENABLED", buffer_enabled)
+    posted = AssessmentResponseCreate(question_id=question_id, selected_option_id=right_id)
+    await submissions_api.add_response(attempt_id, posted, db=db_session, current_user=user)
+
+    detail = await submissions_api.get_attempt(attempt_id, db=db_session, current_user=user)
+    assert {response.question_id: response.selected_option_id for response in detail.responses}[question_id] == right_id
+    result = await submissions_api.submit_attempt(
+        attempt_id, SubmitAttemptRequest(idempotency_key=uuid4().hex), db=db_session, current_user=user
+    )
+    # Q0, Q1 and Q2 right: 1 + 2 + 3 points.
+    assert result.total_score == 6.0
+
+
+@pytest.mark.asyncio
+async def test_skill_recalculation_weights_links_and_covers_cohort(db_session):
+    attempt, flipped = await _seed_attempt(db_session)
+    institution_id, user_id, assessment_id = attempt.institution_id, attempt.user_id, attempt.assessment_id
+    questions = (
+        await db_session.execute(
+            select(AssessmentQuestion.id)
+            .where(AssessmentQuestion.assessment_id == assessment_id)
+            .order_by(AssessmentQuestion.points)
+        )
+    ).scalars().all()
+    course_id = (
+        await db_session.execute(select(Assessment.course_id).where(Assessment.id == assessment_id))
+    ).scalar_one()
+    recall = SkillDefinition(id=uuid4(), institution_id=institution_id, code=f"R-{uuid4().hex[:6]}", name="Recall")
+    analysis = SkillDefinition(id=uuid4(), institution_id=institution_id, code=f"A-{uuid4().hex[:6]}", name="Analysis")
+    role = Role(id=uuid4(), institution_id=institution_id, code="student")
+    db_session.add_all([recall, analysis, role])
+    await db_session.flush()
+    db_session.add_all(
+        [
+            # Recall: Q0 right (1 x 1) and Q2 wrong (3 x 2) -> 1 of 7.
+            SkillAssessmentLink(institution_id=institution_id, skill_id=recall.id, question_id=questions[0]),
+            SkillAssessmentLink(
+                institution_id=institution_id, skill_id=recall.id, question_id=questions[2], weight=2.0
+            ),
+            # Analysis: Q1 right -> 2 of 2.
+            SkillAssessmentLink(institution_id=institution_id, skill_id=analysis.id, question_id=questions[1]),
+            RoleBinding(
+                institution_id=institution_id, user_id=user_id, role_id=role.id, scope_type="course", scope_id=course_id
+            ),
+        ]
+    )
+    recall_id, analysis_id = recall.id, analysis.id
+    await GradingService(db_session).grade_attempt(attempt.id)
+
+    service = SkillService(db_session)
+    assert await service.recalculate_user_skills(user_id, institution_id) == 2
+    # Re-running for the course upserts the same rows instead of adding new ones.
+    assert await service.recalculate_course_skills(course_id, institution_id) == 2
+    rows = (
+        await db_session.execute(
+            select(UserSkill.skill_id, UserSkill.progress_pct, UserSkill.mastery_level).where(
+                UserSkill.user_id == user_id
+            )
+        )
+    ).all()
+    skills = {row.skill_id: (round(row.progress_pct, 2), row.mastery_level) for row in rows}
+    assert skills == {recall_id: (14.29, "beginner"), analysis_id: (100.0, "master")}
+
+    # Soft-deleting Q0 drops its point from both sides: recall is now 0 of 6.
+    await db_session.execute(
+        update(AssessmentQuestion).where(AssessmentQuestion.id == questions[0]).values(deleted_at=func.now())
+    )
+    await service.recalculate_user_skills(user_id, institution_id)
+    recall_progress = select(UserSkill.progress_pct).where(
+        UserSkill.user_id == user_id, UserSkill.skill_id == recall_id
+    )
+    assert (await db_session.execute(recall_progress)).scalar_one() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_grading_and_regrade_refresh_linked_skills(db_session):
+    attempt, flipped = await _seed_attempt(db_session)
+    institution_id, user_id, assessment_id = attempt.institution_id, attempt.user_id, attempt.assessment_id
+    skill = SkillDefinition(id=uuid4(), institution_id=institution_id, code=f"S-{uuid4().hex[:6]}", name="Analysis")
+    db_session.add(skill)
+    await db_session.flush()
+    db_session.add(
+        SkillAssessmentLink(institution_id=institution_id, skill_id=skill.id, question_id=flipped.question_id)
+    )
+    skill_id = skill.id
+
+    result = await GradingService(db_session).grade_attempt(attempt.id)
+    result_id = result.id
+    progress = select(UserSkill.progress_pct, UserSkill.updated_from_result_id).where(
+        UserSkill.user_id == user_id, UserSkill.skill_id == skill_id
+    )
+    assert tuple((await db_session.execute(progress)).one()) == (0.0, result_id)
+
+    flipped.is_correct = True
+    await db_session.flush()
+    chunk = await RegradeService(db_session).regrade_chunk(assessment_id, after=None, limit=10)
+    assert chunk.results == {user_id: result_id}
+    assert tuple((await db_session.execute(progress)).one()) == (100.0, result_id)
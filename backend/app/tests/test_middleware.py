@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from redis.exceptions import RedisError
+from starlette.responses import StreamingResponse
+
+from app.core.middleware import RateLimitMiddleware, RequestContextMiddleware
+from app.core.rate_limit import RateLimiter, RateLimitRule
+from app.utils.security import create_access_token
+
+
+def _build_app(rules: list[RateLimitRule] | None = None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/state")
+    async def state(request: Request) -> dict:
+        return {"request_id": request.state.request_id, "institution_id": request.state.institution_id}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for index in range(3):
+                yield f"chunk-{index}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(RequestContextMiddleware)
+    limiter = RateLimiter(rules or [RateLimitRule(name="ip", key="ip", limit=120, period_seconds=60)])
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_request_context_sets_state_and_headers():
+    async with AsyncClient(transport=ASGITransport(app=_build_app()), base_url="http://test") as client:
+        response = await client.get("/state", headers={"x-request-id": "req-1", "x-institution-id": "inst-1"})
+
+    assert response.status_code == 200
+    assert response.json() == {"request_id": "req-1", "institution_id": "inst-1"}
+    assert response.headers["x-request-id"] == "req-1"
+    assert float(response.headers["x-latency-ms"]) >= 0
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_pass_through():
+    async with AsyncClient(transport=ASGITransport(app=_build_app()), base_url="http://test") as client:
+        response = await client.get("/stream")
+
+    assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert response.headers["x-request-id"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejects_after_budget():
+    rules = [RateLimitRule(name="ip", key="ip", limit=2, period_seconds=60)]
+    async with AsyncClient(transport=ASGITransport(app=_build_app(rules)), base_url="http://test") as client:
+        responses = [await client.get("/state") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert int(responses[-1].headers["retry-after"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_buckets_are_per_user_and_route():
+    rules = [RateLimitRule(name="state", key="user", limit=1, period_seconds=60, path_prefix="/state")]
+    first = {"authorization": f"Bearer {create_access_token('user-1', {'institution_id': 'inst-1'})}"}
+    second = {"authorization": f"Bearer {create_access_token('user-2', {'institution_id': 'inst-1'})}"}
+    async with AsyncClient(transport=ASGITransport(app=_build_app(rules)), base_url="http://test") as client:
+        assert (await client.get("/state", headers=first)).status_code == 200
+        assert (await client.get("/state", headers=first)).status_code == 429
+        assert (await client.get("/state", headers=second)).status_code == 200
+        assert (await client.get("/stream", headers=first)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_local_buckets_refill_and_decide_when_redis_is_down():
+    now = [0.0]
+
+    class _DownRedis:
+        def register_script(self, script):
+            async def call(keys, args):
+                raise RedisError("down")
+
+            return call
+
+    limiter = RateLimiter(
+        [RateLimitRule(name="ip", key="ip", limit=2, period_seconds=10)],
+        redis_factory=_DownRedis,
+        clock=lambda: now[0],
+    )
+    identities = {"ip": "10.0.0.1"}
+
+    assert (await limiter.hit("/", identities)).allowed
+    assert (await limiter.hit("/", identities)).allowed
+    denied = await limiter.hit("/", identities)
+    assert not denied.allowed
+    assert denied.retry_after_seconds == 5
+
+    now[0] = 5.0
+    assert (await limiter.hit("/", identities)).allowed
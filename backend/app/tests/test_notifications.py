@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from app.models.communication import Notification, NotificationDelivery, NotificationPreference
+from app.models.iam import Institution, User
+from app.services.email import get_smtp_pool
+from app.services.notification import NotificationService
+from app.tasks.celery_app import run_async
+
+
+@pytest.mark.asyncio
+async def test_deliver_many_fans_out_and_writes_deliveries_in_bulk(db_session):
+    institution = Institution(id=uuid4(), name="Notify", code=f"N-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    institution_id = institution.id
+    user = User(
+        id=uuid4(),
+        institution_id=institution_id,
+        email=f"{uuid4().hex[:8]}@test.ac.tz",
+        full_name="Notify Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    db_session.add(user)
+    await db_session.flush()
+    urgent = Notification(id=uuid4(), institution_id=institution_id, user_id=user.id, priority="P0", payload={"m": 1})
+    routine = Notification(id=uuid4(), institution_id=institution_id, user_id=user.id, priority="P2", payload={"m": 2})
+    db_session.add_all(
+        [
+            urgent,
+            routine,
+            NotificationPreference(institution_id=institution_id, user_id=user.id, channel="email"),
+            NotificationPreference(institution_id=institution_id, user_id=user.id, channel="sms"),
+        ]
+    )
+    await db_session.flush()
+    urgent_id, routine_id = urgent.id, routine.id
+
+    # P0 goes out on every enabled channel; P2 stops at the first that succeeds.
+    assert await NotificationService(db_session).deliver_many([urgent, routine]) == 3
+    rows = (
+        await db_session.execute(
+            select(
+                NotificationDelivery.notification_id, NotificationDelivery.channel, NotificationDelivery.status
+            ).where(NotificationDelivery.notification_id.in_([urgent_id, routine_id]))
+        )
+    ).all()
+    assert sorted((row.notification_id == urgent_id, row.channel, row.status) for row in rows) == [
+        (False, "email", "sent"),
+        (True, "email", "sent"),
+        (True, "sms", "sent"),
+    ]
+    statuses = (
+        await db_session.execute(select(Notification.status).where(Notification.id.in_([urgent_id, routine_id])))
+    ).scalars().all()
+    assert statuses == ["sent", "sent"]
+
+
+def test_smtp_pool_outlives_each_task():
+    async def body():
+        return asyncio.get_running_loop(), get_smtp_pool()
+
+    # Consecutive tasks of a worker run on one loop, so they share its SMTP connections.
+    first_loop, first_pool = run_async(body())
+    second_loop, second_pool = run_async(body())
+    assert first_loop is second_loop
+    assert first_pool is second_pool
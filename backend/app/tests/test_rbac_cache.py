@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app.database.session import AppSession
+from app.models.iam import Institution, Permission, Role, RoleBinding, RolePermission, User
+from app.services.rbac import (
+    PERMISSION_DIGEST_VERSION,
+    AuthorizationSnapshot,
+    BindingSnapshot,
+    CompiledPermissions,
+    RbacService,
+    ScopeGrant,
+    permission_cache,
+    snapshot_store,
+)
+
+
+def test_compiled_permissions_respects_scope_and_window():
+    now = datetime.now(UTC)
+    course_id = str(uuid4())
+    compiled = CompiledPermissions(
+        grants={
+            "course.read": (ScopeGrant(scope_type="course", scope_id=course_id, start_at=None, end_at=None),),
+            "grade.view": (
+                ScopeGrant(scope_type="institution", scope_id=None, start_at=now + timedelta(days=1), end_at=None),
+            ),
+        }
+    )
+
+    assert compiled.allows("course.read", "course", course_id, now)
+    assert compiled.allows("course.read", "course", None, now)
+    assert not compiled.allows("course.read", "course", str(uuid4()), now)
+    assert not compiled.allows("course.read", None, None, now)
+    assert not compiled.allows("grade.view", None, None, now)
+    assert compiled.allows("grade.view", None, None, now + timedelta(days=2))
+    assert not compiled.allows("content.write", None, None, now)
+
+
+def test_authorization_snapshot_round_trips_through_json():
+    now = datetime.now(UTC)
+    course_id = str(uuid4())
+    snapshot = AuthorizationSnapshot(
+        generation=7,
+        bindings=(
+            BindingSnapshot(
+                role_id=str(uuid4()),
+                role_code="student",
+                scope_type="course",
+                scope_id=course_id,
+                start_at=None,
+                end_at=now + timedelta(days=30),
+                active=True,
+                permissions=("assessment.submit", "course.read"),
+            ),
+        ),
+    )
+
+    restored = AuthorizationSnapshot.from_json(snapshot.to_json())
+    assert restored == snapshot
+    assert restored.permission_codes(now) == ["assessment.submit", "course.read"]
+
+    compiled = restored.compile()
+    assert compiled.generation == 7
+    assert compiled.allows("assessment.submit", "course", course_id, now)
+    assert not compiled.allows("assessment.submit", "course", course_id, now + timedelta(days=31))
+
+
+def test_permission_digest_encodes_catalogue_permissions_only():
+    now = datetime.now(UTC)
+    course_id = str(uuid4())
+    binding = BindingSnapshot(
+        role_id=str(uuid4()),
+        role_code="lecturer",
+        scope_type="course",
+        scope_id=course_id,
+        start_at=None,
+        end_at=now + timedelta(days=1),
+        active=True,
+        permissions=("course.read", "grade.view", "custom.unlisted"),
+    )
+    digest = AuthorizationSnapshot(generation=0, bindings=(binding,)).to_digest()
+
+    compiled = CompiledPermissions.from_digest(digest)
+    assert compiled is not None
+    assert compiled.allows("grade.view", "course", course_id, now)
+    assert not compiled.allows("grade.view", "course", str(uuid4()), now)
+    assert not compiled.allows("grade.view", "course", course_id, now + timedelta(days=2))
+    assert not compiled.allows("custom.unlisted", "course", course_id, now)
+
+    assert CompiledPermissions.from_digest({**digest, "v": "stale"}) is None
+    assert digest["v"] == PERMISSION_DIGEST_VERSION
+
+
+@pytest.mark.asyncio
+async def test_permission_cache_is_filled_once_and_invalidated_on_binding_write(db_session):
+    institution = Institution(id=uuid4(), name="Test", code=f"T-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+
+    user = User(
+        institution_id=institution.id,
+        email="cache@test.ac.tz",
+        full_name="Cache Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    role = Role(institution_id=institution.id, code="lecturer")
+    permission = Permission(institution_id=institution.id, code="course.read")
+    db_session.add_all([user, role, permission])
+    await db_session.flush()
+    db_session.add(RolePermission(institution_id=institution.id, role_id=role.id, permission_id=permission.id))
+    await db_session.flush()
+
+    service = RbacService(db_session)
+    assert not await service.user_has_permission(user=user, permission_code="course.read", scope_type="course")
+    assert permission_cache.get((institution.id, user.id)) is not None
+
+    db_session.add(
+        RoleBinding(institution_id=institution.id, user_id=user.id, role_id=role.id, scope_type="institution")
+    )
+    await db_session.flush()
+    assert permission_cache.get((institution.id, user.id)) is None
+
+    assert await service.user_has_permission(user=user, permission_code="course.read", scope_type="course")
+
+
+@pytest.mark.asyncio
+async def test_rbac_commit_bumps_institution_generation(db_session, monkeypatch):
+    bumped: list[set] = []
+
+    async def bump(institution_ids) -> None:
+        bumped.append(set(institution_ids))
+
+    monkeypatch.setattr(snapshot_store, "bump", bump)
+    institution = Institution(id=uuid4(), name="Test", code=f"T-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+
+    session = AppSession(bind=db_session.bind)
+    session.add(Role(institution_id=institution.id, code="auditor"))
+    await session.commit()
+    assert bumped == [{institution.id}]
+    await session.close()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import multiprocessing
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.api.v1 import admin as admin_api
+from app.api.v1 import public as public_api
+from app.models.iam import Institution, User
+from app.models.receipts import Receipt, ReceiptChainHead
+from app.services.receipt import ReceiptDraft, ReceiptService
+from app.services.receipt_checkpoint import ReceiptCheckpointService, checkpoint_message
+from app.services.receipt_verification import ReceiptChainVerifier, _shared_hash_pool
+
+
+async def _create_user(db_session) -> User:
+    institution = Institution(id=uuid4(), name="Test", code=f"T-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    user = User(
+        institution_id=institution.id,
+        email=f"{uuid4().hex[:8]}@test.ac.tz",
+        full_name="Receipt Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    db_session.add(user)
+    await db_session.flush()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_chain_head_is_backfilled_from_existing_receipts(db_session):
+    user = await _create_user(db_session)
+    for position in range(1, 4):
+        db_session.add(
+            Receipt(
+                institution_id=user.institution_id,
+                user_id=user.id,
+                receipt_code=f"LEGACY-{uuid4().hex[:8]}",
+                entity_id=uuid4(),
+                entity_type="note",
+                action="create",
+                timestamp=datetime.now(UTC),
+                receipt_hash=f"hash-{position}",
+                payload={},
+                chain_position=position,
+            )
+        )
+    await db_session.flush()
+
+    service = ReceiptService(db_session)
+    receipt = await service.generate_receipt(
+        institution_id=user.institution_id,
+        user_id=user.id,
+        entity_id=uuid4(),
+        entity_type="note",
+        action="create",
+        payload={"n": 4},
+    )
+    assert receipt.chain_position == 4
+    assert receipt.previous_receipt_hash == "hash-3"
+
+    following = await service.generate_receipt(
+        institution_id=user.institution_id,
+        user_id=user.id,
+        entity_id=uuid4(),
+        entity_type="note",
+        action="create",
+        payload={"n": 5},
+    )
+    assert following.chain_position == 5
+    assert following.previous_receipt_hash == receipt.receipt_hash
+
+    head = (
+        await db_session.execute(select(ReceiptChainHead).where(ReceiptChainHead.user_id == user.id))
+    ).scalar_one()
+    assert (head.position, head.last_hash) == (5, following.receipt_hash)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [1, 2])
+async def test_chain_verifier_reports_first_break_per_chain(db_session, workers):
+    user = await _create_user(db_session)
+    other = User(
+        institution_id=user.institution_id,
+        email=f"{uuid4().hex[:8]}@test.ac.tz",
+        full_name="Receipt Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    db_session.add(other)
+    await db_session.flush()
+
+    service = ReceiptService(db_session)
+    drafts = [ReceiptDraft(entity_id=uuid4(), entity_type="note", action="create", payload={"n": n}) for n in range(5)]
+    tampered = await service.generate_receipt_chain(institution_id=user.institution_id, user_id=user.id, drafts=drafts)
+    await service.generate_receipt_chain(institution_id=user.institution_id, user_id=other.id, drafts=drafts)
+    tampered[1].payload = {"n": 100}
+    tampered[3].previous_receipt_hash = "forged"
+    await db_session.flush()
+
+    verifier = ReceiptChainVerifier(db_session, batch_size=2, workers=workers)
+    report = await verifier.verify_institution(user.institution_id)
+    assert (report.chains, report.receipts) == (2, 10)
+    assert [(item.user_id, item.chain_position, item.reason) for item in report.breaks] == [
+        (user.id, 2, "payload_hash")
+    ]
+
+    intact = await verifier.verify_user(user.institution_id, other.id)
+    assert intact.valid
+    assert (intact.chains, intact.receipts) == (1, 5)
+
+
+def test_hash_pool_is_shared_and_skipped_in_daemonic_processes(monkeypatch):
+    assert _shared_hash_pool(1) is None
+    assert _shared_hash_pool(2) is _shared_hash_pool(4)
+    monkeypatch.setattr(multiprocessing, "current_process", lambda: SimpleNamespace(daemon=True))
+    assert _shared_hash_pool(2) is None
+
+
+@pytest.mark.asyncio
+async def test_verification_jobs_are_only_visible_to_their_institution(monkeypatch):
+    owners = {}
+
+    async def register(job_id, institution_id):
+        owners[job_id] = institution_id
+
+    async def owner(job_id):
+        return owners.get(job_id)
+
+    monkeypatch.setattr(admin_api.verification_jobs, "register", register)
+    monkeypatch.setattr(admin_api.verification_jobs, "owner", owner)
+    monkeypatch.setattr(admin_api.celery_app, "send_task", lambda *args, **kwargs: None)
+    monkeypatch.setattr(admin_api.celery_app, "AsyncResult", lambda job_id: SimpleNamespace(state="FAILURE"))
+    admin = SimpleNamespace(id=uuid4(), institution_id=uuid4())
+    outsider = SimpleNamespace(id=uuid4(), institution_id=uuid4())
+
+    job = await admin_api.admin_start_receipt_verification(current_user=admin)
+    assert owners == {job.job_id: admin.institution_id}
+    read = await admin_api.admin_receipt_verification_job(job.job_id, current_user=admin)
+    assert read.status == "failure"
+    # Whatever state the job is in, another institution cannot tell it exists.
+    for job_id in (job.job_id, uuid4().hex):
+        with pytest.raises(HTTPException) as denied:
+            await admin_api.admin_receipt_verification_job(job_id, current_user=outsider)
+        assert denied.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_inclusion_proofs(db_session):
+    user = await _create_user(db_session)
+    service = ReceiptService(db_session)
+    drafts = [ReceiptDraft(entity_id=uuid4(), entity_type="note", action="create", payload={"n": n}) for n in range(7)]
+    receipts = await service.generate_receipt_chain(institution_id=user.institution_id, user_id=user.id, drafts=drafts)
+
+    checkpoints = ReceiptCheckpointService(db_session)
+    checkpoint = await checkpoints.build_checkpoint(user.institution_id, receipts[0].timestamp.date())
+    assert checkpoint.leaf_count == 7
+
+    for receipt in receipts:
+        proof = await checkpoints.inclusion_proof(receipt)
+        assert proof.valid
+        assert len(proof.path) <= 3
+
+    # A client holding only the published public key can check the root's signature.
+    published = await public_api.receipt_signing_public_key()
+    assert (checkpoint.signature_scheme, checkpoint.signing_key_id) == ("ed25519", published.key_id)
+    public_key = serialization.load_pem_public_key(published.public_key_pem.encode())
+    public_key.verify(bytes.fromhex(checkpoint.signature), checkpoint_message(checkpoint).encode())
+
+    receipts[4].receipt_hash = "0" * 64
+    assert not (await checkpoints.inclusion_proof(receipts[4])).valid
+    checkpoint.root_hash = "f" * 64
+    assert not (await checkpoints.inclusion_proof(receipts[0])).valid
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.models.academics import Assessment, AssessmentAttempt, AssessmentResult, Course
+from app.models.iam import Institution, User
+from app.models.student_success import EngagementEvent, StudentRiskScore
+from app.services.risk import RiskService, score_users
+
+
+def test_score_users_matches_single_user_rules():
+    risk = score_users(
+        missed=np.array([0, 1, 3, 0]),
+        avg_score=np.array([80.0, np.nan, 90.0, 35.0]),
+        idle_days=np.array([1.0, 2.0, np.nan, 8.0]),
+    )
+    assert risk.scores.tolist() == [0, 40, 115, 65]
+    assert risk.levels.tolist() == ["low", "medium", "critical", "high"]
+    assert risk.factors_of(2) == {"missed_deadlines": 90, "no_activity": 25}
+    assert risk.factors_of(0) == {}
+
+
+@pytest.mark.asyncio
+async def test_compute_all_users_scores_population_in_bulk(db_session):
+    now = datetime.now(timezone.utc)
+    institution = Institution(id=uuid4(), name="Risk", code=f"R-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    institution_id = institution.id
+    users = [
+        User(
+            id=uuid4(),
+            institution_id=institution_id,
+            email=f"{uuid4().hex[:8]}@test.ac.tz",
+            full_name=f"Student {index}",
+            reg_number=f"REG-{uuid4().hex[:8]}",
+            password_hash="x",
+        )
+        for index in range(2)
+    ]
+    course = Course(id=uuid4(), institution_id=institution_id, code=f"CS-{uuid4().hex[:6]}", title="Risk")
+    db_session.add_all([*users, course])
+    await db_session.flush()
+    assessment = Assessment(id=uuid4(), institution_id=institution_id, course_id=course.id, title="Quiz")
+    db_session.add(assessment)
+    await db_session.flush()
+    struggling, idle = users[0].id, users[1].id
+
+    # Two abandoned attempts and no results; active today.
+    for _ in range(2):
+        db_session.add(
+            AssessmentAttempt(institution_id=institution_id, assessment_id=assessment.id, user_id=struggling)
+        )
+    db_session.add(
+        EngagementEvent(institution_id=institution_id, user_id=struggling, event_type="login", occurred_at=now)
+    )
+    # Doing well, but not seen for ten days.
+    graded = AssessmentAttempt(
+        id=uuid4(), institution_id=institution_id, assessment_id=assessment.id, user_id=idle, status="submitted"
+    )
+    db_session.add(graded)
+    db_session.add(
+        AssessmentResult(
+            institution_id=institution_id, attempt_id=graded.id, user_id=idle, total_score=8, percentage=80.0
+        )
+    )
+    db_session.add(
+        EngagementEvent(
+            institution_id=institution_id, user_id=idle, event_type="login", occurred_at=now - timedelta(days=10)
+        )
+    )
+    await db_session.flush()
+
+    assert await RiskService(db_session).compute_all_users(institution_id) == 2
+    rows = (
+        await db_session.execute(
+            select(StudentRiskScore.user_id, StudentRiskScore.score, StudentRiskScore.level).where(
+                StudentRiskScore.institution_id == institution_id
+            )
+        )
+    ).all()
+    assert {row.user_id: (row.score, row.level) for row in rows} == {
+        struggling: (100, "critical"),
+        idle: (25, "medium"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_writes_mark_users_dirty_and_decay_sweep_finds_expiring_factors(db_session):
+    now = datetime.now(timezone.utc)
+    institution = Institution(id=uuid4(), name="Decay", code=f"D-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    institution_id = institution.id
+    users = [
+        User(
+            id=uuid4(),
+            institution_id=institution_id,
+            email=f"{uuid4().hex[:8]}@test.ac.tz",
+            full_name=f"Student {index}",
+            reg_number=f"REG-{uuid4().hex[:8]}",
+            password_hash="x",
+        )
+        for index in range(2)
+    ]
+    db_session.add_all(users)
+    await db_session.flush()
+    crossing, recent = users[0].id, users[1].id
+    db_session.add_all(
+        [
+            EngagementEvent(
+                institution_id=institution_id,
+                user_id=crossing,
+                event_type="login",
+                occurred_at=now - timedelta(days=7, hours=3),
+            ),
+            EngagementEvent(institution_id=institution_id, user_id=recent, event_type="login", occurred_at=now),
+        ]
+    )
+    await db_session.flush()
+    assert {(institution_id, crossing), (institution_id, recent)} <= db_session.info["risk_dirty_users"]
+
+    service = RiskService(db_session)
+    assert await service.decayed_users(institution_id, lookback=timedelta(hours=26)) == {crossing}
+    assert await service.compute_users(institution_id, [crossing]) == 1
+    level = (
+        await db_session.execute(select(StudentRiskScore.level).where(StudentRiskScore.user_id == crossing))
+    ).scalar_one()
+    assert level == "high"
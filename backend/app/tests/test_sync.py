@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from datetime import UTC, datetime
 from types import SimpleNamespace
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 
 from app.api import deps
 from app.main import app
+from app.models.iam import Institution, User
+from app.schemas.sync import SyncActionEnvelope
+from app.services import sync as sync_module
 from app.services.auth import AuthService
 from app.services.rbac import RbacService
 from app.services.sync import SyncService
@@ -79,3 +83,189 @@ async def test_sync_batch_success(client):
     payload = response.json()
     assert payload[0]["success"] is True
     assert payload[0]["receipt_code"] == "UDSM-DEMO-0001"
+
+
+@pytest.mark.asyncio
+async def test_process_batch_checks_and_stores_idempotency_once_per_batch(db_session, monkeypatch):
+    institution = Institution(id=uuid4(), name="Test", code=f"T-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    user = User(
+        institution_id=institution.id,
+        email="sync@test.ac.tz",
+        full_name="Sync Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    db_session.add(user)
+    await db_session.flush()
+
+    cached_result = {"id": str(uuid4()), "success": True, "receipt_code": "UDSM-CACHED"}
+    lookups: list[list[str]] = []
+    stored: list[dict] = []
+
+    async def fake_check_many(keys):
+        lookups.append(keys)
+        return {"cached": cached_result}
+
+    async def fake_store_many(payloads, ttl_seconds=86400):
+        stored.append(payloads)
+
+    monkeypatch.setattr(sync_module, "check_idempotency_many", fake_check_many)
+    monkeypatch.setattr(sync_module, "store_idempotency_many", fake_store_many)
+
+    def envelope(key: str) -> SyncActionEnvelope:
+        return SyncActionEnvelope(
+            id=uuid4(),
+            entity_type="note",
+            action="create",
+            payload={"key": key},
+            idempotency_key=key,
+            client_created_at=datetime.now(UTC),
+        )
+
+    results = await SyncService(db_session).process_batch(
+        institution_id=institution.id,
+        user_id=user.id,
+        actions=[envelope("cached"), envelope("fresh"), envelope("fresh")],
+    )
+
+    assert lookups == [["cached", "fresh", "fresh"]]
+    assert len(stored) == 1 and list(stored[0]) == ["fresh"]
+    assert results[0].receipt_code == "UDSM-CACHED"
+    assert results[1].receipt_code is not None
+    assert results[2] == results[1]
+
+
+@pytest.mark.asyncio
+async def test_apply_actions_uses_constant_reads_and_chains_receipts(db_session):
+    from sqlalchemy import event, select
+
+    from app.models.academics import AssessmentAttempt
+    from app.models.receipts import Receipt
+
+    institution = Institution(id=uuid4(), name="Test", code=f"T-{uuid4().hex[:8]}", settings={})
+    db_session.add(institution)
+    await db_session.flush()
+    user = User(
+        institution_id=institution.id,
+        email="bulk@test.ac.tz",
+        full_name="Bulk Test",
+        reg_number=f"REG-{uuid4().hex[:8]}",
+        password_hash="x",
+    )
+    db_session.add(user)
+    await db_session.flush()
+    attempt = AssessmentAttempt(institution_id=institution.id, assessment_id=uuid4(), user_id=user.id)
+    db_session.add(attempt)
+    await db_session.flush()
+
+    def envelope(entity_type: str, action: str, payload: dict) -> SyncActionEnvelope:
+        return SyncActionEnvelope(
+            id=uuid4(),
+            entity_type=entity_type,
+            action=action,
+            payload=payload,
+            idempotency_key=str(uuid4()),
+            client_created_at=datetime.now(UTC),
+        )
+
+    def batch(size: int) -> list[SyncActionEnvelope]:
+        return [envelope("note", "create", {"n": index}) for index in range(size)] + [
+            envelope("assessment_attempt", "submit", {"attempt_id": str(uuid4())}),
+        ]
+
+    statements: list[str] = []
+    connection = await db_session.connection()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        # SQLite cannot batch INSERT ... RETURNING, so only reads are compared here.
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(connection.sync_connection, "before_cursor_execute", count)
+    try:
+        service = SyncService(db_session)
+        # The first append creates the user's chain head.
+        await service.apply_actions(institution_id=institution.id, user_id=user.id, actions=batch(1))
+        statements.clear()
+        await service.apply_actions(institution_id=institution.id, user_id=user.id, actions=batch(2))
+        small = len(statements)
+        statements.clear()
+        results = await service.apply_actions(
+            institution_id=institution.id,
+            user_id=user.id,
+            actions=batch(20) + [envelope("assessment_attempt", "submit", {"attempt_id": str(attempt.id)})],
+        )
+        large = len(statements)
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", count)
+
+    assert small == large
+    outcomes = list(results.values())
+    assert outcomes[20].conflict["type"] == "not_found"
+    assert outcomes[21].success and attempt.status == "submitted"
+
+    receipts = (
+        await db_session.execute(
+            select(Receipt).where(Receipt.user_id == user.id).order_by(Receipt.chain_position.asc())
+        )
+    ).scalars().all()
+    assert [receipt.chain_position for receipt in receipts] == list(range(1, 25))
+    for previous, current in zip(receipts, receipts[1:], strict=False):
+        assert current.previous_receipt_hash == previous.receipt_hash
+
+
+@pytest.mark.asyncio
+async def test_process_stream_commits_chunks_and_stops_at_malformed_line(db_session, monkeypatch):
+    from app.schemas.sync import SyncStreamError
+
+    async def fake_check_many(keys):
+        return {}
+
+    async def fake_store_many(payloads, ttl_seconds=86400):
+        return None
+
+    monkeypatch.setattr(sync_module, "check_idempotency_many", fake_check_many)
+    monkeypatch.setattr(sync_module, "store_idempotency_many", fake_store_many)
+
+    chunk_sizes: list[int] = []
+    original_process_batch = SyncService.process_batch
+
+    async def spy_process_batch(self, *, institution_id, user_id, actions):
+        chunk_sizes.append(len(actions))
+        return await original_process_batch(self, institution_id=institution_id, user_id=user_id, actions=actions)
+
+    monkeypatch.setattr(SyncService, "process_batch", spy_process_batch)
+
+    def line(index: int) -> bytes:
+        return SyncActionEnvelope(
+            id=uuid4(),
+            entity_type="note",
+            action="create",
+            payload={"n": index},
+            idempotency_key=str(uuid4()),
+            client_created_at=datetime.now(UTC),
+        ).model_dump_json().encode()
+
+    body = b"\n".join([line(0), line(1), b"", line(2), b'{"id": "broken"}', line(4)]) + b"\n"
+
+    async def chunks():
+        # Split mid-line to exercise buffering.
+        for start in range(0, len(body), 37):
+            yield body[start : start + 37]
+
+    outputs = [
+        output
+        async for output in SyncService(db_session).process_stream(
+            institution_id=uuid4(),
+            user_id=uuid4(),
+            body=chunks(),
+            chunk_size=2,
+            max_line_bytes=4096,
+        )
+    ]
+
+    assert chunk_sizes == [2, 1]
+    assert [output.success for output in outputs] == [True, True, True, False]
+    assert isinstance(outputs[-1], SyncStreamError) and outputs[-1].line == 5
@@ -2,28 +2,40 @@ import json
 from typing import Any
 
 from fastapi import Request
-from redis.asyncio import Redis
 
-from app.config import get_settings
+from app.core.redis import get_redis
 
-settings = get_settings()
+
+def _key(key: str) -> str:
+    return f"idempotency:{key}"
 
 
 async def check_idempotency(key: str) -> dict[str, Any] | None:
-    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
-    try:
-        value = await redis.get(f"idempotency:{key}")
-        return json.loads(value) if value else None
-    finally:
-        await redis.close()
+    value = await get_redis().get(_key(key))
+    return json.loads(value) if value else None
 
 
 async def store_idempotency(key: str, payload: dict[str, Any], ttl_seconds: int = 86400) -> None:
-    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
-    try:
-        await redis.setex(f"idempotency:{key}", ttl_seconds, json.dumps(payload))
-    finally:
-        await redis.close()
+    await get_redis().setex(_key(key), ttl_seconds, json.dumps(payload))
+
+
+async def check_idempotency_many(keys: list[str]) -> dict[str, dict[str, Any]]:
+    """Fetch every cached result for ``keys`` with a single MGET; misses are omitted."""
+    if not keys:
+        return {}
+    unique_keys = list(dict.fromkeys(keys))
+    values = await get_redis().mget([_key(key) for key in unique_keys])
+    return {key: json.loads(value) for key, value in zip(unique_keys, values, strict=True) if value}
+
+
+async def store_idempotency_many(payloads: dict[str, dict[str, Any]], ttl_seconds: int = 86400) -> None:
+    """Store several results in one pipelined round trip."""
+    if not payloads:
+        return
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for key, payload in payloads.items():
+            pipe.setex(_key(key), ttl_seconds, json.dumps(payload))
+        await pipe.execute()
 
 
 def get_idempotency_key(request: Request) -> str | None:
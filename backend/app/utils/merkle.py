@@ -0,0 +1,51 @@
+"""Merkle tree helpers for receipt checkpoints.
+
+Leaves and inner nodes are hashed with distinct prefixes (as in RFC 6962) so an inner
+node can never be passed off as a leaf. A node without a sibling is promoted to the
+next level unchanged, so proofs simply have no step at that level.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Sequence
+from typing import Literal
+
+ProofSide = Literal["left", "right"]
+
+
+def leaf_hash(receipt_hash: str) -> str:
+    return hashlib.sha256(b"\x00" + receipt_hash.encode()).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_levels(leaves: Sequence[str]) -> list[list[str]]:
+    """All levels of the tree, leaves first; the last level holds only the root."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parents = [node_hash(current[i], current[i + 1]) for i in range(0, len(current) - 1, 2)]
+        if len(current) % 2:
+            parents.append(current[-1])
+        levels.append(parents)
+    return levels
+
+
+def sibling_positions(leaf_index: int, leaf_count: int) -> list[tuple[int, int]]:
+    """``(level, position)`` of every node an inclusion proof for ``leaf_index`` may need."""
+    positions = []
+    level, width, index = 0, leaf_count, leaf_index
+    while width > 1:
+        positions.append((level, index ^ 1))
+        level, width, index = level + 1, (width + 1) // 2, index // 2
+    return positions
+
+
+def verify_inclusion(leaf: str, path: Sequence[tuple[str, ProofSide]], root: str) -> bool:
+    current = leaf
+    for sibling, side in path:
+        current = node_hash(sibling, current) if side == "left" else node_hash(current, sibling)
+    return current == root
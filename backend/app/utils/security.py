@@ -1,6 +1,12 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any
+from uuid import UUID
 
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -18,6 +24,54 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def scope_hash(user_id: UUID, updated_at: datetime) -> str:
+    # Changes whenever the user row is touched, e.g. when a role binding is granted.
+    return hashlib.sha256(f"{user_id}:{updated_at.timestamp()}".encode()).hexdigest()
+
+
+RECEIPT_SIGNATURE_SCHEME = "ed25519"
+
+
+@lru_cache
+def receipt_signing_key() -> Ed25519PrivateKey:
+    """The Ed25519 key receipt checkpoint roots are signed with, read once from its PEM file."""
+    with open(settings.RECEIPT_SIGNING_KEY_PATH, "rb") as handle:
+        key = serialization.load_pem_private_key(handle.read(), password=None)
+    if not isinstance(key, Ed25519PrivateKey):
+        raise ValueError("RECEIPT_SIGNING_KEY_PATH must hold an Ed25519 private key")
+    return key
+
+
+def signing_key_id(public_key: Ed25519PublicKey) -> str:
+    raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def receipt_public_key_pem() -> str:
+    public_key = receipt_signing_key().public_key()
+    return public_key.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+def sign_receipt_root(message: str) -> tuple[str, str]:
+    """Sign ``message``; returns the signing key's id and the hex signature."""
+    key = receipt_signing_key()
+    return signing_key_id(key.public_key()), key.sign(message.encode()).hex()
+
+
+def verify_receipt_root(message: str, signature: str, key_id: str | None) -> bool:
+    # Only the current key is known; roots signed before a rotation fail until old keys are kept.
+    public_key = receipt_signing_key().public_key()
+    if key_id != signing_key_id(public_key):
+        return False
+    try:
+        public_key.verify(bytes.fromhex(signature), message.encode())
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
 def _create_token(subject: str, token_type: str, expires_delta: timedelta, extra: dict[str, Any]) -> str:
     now = datetime.now(tz=timezone.utc)
     payload: dict[str, Any] = {
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""Per-request overhead of the request-context and rate-limit middlewares.
+
+Compares the previous ``BaseHTTPMiddleware`` implementations with the pure ASGI
+ones in ``app.core.middleware`` by driving a trivial endpoint directly through
+the ASGI interface, so no network or server cost is included.
+
+    python scripts/bench_middleware.py --requests 20000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections.abc import Callable
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from app.core.middleware import RateLimitMiddleware, RequestContextMiddleware
+
+
+class LegacyRequestContextMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
+        start = time.perf_counter()
+        request_id = request.headers.get("x-request-id", str(uuid.uuid4()))
+        request.state.request_id = request_id
+        request.state.institution_id = request.headers.get("x-institution-id")
+
+        response = await call_next(request)
+        response.headers["x-request-id"] = request_id
+        response.headers["x-latency-ms"] = f"{(time.perf_counter() - start) * 1000:.2f}"
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    _bucket: dict[str, list[float]] = {}
+
+    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
+        now = time.time()
+        key = request.client.host if request.client else "unknown"
+        bucket = self._bucket.setdefault(key, [])
+        bucket[:] = [value for value in bucket if now - value < 60]
+        if len(bucket) >= 120:
+            return Response("Rate limit exceeded", status_code=429)
+        bucket.append(now)
+        return await call_next(request)
+
+
+def build_app(context_cls: type | None, limit_cls: type | None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> PlainTextResponse:
+        return PlainTextResponse("pong")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for _ in range(8):
+                yield b"x" * 1024
+
+        return StreamingResponse(chunks())
+
+    if context_cls is not None:
+        app.add_middleware(context_cls)
+    if limit_cls is not None:
+        app.add_middleware(limit_cls)
+    return app
+
+
+async def drive(app: FastAPI, path: str, requests: int) -> float:
+    async def send(message):
+        return None
+
+    started = time.perf_counter()
+    for index in range(requests):
+        body_sent = False
+
+        async def receive():
+            # The body arrives once; afterwards the client just stays connected.
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Event().wait()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench")],
+            # Spread clients so the rate limiter measures bookkeeping, not 429s.
+            "client": (f"10.0.{index % 250}.{index // 250 % 250}", 1234),
+            "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    variants = {
+        "no middleware": build_app(None, None),
+        "BaseHTTPMiddleware": build_app(LegacyRequestContextMiddleware, LegacyRateLimitMiddleware),
+        "pure ASGI": build_app(RequestContextMiddleware, RateLimitMiddleware),
+    }
+    for path in ("/ping", "/stream"):
+        print(f"{path} ({requests} requests)")
+        baseline = None
+        for name, app in variants.items():
+            await drive(app, path, min(requests, 500))
+            per_request = await drive(app, path, requests)
+            if baseline is None:
+                baseline = per_request
+            print(f"  {name:<20} {per_request:8.1f} us/request  ({per_request - baseline:+7.1f} us)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10000)
+    asyncio.run(main(parser.parse_args().requests))
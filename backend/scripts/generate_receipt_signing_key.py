@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from app.config import get_settings
+
+
+def generate() -> None:
+    path = Path(get_settings().RECEIPT_SIGNING_KEY_PATH)
+    if path.exists():
+        raise SystemExit(f"{path} already exists; move it away first to rotate the key")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    key = Ed25519PrivateKey.generate()
+    path.write_bytes(
+        key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    )
+    path.chmod(0o600)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    generate()